@@ -0,0 +1,196 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PyQt6.QtSql import QSqlDatabase, QSqlQuery
+
+import tracker_config as tkc
+from analytics.rolling_stats import load_tracker
+from database.schema import DERIVED_COLUMNS, TABLE_SLIDER_COLUMNS
+
+# The entered sliders of every tracker, in matrix order.
+SLIDERS: List[Tuple[str, str]] = [(table, slider)
+                                  for table, sliders in TABLE_SLIDER_COLUMNS.items()
+                                  for slider in sliders if slider not in DERIVED_COLUMNS]
+
+
+def asof_indices(anchor_ts: np.ndarray, ts: np.ndarray, tolerance: int) -> np.ndarray:
+    """
+    Finds, for every anchor timestamp, the latest entry at or before it within a tolerance.
+
+    Args:
+        anchor_ts (np.ndarray): The timestamps to align on.
+        ts (np.ndarray): The sorted timestamps of the series being joined.
+        tolerance (int): The maximum age in seconds of a matched entry.
+
+    Returns:
+        np.ndarray: The matched index into ``ts`` per anchor, -1 where nothing matches.
+    """
+    indices = np.searchsorted(ts, anchor_ts, side='right') - 1
+    matched = indices >= 0
+    matched[matched] &= anchor_ts[matched] - ts[indices[matched]] <= tolerance
+    return np.where(matched, indices, -1)
+
+
+def aligned_sliders(db: QSqlDatabase, tolerance: int = tkc.ASOF_TOLERANCE_SECONDS
+                    ) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    As-of joins every tracker onto the union of all their timestamps.
+
+    Each row holds, for one moment, the most recent value of every slider logged
+    no more than ``tolerance`` seconds earlier, or NaN.
+
+    Args:
+        db (QSqlDatabase): The open database connection.
+        tolerance (int): The maximum age in seconds of a carried value.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The union timestamps and the (rows, sliders)
+        matrix in ``SLIDERS`` order.
+    """
+    series = {table: load_tracker(db, table, [slider for t, slider in SLIDERS if t == table])
+              for table in TABLE_SLIDER_COLUMNS}
+    anchor_ts = np.unique(np.concatenate([columns['ts'] for columns in series.values()]))
+    matrix = np.full((len(anchor_ts), len(SLIDERS)), np.nan)
+    for table, columns in series.items():
+        indices = asof_indices(anchor_ts, columns['ts'], tolerance)
+        matched = indices >= 0
+        for position, (slider_table, slider) in enumerate(SLIDERS):
+            if slider_table == table:
+                matrix[matched, position] = columns[slider][indices[matched]]
+    return anchor_ts, matrix
+
+
+def average_ranks(values: np.ndarray) -> np.ndarray:
+    """
+    Ranks each column from 1, giving tied values the average of their ranks.
+
+    Args:
+        values (np.ndarray): A (rows, columns) matrix without NaN.
+
+    Returns:
+        np.ndarray: The ranks, same shape as ``values``.
+    """
+    ranks = np.empty(values.shape)
+    for column in range(values.shape[1]):
+        unique, first, counts = np.unique(np.sort(values[:, column]),
+                                          return_index=True, return_counts=True)
+        average = first + (counts + 1) / 2.0
+        ranks[:, column] = average[np.searchsorted(unique, values[:, column])]
+    return ranks
+
+
+def cross_correlation(leading: np.ndarray, lagging: np.ndarray, method: str) -> np.ndarray:
+    """
+    Correlates every column of ``leading`` with every column of ``lagging`` over complete rows.
+
+    Args:
+        leading (np.ndarray): The (rows, sliders) values at time t.
+        lagging (np.ndarray): The (rows, sliders) values at time t + lag.
+        method (str): 'pearson' or 'spearman'.
+
+    Returns:
+        np.ndarray: The (sliders, sliders) correlation matrix, NaN with fewer than 3 complete rows.
+
+    Raises:
+        ValueError: If the method is unknown.
+    """
+    if method not in ('pearson', 'spearman'):
+        raise ValueError(f"Unknown correlation method: {method}")
+    width = leading.shape[1]
+    complete = ~(np.isnan(leading).any(axis=1) | np.isnan(lagging).any(axis=1))
+    if complete.sum() < 3:
+        return np.full((width, width), np.nan)
+    stacked = np.hstack((leading[complete], lagging[complete]))
+    if method == 'spearman':
+        stacked = average_ranks(stacked)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.corrcoef(stacked, rowvar=False)[:width, width:]
+
+
+class CrossTrackerCorrelation:
+    """
+    Pearson and Spearman correlation matrices across the sliders of all three trackers.
+
+    Results are cached keyed on the state of the database and the requested
+    lags and tolerance, so repeated views only recompute once the data changes.
+    The state is PRAGMA data_version, which moves on every commit by another
+    connection such as the write-behind thread, and total_changes(), which
+    counts this connection's own writes: upserts, edits, soft deletes and their
+    undo, archiving and compaction all invalidate the cache.
+
+    Attributes:
+        columns (List[str]): The "<table>.<slider>" label of each matrix row and column.
+        cache (Dict[Tuple, Dict[str, Any]]): The computed results by key.
+    """
+
+    def __init__(self) -> None:
+        self.columns: List[str] = [f"{table}.{slider}" for table, slider in SLIDERS]
+        self.cache: Dict[Tuple, Dict[str, Any]] = {}
+
+    def clear(self) -> None:
+        """
+        Drops every cached result.
+
+        Returns:
+            None
+        """
+        self.cache.clear()
+
+    def compute(self,
+                db: QSqlDatabase,
+                lags: Sequence[int] = (0,),
+                tolerance: int = tkc.ASOF_TOLERANCE_SECONDS) -> Dict[str, Any]:
+        """
+        Returns the correlation matrices of the as-of joined trackers.
+
+        For a lag L the entry [i, j] correlates slider i at an aligned row with
+        slider j L rows later, so positive lags ask whether i leads j.
+
+        Args:
+            db (QSqlDatabase): The open database connection.
+            lags (Sequence[int]): The row lags to compute, 0 for the plain matrix.
+            tolerance (int): The maximum age in seconds of a carried value.
+
+        Returns:
+            Dict[str, Any]: 'columns', 'rows' (aligned row count) and 'pearson' and
+            'spearman', each mapping lag to a (sliders, sliders) matrix.
+        """
+        state = self.data_state(db)
+        key = (state, tuple(lags), tolerance)
+        cached = self.cache.get(key)
+        if cached is not None and state is not None:
+            return cached
+
+        _, matrix = aligned_sliders(db, tolerance)
+        result: Dict[str, Any] = {'columns': self.columns, 'rows': len(matrix),
+                                  'pearson': {}, 'spearman': {}}
+        for lag in lags:
+            leading = matrix[:len(matrix) - lag] if lag > 0 else matrix[-lag:]
+            lagging = matrix[lag:] if lag > 0 else matrix[:len(matrix) + lag]
+            for method in ('pearson', 'spearman'):
+                result[method][lag] = cross_correlation(leading, lagging, method)
+        # results for older data can never be asked for again
+        self.cache = {cached_key: cached for cached_key, cached in self.cache.items()
+                      if state is not None and cached_key[0] == state}
+        if state is not None:
+            self.cache[key] = result
+        return result
+
+    @staticmethod
+    def data_state(db: QSqlDatabase) -> Optional[Tuple[int, int]]:
+        """
+        Returns PRAGMA data_version and total_changes(), the cache key of the inputs.
+
+        Args:
+            db (QSqlDatabase): The open database connection.
+
+        Returns:
+            Optional[Tuple[int, int]]: Values that differ after any write to the
+            database, by this connection or another one; None if they cannot be read.
+        """
+        query = QSqlQuery(db)
+        state = None
+        if query.exec("SELECT data_version, total_changes() FROM pragma_data_version") and query.next():
+            state = (int(query.value(0)), int(query.value(1)))
+        query.finish()
+        return state
@@ -0,0 +1,297 @@
+import math
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from PyQt6.QtSql import QSqlDatabase, QSqlQuery
+
+import tracker_config as tkc
+from database.archive import iter_archived
+from database.database_utility.column_arrays import query_to_columns
+from database.schema import TABLE_SLIDER_COLUMNS
+from database.tombstones import live_view
+from logger_setup import logger
+
+
+def load_tracker(db: QSqlDatabase,
+                 table: str,
+                 columns: Optional[Sequence[str]] = None,
+                 after_ts: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    Loads a tracker's ts and slider columns, ordered by ts, into contiguous arrays.
+
+    Archived months are read from their memory-mapped partitions, touching only
+    the requested columns, and joined with the rows still in SQLite.
+
+    Args:
+        db (QSqlDatabase): The open database connection.
+        table (str): The tracker table to load.
+        columns (Optional[Sequence[str]]): The slider columns to load, all by default.
+        after_ts (Optional[int]): Only load entries newer than this epoch second.
+
+    Returns:
+        Dict[str, np.ndarray]: 'ts' as int64 and each slider as float64.
+
+    Raises:
+        ValueError: If the table or a column is unknown.
+    """
+    sliders = TABLE_SLIDER_COLUMNS.get(table)
+    if sliders is None:
+        raise ValueError(f"Unknown table: {table}")
+    columns = tuple(sliders if columns is None else columns)
+    unknown = [column for column in columns if column not in sliders]
+    if unknown:
+        raise ValueError(f"Unknown columns for {table}: {unknown}")
+
+    query = QSqlQuery(db)
+    query.setForwardOnly(True)
+    query.prepare(f"SELECT ts, {', '.join(columns)} FROM {live_view(table)} "
+                  f"WHERE ts > ? ORDER BY ts")
+    query.bindValue(0, -2 ** 62 if after_ts is None else after_ts)
+    if not query.exec():
+        logger.error(f"Error loading {table}: {query.lastError().text()}")
+    arrays = query_to_columns(query, ('ts',) + columns, 'q' + 'd' * len(columns))
+    parts = list(iter_archived(db, table, columns, after_ts))
+    if not parts:
+        return {name: np.asarray(values) for name, values in arrays.items()}
+    parts.append(arrays)
+    merged = {name: np.concatenate([np.asarray(part[name]) for part in parts])
+              for name in ('ts',) + columns}
+    if np.any(np.diff(merged['ts']) < 0):
+        # rows back-dated into an archived month interleave with its partition
+        order = np.argsort(merged['ts'], kind='stable')
+        merged = {name: values[order] for name, values in merged.items()}
+    return merged
+
+
+def window_sums(values: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the sum and the number of valid entries of every full trailing window.
+
+    NaN entries add 0 to the sum and nothing to the count, so one NULL slider
+    only affects the windows it falls in instead of every later running sum.
+
+    Args:
+        values (np.ndarray): The series, NaN for NULL.
+        window (int): The number of entries per window.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The sums and counts of the windows ending
+        at each entry from ``window - 1`` on.
+    """
+    valid = ~np.isnan(values)
+    sums = np.cumsum(np.concatenate(([0.0], np.where(valid, values, 0.0))))
+    counts = np.cumsum(np.concatenate(([0], valid)))
+    return sums[window:] - sums[:-window], counts[window:] - counts[:-window]
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Returns the trailing moving average, NaN until the window is full.
+
+    NaN entries are skipped; a window holding no valid entry is NaN.
+
+    Args:
+        values (np.ndarray): The series.
+        window (int): The number of entries per window.
+
+    Returns:
+        np.ndarray: The moving average, aligned with ``values``.
+    """
+    out = np.full(values.shape, np.nan)
+    if len(values) >= window:
+        sums, counts = window_sums(values, window)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out[window - 1:] = np.where(counts > 0, sums / counts, np.nan)
+    return out
+
+
+def rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Returns the trailing sample standard deviation, NaN until the window is full.
+
+    NaN entries are skipped; a window holding fewer than two valid entries is NaN.
+
+    Args:
+        values (np.ndarray): The series.
+        window (int): The number of entries per window, at least 2.
+
+    Returns:
+        np.ndarray: The rolling standard deviation, aligned with ``values``.
+    """
+    out = np.full(values.shape, np.nan)
+    if window > 1 and len(values) >= window:
+        sums, counts = window_sums(values, window)
+        squares, _ = window_sums(values * values, window)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            variance = (squares - sums * sums / counts) / (counts - 1)
+        out[window - 1:] = np.where(counts > 1, np.sqrt(np.maximum(variance, 0.0)), np.nan)
+    return out
+
+
+def rolling_extreme(values: np.ndarray, window: int, maximum: bool) -> np.ndarray:
+    """
+    Returns the trailing rolling minimum or maximum, NaN until the window is full.
+
+    NaN entries are skipped; a window holding no valid entry is NaN.
+
+    Args:
+        values (np.ndarray): The series.
+        window (int): The number of entries per window.
+        maximum (bool): True for the rolling maximum, False for the minimum.
+
+    Returns:
+        np.ndarray: The rolling extreme, aligned with ``values``.
+    """
+    out = np.full(values.shape, np.nan)
+    if len(values) >= window:
+        windows = sliding_window_view(values, window)
+        out[window - 1:] = (np.fmax if maximum else np.fmin).reduce(windows, axis=1)
+    return out
+
+
+def ewma(values: np.ndarray, span: int, previous: Optional[float] = None) -> np.ndarray:
+    """
+    Returns the exponentially weighted moving average, y = a * x + (1 - a) * y_prev.
+
+    The recurrence is unrolled in closed form over blocks short enough for the
+    decay powers to stay inside float64, so there is no per-entry Python loop.
+    A NaN entry carries the previous value forward: the decay is raised to the
+    number of valid entries seen instead of the position.
+
+    Args:
+        values (np.ndarray): The series.
+        span (int): The EWMA span, a = 2 / (span + 1).
+        previous (Optional[float]): The EWMA just before ``values``; the first valid
+            value seeds it by default, and the entries before it are NaN.
+
+    Returns:
+        np.ndarray: The EWMA, aligned with ``values``.
+    """
+    out = np.full(values.shape, np.nan)
+    if len(values) == 0:
+        return out
+    valid = ~np.isnan(values)
+    if previous is None or math.isnan(previous):
+        if not valid.any():
+            return out
+        first = int(np.argmax(valid))
+        return np.concatenate((out[:first], ewma(values[first:], span, float(values[first]))))
+    alpha = 2.0 / (span + 1)
+    decay = 1.0 - alpha
+    if decay == 0.0:
+        # each valid entry replaces the average outright
+        latest = np.maximum.accumulate(np.where(valid, np.arange(len(values)), -1))
+        out[:] = np.where(latest >= 0, values[np.maximum(latest, 0)], previous)
+        return out
+
+    filled = np.where(valid, values, 0.0)
+    state = previous
+    block = max(1, min(len(values), int(200 / -math.log10(decay))))
+    for start in range(0, len(values), block):
+        chunk = filled[start:start + block]
+        size = len(chunk)
+        seen = np.cumsum(valid[start:start + size])
+        weighted = np.cumsum(chunk * decay ** -seen) * alpha * decay ** seen
+        out[start:start + size] = decay ** seen * state + weighted
+        state = out[start + size - 1]
+    return out
+
+
+class RollingStats:
+    """
+    Windowed statistics for every slider of one tracker, with incremental updates.
+
+    ``load`` computes moving averages, rolling standard deviations, rolling
+    min/max and EWMAs for the whole history in vectorized passes. ``refresh``
+    then only processes entries newer than the last one seen, carrying the tail
+    of the history and the EWMA state across calls.
+
+    Attributes:
+        table (str): The tracker table.
+        windows (Sequence[int]): The rolling window lengths, in entries.
+        spans (Sequence[int]): The EWMA spans, in entries.
+        history (Dict[str, np.ndarray]): 'ts', the slider values and every statistic,
+            keyed '<slider>_<stat>_<window>' with stat in mean, std, min, max and ewma.
+    """
+
+    def __init__(self,
+                 table: str,
+                 windows: Sequence[int] = tkc.ROLLING_WINDOWS,
+                 spans: Sequence[int] = tkc.EWMA_SPANS) -> None:
+        self.table: str = table
+        self.sliders = TABLE_SLIDER_COLUMNS[table]
+        self.windows: Sequence[int] = tuple(windows)
+        self.spans: Sequence[int] = tuple(spans)
+        self.history: Dict[str, np.ndarray] = {}
+        self.ewma_state: Dict[str, float] = {}
+
+    def load(self, db: QSqlDatabase) -> Dict[str, np.ndarray]:
+        """
+        Loads the tracker's full history and computes every statistic.
+
+        Args:
+            db (QSqlDatabase): The open database connection.
+
+        Returns:
+            Dict[str, np.ndarray]: The full history, see ``history``.
+        """
+        self.history = {}
+        self.ewma_state = {}
+        self.append(load_tracker(db, self.table))
+        return self.history
+
+    def refresh(self, db: QSqlDatabase) -> Dict[str, np.ndarray]:
+        """
+        Loads only entries newer than the last one seen and extends the statistics.
+
+        Entries back-dated before the last seen ts are not picked up; call ``load``
+        to recompute from scratch after editing history.
+
+        Args:
+            db (QSqlDatabase): The open database connection.
+
+        Returns:
+            Dict[str, np.ndarray]: The statistics of the new entries only.
+        """
+        if not self.history or len(self.history['ts']) == 0:
+            return self.load(db)
+        return self.append(load_tracker(db, self.table, after_ts=int(self.history['ts'][-1])))
+
+    def append(self, new: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        Extends the statistics with new entries, in ts order.
+
+        Each windowed statistic is recomputed over the last ``max(windows) - 1``
+        known values plus the new ones, so the cost follows the new rows only.
+
+        Args:
+            new (Dict[str, np.ndarray]): 'ts' and the slider arrays of the new entries.
+
+        Returns:
+            Dict[str, np.ndarray]: The statistics of the new entries only.
+        """
+        count = len(new['ts'])
+        overlap = max(self.windows, default=1) - 1
+        added: Dict[str, np.ndarray] = {'ts': new['ts']}
+        for slider in self.sliders:
+            values = np.asarray(new[slider], dtype=float)
+            known = self.history.get(slider, np.empty(0))
+            carried = known[len(known) - min(overlap, len(known)):]
+            series = np.concatenate((carried, values))
+            added[slider] = values
+            for window in self.windows:
+                added[f"{slider}_mean_{window}"] = rolling_mean(series, window)[len(carried):]
+                added[f"{slider}_std_{window}"] = rolling_std(series, window)[len(carried):]
+                added[f"{slider}_min_{window}"] = rolling_extreme(series, window, False)[len(carried):]
+                added[f"{slider}_max_{window}"] = rolling_extreme(series, window, True)[len(carried):]
+            for span in self.spans:
+                key = f"{slider}_ewma_{span}"
+                added[key] = ewma(values, span, self.ewma_state.get(key))
+                if count:
+                    self.ewma_state[key] = float(added[key][-1])
+
+        for key, values in added.items():
+            known = self.history.get(key)
+            self.history[key] = values if known is None else np.concatenate((known, values))
+        return added
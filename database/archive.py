@@ -0,0 +1,354 @@
+import os
+import struct
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PyQt6.QtSql import QSqlDatabase, QSqlQuery
+
+import tracker_config as tkc
+from database.archive_catalog import CATALOG, next_month, partition_name, partitions
+from database.database_utility.column_arrays import query_to_columns
+from database.rollups import archive_rollup_table, fold_into_sql, rollup_table
+from database.schema import TABLE_SLIDER_COLUMNS, TRACKERS_BY_TABLE
+from database.tombstones import live_view
+from logger_setup import logger
+
+# Partition file layout: a header, one entry per column, then the column arrays,
+# each starting on an ALIGNMENT boundary so it can be memory-mapped in place.
+MAGIC = b'PRGA'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIq')  # magic, version, column count, row count, base ts
+COLUMN = struct.Struct('<24s8sQ')  # name, numpy dtype string, byte offset
+ALIGNMENT = 64
+
+
+def column_layout(table: str) -> List[Tuple[str, np.dtype]]:
+    """
+    Returns the stored columns of a tracker's partitions and their on-disk types.
+
+    ts is stored as uint32 deltas from the previous entry, the first one from
+    the header's base ts. Sliders whose range fits take one byte, with the
+    maximum of the type marking NULL.
+
+    Args:
+        table (str): The tracker table.
+
+    Returns:
+        List[Tuple[str, np.dtype]]: (name, dtype) in file order.
+    """
+    layout = [('id', np.dtype('<i8')), ('ts', np.dtype('<u4'))]
+    ranges = {field.name: field.value_range for field in TRACKERS_BY_TABLE[table].fields}
+    for slider in TABLE_SLIDER_COLUMNS[table]:
+        low, high = ranges[slider]
+        layout.append((slider, np.dtype('<u1') if low >= 0 and high < 255 else np.dtype('<i4')))
+    return layout
+
+
+def null_marker(dtype: np.dtype) -> int:
+    """
+    Returns the value standing for NULL in a stored slider column.
+
+    Args:
+        dtype (np.dtype): The column type.
+
+    Returns:
+        int: The largest value of the type.
+    """
+    return int(np.iinfo(dtype).max)
+
+
+def write_partition(path: str, table: str, columns: Dict[str, np.ndarray]) -> int:
+    """
+    Writes one month of rows, sorted by ts, as a partition file.
+
+    The file is written beside its target and moved into place once synced,
+    so a reader never sees half a partition.
+
+    Args:
+        path (str): The partition file.
+        table (str): The tracker table.
+        columns (Dict[str, np.ndarray]): 'id', 'ts' and every slider; NaN marks NULL.
+
+    Returns:
+        int: The size of the file in bytes.
+
+    Raises:
+        ValueError: If ts is not increasing or a month spans more than 2**32 seconds.
+    """
+    ts = np.asarray(columns['ts'], dtype=np.int64)
+    rows = len(ts)
+    base = int(ts[0]) if rows else 0
+    deltas = np.diff(ts, prepend=base)
+    if rows and (deltas.min() < 0 or deltas.max() > np.iinfo(np.uint32).max):
+        raise ValueError(f"Cannot delta-encode the timestamps of {path}")
+
+    layout = column_layout(table)
+    arrays = []
+    for name, dtype in layout:
+        if name == 'ts':
+            arrays.append(deltas.astype(dtype))
+        elif name == 'id':
+            arrays.append(np.asarray(columns[name]).astype(dtype))
+        else:
+            values = np.asarray(columns[name], dtype=float)
+            arrays.append(np.where(np.isnan(values), null_marker(dtype), values).astype(dtype))
+
+    offset = HEADER.size + COLUMN.size * len(layout)
+    offsets = []
+    for array in arrays:
+        offset += -offset % ALIGNMENT
+        offsets.append(offset)
+        offset += array.nbytes
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    partial = f"{path}.partial"
+    with open(partial, 'wb') as handle:
+        handle.write(HEADER.pack(MAGIC, VERSION, len(layout), rows, base))
+        for (name, dtype), column_offset in zip(layout, offsets):
+            handle.write(COLUMN.pack(name.encode(), dtype.str.encode(), column_offset))
+        for array, column_offset in zip(arrays, offsets):
+            handle.write(b'\0' * (column_offset - handle.tell()))
+            handle.write(array.tobytes())
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(partial, path)
+    return offset
+
+
+def read_partition(path: str) -> Dict[str, np.ndarray]:
+    """
+    Maps a partition file without reading it.
+
+    Every column is a read-only ``numpy.memmap`` over the file, so only the
+    pages of the columns actually used are ever read. 'ts' is decoded from its
+    deltas, which costs one pass over four bytes per row.
+
+    Args:
+        path (str): The partition file.
+
+    Returns:
+        Dict[str, np.ndarray]: 'ts' as int64 and every other column in its stored type.
+
+    Raises:
+        ValueError: If the file is not a partition of a known version.
+    """
+    with open(path, 'rb') as handle:
+        magic, version, count, rows, base = HEADER.unpack(handle.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} archive partition")
+        entries = [COLUMN.unpack(handle.read(COLUMN.size)) for _ in range(count)]
+
+    columns: Dict[str, np.ndarray] = {}
+    for name, dtype, offset in entries:
+        name = name.rstrip(b'\0').decode()
+        dtype = np.dtype(dtype.rstrip(b'\0').decode())
+        columns[name] = (np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(rows,))
+                         if rows else np.empty(0, dtype=dtype))
+    columns['ts'] = base + np.cumsum(columns['ts'], dtype=np.int64)
+    return columns
+
+
+def slider_values(column: np.ndarray) -> np.ndarray:
+    """
+    Widens a stored slider column to float64, with NaN for NULL.
+
+    Args:
+        column (np.ndarray): The column from ``read_partition``.
+
+    Returns:
+        np.ndarray: The values.
+    """
+    values = column.astype(np.float64)
+    values[column == null_marker(column.dtype)] = np.nan
+    return values
+
+
+def iter_archived(db: QSqlDatabase,
+                  table: str,
+                  columns: Sequence[str],
+                  after_ts: Optional[int] = None,
+                  directory: str = tkc.ARCHIVE_DIR,
+                  before_ts: Optional[int] = None) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Yields the archived months of a tracker, oldest first, as id, ts and slider arrays.
+
+    Args:
+        db (QSqlDatabase): The open database connection.
+        table (str): The tracker table.
+        columns (Sequence[str]): The slider columns wanted.
+        after_ts (Optional[int]): Only entries newer than this epoch second.
+        directory (str): The archive directory.
+        before_ts (Optional[int]): Only entries older than this epoch second.
+
+    Returns:
+        Iterator[Dict[str, np.ndarray]]: 'id' and 'ts' as int64 and each slider as float64.
+    """
+    for _, path, _, first_ts, last_ts in partitions(db, table, after_ts):
+        if before_ts is not None and first_ts >= before_ts:
+            break
+        partition = read_partition(os.path.join(directory, path))
+        start, stop = 0, len(partition['ts'])
+        if after_ts is not None and first_ts <= after_ts:
+            start = int(np.searchsorted(partition['ts'], after_ts, side='right'))
+        if before_ts is not None and last_ts >= before_ts:
+            stop = int(np.searchsorted(partition['ts'], before_ts, side='left'))
+        keep = slice(start, stop)
+        chunk = {'id': np.asarray(partition['id'][keep], dtype=np.int64), 'ts': partition['ts'][keep]}
+        for column in columns:
+            chunk[column] = slider_values(partition[column][keep])
+        yield chunk
+
+
+def stamp_texts(stamps: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Formats epoch seconds back into the stored "yyyy-MM-dd" and "hh:mm:ss" text, in one pass.
+
+    Args:
+        stamps (np.ndarray): The epoch seconds, wall-clock as ``to_epoch`` gives them.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The date and time strings.
+    """
+    parts = np.char.partition(np.datetime_as_string(stamps.astype('datetime64[s]'), unit='s'), 'T')
+    return parts[:, 0], parts[:, 2]
+
+
+def archived_row_chunks(db: QSqlDatabase,
+                        table: str,
+                        start: Optional[int] = None,
+                        end: Optional[int] = None,
+                        chunk_size: int = tkc.EXPORT_CHUNK_SIZE,
+                        directory: str = tkc.ARCHIVE_DIR) -> Iterator[List[Tuple[Any, ...]]]:
+    """
+    Yields the archived entries of a tracker as rows shaped like the table's, oldest month first.
+
+    Each row is the id, the ``TABLE_COLUMNS`` with the date and time formatted
+    from ts and NULL sliders as None, then ts, the order the exports write.
+
+    Args:
+        db (QSqlDatabase): The open database connection.
+        table (str): The tracker table.
+        start (Optional[int]): The first epoch second to include.
+        end (Optional[int]): The epoch second to stop before.
+        chunk_size (int): The most rows per chunk.
+        directory (str): The archive directory.
+
+    Returns:
+        Iterator[List[Tuple[Any, ...]]]: Lists of rows.
+    """
+    sliders = TABLE_SLIDER_COLUMNS[table]
+    for month in iter_archived(db, table, sliders, None if start is None else start - 1,
+                               directory, end):
+        for first in range(0, len(month['ts']), chunk_size):
+            ts = month['ts'][first:first + chunk_size]
+            dates, times = stamp_texts(ts)
+            values = [month[slider][first:first + chunk_size].tolist() for slider in sliders]
+            yield [(int(row_id), str(date), str(time_of_day))
+                   + tuple(None if value != value else int(value) for value in row_values)
+                   + (int(stamp),)
+                   for row_id, date, time_of_day, stamp, *row_values
+                   in zip(month['id'][first:first + chunk_size].tolist(), dates, times,
+                          ts.tolist(), *values)]
+
+
+def archived_timestamps(db: QSqlDatabase, table: str, first: int, last: int,
+                        directory: str = tkc.ARCHIVE_DIR) -> np.ndarray:
+    """
+    Returns the archived timestamps of a tracker within a range.
+
+    Args:
+        db (QSqlDatabase): The open database connection.
+        table (str): The tracker table.
+        first (int): The first epoch second to look at.
+        last (int): The last epoch second to look at.
+        directory (str): The archive directory.
+
+    Returns:
+        np.ndarray: The timestamps, int64.
+    """
+    found = [np.empty(0, dtype=np.int64)]
+    for _, path, _, first_ts, last_ts in partitions(db, table, first - 1):
+        if first_ts > last:
+            break
+        ts = read_partition(os.path.join(directory, path))['ts']
+        found.append(ts[(ts >= first) & (ts <= last)])
+    return np.concatenate(found)
+
+
+def archive_month(db: QSqlDatabase,
+                  table: str,
+                  month: int,
+                  directory: str = tkc.ARCHIVE_DIR) -> Optional[str]:
+    """
+    Moves one month of a tracker out of SQLite into a partition file.
+
+    The live rows are written and read back first. Then, in one transaction,
+    the month's daily rollups are copied to the archived rollup table, its rows
+    are deleted (tombstones included) and the partition is cataloged. Rollup
+    based aggregates therefore keep covering the archived days. A crash before
+    the commit leaves the month in SQLite, and the next run rewrites the file.
+
+    Args:
+        db (QSqlDatabase): The open database connection.
+        table (str): The tracker table.
+        month (int): The first second of the month.
+        directory (str): The archive directory.
+
+    Returns:
+        Optional[str]: The partition written, None if the month had no live rows.
+
+    Raises:
+        RuntimeError: If the read-back check or the transaction fails.
+    """
+    end = next_month(month)
+    sliders = TABLE_SLIDER_COLUMNS[table]
+    query = QSqlQuery(db)
+    query.setForwardOnly(True)
+    query.prepare(f"""SELECT id, ts, {', '.join(sliders)} FROM {live_view(table)}
+                      WHERE ts >= ? AND ts < ? ORDER BY ts""")
+    query.bindValue(0, month)
+    query.bindValue(1, end)
+    if not query.exec():
+        raise RuntimeError(query.lastError().text())
+    rows = query_to_columns(query, ('id', 'ts') + sliders, 'qq' + 'd' * len(sliders))
+    if len(rows['ts']) == 0:
+        return None
+
+    name = partition_name(table, month)
+    path = os.path.join(directory, name)
+    write_partition(path, table, rows)
+    written = read_partition(path)
+    if not (np.array_equal(written['ts'], rows['ts']) and np.array_equal(written['id'], rows['id'])):
+        os.remove(path)
+        raise RuntimeError(f"Read-back check of {path} failed")
+
+    if not db.transaction():
+        raise RuntimeError(db.lastError().text())
+    try:
+        statements = [
+            # folded, since days compacted by the retention policy may already be there
+            (fold_into_sql(table, archive_rollup_table(table),
+                           f"SELECT * FROM {rollup_table(table)} WHERE day >= ? AND day < ?"),
+             (month, end)),
+            (f"DELETE FROM {table} WHERE ts >= ? AND ts < ?", (month, end)),
+            (f"""INSERT INTO {CATALOG} (tracker, month, path, row_count, first_ts, last_ts,
+                                        archived_at) VALUES (?, ?, ?, ?, ?, ?, ?)""",
+             (table, month, name, len(rows['ts']), int(rows['ts'][0]), int(rows['ts'][-1]),
+              int(time.time()))),
+        ]
+        for sql, binds in statements:
+            query.prepare(sql)
+            for position, value in enumerate(binds):
+                query.bindValue(position, value)
+            if not query.exec():
+                raise RuntimeError(query.lastError().text())
+        query.finish()
+        if not db.commit():
+            raise RuntimeError(db.lastError().text())
+    except Exception:
+        query.finish()
+        db.rollback()
+        raise
+    logger.info(f"Archived {len(rows['ts'])} rows of {table} to {path}")
+    return path
@@ -0,0 +1,158 @@
+import os
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from PyQt6.QtSql import QSqlDatabase, QSqlQuery
+
+from database.rollups import archive_rollup_table, rollup_columns_sql
+from database.schema import TABLE_SLIDER_COLUMNS
+from database.tombstones import live_view
+from logger_setup import logger
+
+# The catalog of archived months, kept in the database so it commits with the delete
+CATALOG = 'archive_partitions'
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def archive_ddl() -> List[str]:
+    """
+    Returns the statements that create the partition catalog and the archived rollup tables.
+
+    Returns:
+        List[str]: The CREATE statements, safe to run more than once.
+    """
+    statements = [f"""CREATE TABLE IF NOT EXISTS {CATALOG} (
+                      tracker TEXT NOT NULL,
+                      month INTEGER NOT NULL,
+                      path TEXT NOT NULL,
+                      row_count INTEGER NOT NULL,
+                      first_ts INTEGER NOT NULL,
+                      last_ts INTEGER NOT NULL,
+                      archived_at INTEGER NOT NULL,
+                      PRIMARY KEY (tracker, month)
+                      )"""]
+    for table in TABLE_SLIDER_COLUMNS:
+        statements.append(f"""CREATE TABLE IF NOT EXISTS {archive_rollup_table(table)} (
+                              {rollup_columns_sql(table)}
+                              )""")
+    return statements
+
+
+def month_start(ts: int) -> int:
+    """
+    Returns the epoch second the month of a timestamp starts at.
+
+    Args:
+        ts (int): An epoch second, read as wall-clock time like every ts.
+
+    Returns:
+        int: The first second of its month.
+    """
+    moment = _EPOCH + timedelta(seconds=ts)
+    return int((datetime(moment.year, moment.month, 1) - _EPOCH).total_seconds())
+
+
+def next_month(start: int) -> int:
+    """
+    Returns the start of the month after the one starting at ``start``.
+
+    Args:
+        start (int): The first second of a month.
+
+    Returns:
+        int: The first second of the next month.
+    """
+    return month_start(start + 32 * 86400)
+
+
+def archive_cutoff(months_kept: int, now: Optional[float] = None) -> int:
+    """
+    Returns the start of the oldest month that stays in SQLite.
+
+    Args:
+        months_kept (int): The number of whole months kept live before the current one.
+        now (Optional[float]): The current epoch time, default the clock.
+
+    Returns:
+        int: Months ending at or before this second are closed and may be archived.
+    """
+    moment = datetime.now() if now is None else _EPOCH + timedelta(seconds=now)
+    index = moment.year * 12 + moment.month - 1 - months_kept
+    return int((datetime(index // 12, index % 12 + 1, 1) - _EPOCH).total_seconds())
+
+
+def partition_name(table: str, month: int) -> str:
+    """
+    Returns the path of a month's partition relative to the archive directory.
+
+    Args:
+        table (str): The tracker table.
+        month (int): The first second of the month.
+
+    Returns:
+        str: e.g. "wefe_table/2023-04.col".
+    """
+    return os.path.join(table, f"{_EPOCH + timedelta(seconds=month):%Y-%m}.col")
+
+
+def partitions(db: QSqlDatabase, table: str,
+               after_ts: Optional[int] = None) -> List[Tuple[int, str, int, int, int]]:
+    """
+    Lists the archived months of a tracker, oldest first.
+
+    Args:
+        db (QSqlDatabase): The open database connection.
+        table (str): The tracker table.
+        after_ts (Optional[int]): Skip months with no entry newer than this epoch second.
+
+    Returns:
+        List[Tuple[int, str, int, int, int]]: (month, relative path, rows, first ts, last ts).
+    """
+    query = QSqlQuery(db)
+    query.prepare(f"""SELECT month, path, row_count, first_ts, last_ts FROM {CATALOG}
+                      WHERE tracker = ? AND last_ts > ? ORDER BY month""")
+    query.bindValue(0, table)
+    query.bindValue(1, -2 ** 62 if after_ts is None else after_ts)
+    found = []
+    if query.exec():
+        while query.next():
+            found.append((int(query.value(0)), query.value(1), int(query.value(2)),
+                          int(query.value(3)), int(query.value(4))))
+    else:
+        logger.error(f"Error listing archive of {table}: {query.lastError().text()}")
+    query.finish()
+    return found
+
+
+def closed_months(db: QSqlDatabase, table: str, cutoff: int) -> List[int]:
+    """
+    Lists the months before ``cutoff`` that hold live rows and are not archived yet.
+
+    Back-dated rows logged into a month that is already archived stay in SQLite,
+    where the readers pick them up alongside the partition.
+
+    Args:
+        db (QSqlDatabase): The open database connection.
+        table (str): The tracker table.
+        cutoff (int): The start of the oldest month kept in SQLite.
+
+    Returns:
+        List[int]: The month starts, oldest first.
+    """
+    query = QSqlQuery(db)
+    query.prepare(f"""SELECT DISTINCT CAST(strftime('%s', ts, 'unixepoch', 'start of month')
+                                           AS INTEGER) AS month
+                      FROM {live_view(table)} WHERE ts < ?
+                      AND month NOT IN (SELECT month FROM {CATALOG} WHERE tracker = ?)
+                      ORDER BY month""")
+    query.bindValue(0, cutoff)
+    query.bindValue(1, table)
+    months = []
+    if query.exec():
+        while query.next():
+            months.append(int(query.value(0)))
+    else:
+        logger.error(f"Error finding months to archive in {table}: {query.lastError().text()}")
+    query.finish()
+    return months
@@ -0,0 +1,326 @@
+import glob
+import gzip
+import multiprocessing
+import os
+import pathlib
+import queue
+import shutil
+import sqlite3
+import time
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from PyQt6.QtCore import QObject, QThread, pyqtSignal
+
+import tracker_config as tkc
+from logger_setup import logger
+
+
+def snapshot_prefix(db_path: str) -> str:
+    """
+    Returns the file name prefix shared by every snapshot of a database.
+
+    Args:
+        db_path (str): The database file being backed up.
+
+    Returns:
+        str: The database file name without its extension, plus a dash.
+    """
+    return f"{os.path.splitext(os.path.basename(db_path))[0]}-"
+
+
+def list_snapshots(directory: str, db_path: str) -> List[str]:
+    """
+    Returns the snapshots of a database in a directory, oldest first.
+
+    Args:
+        directory (str): The backup directory.
+        db_path (str): The database file being backed up.
+
+    Returns:
+        List[str]: The snapshot paths; the timestamped names sort chronologically.
+    """
+    pattern = os.path.join(glob.escape(directory), f"{glob.escape(snapshot_prefix(db_path))}*.db")
+    return sorted(glob.glob(pattern) + glob.glob(f"{pattern}.gz"))
+
+
+def prune_snapshots(directory: str, db_path: str, keep: int = tkc.BACKUP_RETENTION) -> List[str]:
+    """
+    Deletes all but the newest ``keep`` snapshots of a database.
+
+    Args:
+        directory (str): The backup directory.
+        db_path (str): The database file being backed up.
+        keep (int): The number of snapshots to keep.
+
+    Returns:
+        List[str]: The snapshots that were deleted.
+    """
+    snapshots = list_snapshots(directory, db_path)
+    expired = snapshots[:max(len(snapshots) - keep, 0)]
+    for path in expired:
+        os.remove(path)
+    return expired
+
+
+def backup_due(directory: str, db_path: str,
+               interval_seconds: int = tkc.BACKUP_INTERVAL_SECONDS) -> bool:
+    """
+    Tells whether the newest snapshot of a database is older than the backup interval.
+
+    Args:
+        directory (str): The backup directory.
+        db_path (str): The database file being backed up.
+        interval_seconds (int): The wanted time between two snapshots.
+
+    Returns:
+        bool: True if there is no snapshot yet or the newest one is too old.
+    """
+    snapshots = list_snapshots(directory, db_path)
+    return not snapshots or time.time() - os.path.getmtime(snapshots[-1]) >= interval_seconds
+
+
+def verify_snapshot(path: str) -> bool:
+    """
+    Runs PRAGMA quick_check on an uncompressed snapshot.
+
+    Args:
+        path (str): The snapshot file.
+
+    Returns:
+        bool: True if SQLite reports the file as ok.
+    """
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute("PRAGMA quick_check").fetchone()[0] == 'ok'
+    finally:
+        connection.close()
+
+
+def backup_partitions(snapshot: str, archive_dir: str, directory: str) -> List[str]:
+    """
+    Copies the archive partitions a snapshot's catalog lists into ``directory``.
+
+    Partitions never change once cataloged, so one already copied with the same
+    size is skipped and every snapshot in a backup directory shares the same
+    copies; they are not pruned with the snapshots. Each copy goes through a
+    ".partial" file so an interrupted backup never leaves a torn partition.
+
+    Args:
+        snapshot (str): The uncompressed snapshot whose catalog is read.
+        archive_dir (str): The live archive directory the partitions are copied from.
+        directory (str): The backup's archive directory, laid out like ``archive_dir``.
+
+    Returns:
+        List[str]: The partitions copied this time.
+
+    Raises:
+        FileNotFoundError: If a cataloged partition is missing from ``archive_dir``.
+    """
+    connection = sqlite3.connect(snapshot)
+    try:
+        paths = [row[0] for row in connection.execute("SELECT path FROM archive_partitions")]
+    except sqlite3.OperationalError:
+        # a database from before the archive has no catalog, nothing to copy
+        paths = []
+    finally:
+        connection.close()
+
+    copied = []
+    for path in paths:
+        source, target = os.path.join(archive_dir, path), os.path.join(directory, path)
+        if os.path.exists(target) and os.path.getsize(target) == os.path.getsize(source):
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(source, f"{target}.partial")
+        os.replace(f"{target}.partial", target)
+        copied.append(target)
+    return copied
+
+
+def backup_database(source: str,
+                    target: str,
+                    compress: bool = False,
+                    pages: int = tkc.BACKUP_PAGES_PER_STEP,
+                    sleep: float = tkc.BACKUP_STEP_SLEEP,
+                    progress: Optional[Callable[[int, int], None]] = None,
+                    archive_dir: str = tkc.ARCHIVE_DIR) -> str:
+    """
+    Copies a database with the SQLite online backup API, ``pages`` pages per step.
+
+    The source is opened read-only, and between steps the lock is released for
+    ``sleep`` seconds so other connections keep writing; SQLite restarts the copy
+    if they do, so the result is always one consistent snapshot. The copy is
+    quick-checked before it is (optionally) gzipped and moved into place, so a
+    torn or failed backup never takes the target name. The archived months its
+    catalog lists are copied first into an "archive" directory next to the
+    target (see ``backup_partitions``); restoring means copying that directory
+    back to ``ARCHIVE_DIR`` along with the snapshot.
+
+    This opens its own sqlite3 connection, which must not share a process with
+    open Qt connections to the same file: the two SQLite builds do not see each
+    other's POSIX locks. Use ``BackupWorker`` while the app is running.
+
+    Args:
+        source (str): The database file to back up.
+        target (str): The snapshot path; ".gz" is appended when compressing.
+        compress (bool): Gzip the snapshot.
+        pages (int): The number of pages copied per step.
+        sleep (float): The seconds to yield between steps.
+        progress (Optional[Callable[[int, int], None]]): Called with (pages copied, total pages).
+        archive_dir (str): The archive directory the source's partitions live in.
+
+    Returns:
+        str: The path written.
+
+    Raises:
+        RuntimeError: If the snapshot fails its integrity check.
+        FileNotFoundError: If an archived month's partition is missing.
+        sqlite3.Error: If the backup fails.
+    """
+    partial = f"{target}.partial"
+    source_connection = sqlite3.connect(f"{pathlib.Path(source).resolve().as_uri()}?mode=ro", uri=True)
+    target_connection = sqlite3.connect(partial)
+    try:
+        source_connection.backup(
+            target_connection, pages=pages, sleep=sleep,
+            progress=None if progress is None
+            else lambda status, remaining, total: progress(total - remaining, total))
+    finally:
+        target_connection.close()
+        source_connection.close()
+
+    if not verify_snapshot(partial):
+        os.remove(partial)
+        raise RuntimeError(f"Backup of {source} failed its integrity check")
+    try:
+        backup_partitions(partial, archive_dir, os.path.join(os.path.dirname(target), 'archive'))
+    except Exception:
+        os.remove(partial)
+        raise
+    if compress:
+        target = f"{target}.gz"
+        with open(partial, 'rb') as raw, gzip.open(f"{target}.partial", 'wb') as packed:
+            shutil.copyfileobj(raw, packed)
+        os.remove(partial)
+        partial = f"{target}.partial"
+    os.replace(partial, target)
+    return target
+
+
+def run_backup(source: str,
+               directory: str = tkc.BACKUP_DIR,
+               compress: bool = tkc.BACKUP_COMPRESS,
+               keep: int = tkc.BACKUP_RETENTION,
+               progress: Optional[Callable[[int, int], None]] = None) -> str:
+    """
+    Writes a timestamped, verified snapshot into the backup directory and prunes old ones.
+
+    Args:
+        source (str): The database file to back up.
+        directory (str): The backup directory, created when missing.
+        compress (bool): Gzip the snapshot.
+        keep (int): The number of snapshots to keep.
+        progress (Optional[Callable[[int, int], None]]): Called with (pages copied, total pages).
+
+    Returns:
+        str: The snapshot written.
+    """
+    os.makedirs(directory, exist_ok=True)
+    name = f"{snapshot_prefix(source)}{datetime.now().strftime('%Y%m%d-%H%M%S')}.db"
+    path = backup_database(source, os.path.join(directory, name), compress, progress=progress)
+    for expired in prune_snapshots(directory, source, keep):
+        logger.info(f"Removed expired backup {expired}")
+    return path
+
+
+def _backup_process(source: str, directory: str, compress: bool, keep: int,
+                    messages: multiprocessing.Queue) -> None:
+    """
+    Child process entry point of ``BackupWorker``, reporting through a queue.
+
+    Args:
+        source (str): The database file to back up.
+        directory (str): The backup directory.
+        compress (bool): Gzip the snapshot.
+        keep (int): The number of snapshots to keep.
+        messages (multiprocessing.Queue): Receives ('progress', done, total), then
+            ('done', path) or ('failed', message).
+
+    Returns:
+        None
+    """
+    try:
+        path = run_backup(source, directory, compress, keep,
+                          lambda done, total: messages.put(('progress', done, total)))
+        messages.put(('done', path))
+    except Exception as e:
+        messages.put(('failed', str(e)))
+
+
+class BackupWorker(QThread):
+    """
+    Takes a snapshot of the live database without blocking the GUI.
+
+    The backup runs in a child process, which keeps its sqlite3 connection away
+    from the app's Qt connections (see ``backup_database``); this thread only
+    relays its progress.
+
+    Attributes:
+        progress (pyqtSignal): Emitted with (pages copied, total pages).
+        backed_up (pyqtSignal): Emitted with the snapshot path once it is verified.
+        failed (pyqtSignal): Emitted with an error message if the backup fails.
+    """
+
+    progress = pyqtSignal(int, int)
+    backed_up = pyqtSignal(str)
+    failed = pyqtSignal(str)
+
+    def __init__(self,
+                 db_name: str,
+                 directory: str = tkc.BACKUP_DIR,
+                 compress: bool = tkc.BACKUP_COMPRESS,
+                 keep: int = tkc.BACKUP_RETENTION,
+                 parent: QObject = None) -> None:
+        super().__init__(parent)
+        self.db_name: str = db_name
+        self.directory: str = directory
+        self.compress: bool = compress
+        self.keep: int = keep
+
+    def run(self) -> None:
+        """
+        Starts the backup process and relays its messages until it exits.
+
+        Returns:
+            None
+        """
+        context = multiprocessing.get_context('spawn')
+        messages = context.Queue()
+        process = context.Process(target=_backup_process,
+                                  args=(self.db_name, self.directory, self.compress,
+                                        self.keep, messages),
+                                  daemon=True)
+        try:
+            process.start()
+            while True:
+                try:
+                    message = messages.get(timeout=0.2)
+                except queue.Empty:
+                    if not process.is_alive():
+                        raise RuntimeError(f"Backup process exited with code {process.exitcode}")
+                    continue
+                if message[0] == 'progress':
+                    self.progress.emit(message[1], message[2])
+                elif message[0] == 'done':
+                    logger.info(f"Backed up {self.db_name} to {message[1]}")
+                    self.backed_up.emit(message[1])
+                    break
+                else:
+                    raise RuntimeError(message[1])
+        except Exception as e:
+            logger.error(f"Error backing up database: {e}", exc_info=True)
+            self.failed.emit(str(e))
+        finally:
+            if process.pid is not None:
+                process.join()
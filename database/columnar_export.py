@@ -0,0 +1,194 @@
+import itertools
+import os
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+from PyQt6.QtSql import QSqlDatabase, QSqlQuery
+
+import tracker_config as tkc
+from database.archive import iter_archived, null_marker
+from database.archive_catalog import partitions
+from database.database_utility.column_arrays import query_to_columns
+from database.schema import TABLE_SLIDER_COLUMNS
+from database.tombstones import live_view
+from logger_setup import logger
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:  # pyarrow is optional, .npy files are written instead
+    pa = None
+
+
+def column_dtypes(table: str) -> Dict[str, np.dtype]:
+    """
+    Returns the typed columns of a tracker table's columnar export.
+
+    The TEXT date/time pair is left out since ts carries the same instant.
+
+    Args:
+        table (str): The tracker table.
+
+    Returns:
+        Dict[str, np.dtype]: int64 for id and ts, uint8 for every slider column. ts and
+        the sliders may be NULL, stored as ``null_marker`` of their type.
+
+    Raises:
+        ValueError: If the table is unknown.
+    """
+    sliders = TABLE_SLIDER_COLUMNS.get(table)
+    if sliders is None:
+        raise ValueError(f"Unknown table: {table}")
+    dtypes = {'id': np.dtype(np.int64), 'ts': np.dtype(np.int64)}
+    dtypes.update((slider, np.dtype(np.uint8)) for slider in sliders)
+    return dtypes
+
+
+def iter_column_chunks(db: QSqlDatabase,
+                       table: str,
+                       last_id: int,
+                       chunk_size: int = tkc.EXPORT_CHUNK_SIZE) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Streams a tracker table as typed column chunks in id order, up to ``last_id``.
+
+    ts and the sliders are read as doubles so NULL survives as NaN, then cast
+    with NULL replaced by ``null_marker`` of the column type, as the archive
+    partitions store it, instead of turning into a real 0.
+
+    Args:
+        db (QSqlDatabase): The open database connection.
+        table (str): The tracker table.
+        last_id (int): The highest id to include.
+        chunk_size (int): The number of rows per chunk.
+
+    Returns:
+        Iterator[Dict[str, np.ndarray]]: Column arrays cast to ``column_dtypes(table)``.
+    """
+    dtypes = column_dtypes(table)
+    names = tuple(dtypes)
+    typecodes = ''.join('q' if name == 'id' else 'd' for name in names)
+    query = QSqlQuery(db)
+    query.setForwardOnly(True)
+    query.prepare(f"""SELECT {', '.join(names)} FROM {live_view(table)}
+                      WHERE id > ? AND id <= ? ORDER BY id LIMIT ?""")
+    after = -1
+    while True:
+        query.bindValue(0, after)
+        query.bindValue(1, last_id)
+        query.bindValue(2, chunk_size)
+        if not query.exec():
+            logger.error(f"Error exporting {table}: {query.lastError().text()}")
+            return
+        chunk = query_to_columns(query, names, typecodes)
+        if len(chunk['id']) == 0:
+            return
+        columns = {'id': np.asarray(chunk['id']).astype(dtypes['id'], copy=False)}
+        for name in names[1:]:
+            values = np.asarray(chunk[name])
+            columns[name] = np.where(np.isnan(values), null_marker(dtypes[name]), values).astype(dtypes[name])
+        yield columns
+        after = int(chunk['id'][-1])
+
+
+def iter_archived_column_chunks(db: QSqlDatabase,
+                                table: str,
+                                directory: str = tkc.ARCHIVE_DIR) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Streams the archived months of a tracker as typed column chunks, one per month.
+
+    Args:
+        db (QSqlDatabase): The open database connection.
+        table (str): The tracker table.
+        directory (str): The archive directory.
+
+    Returns:
+        Iterator[Dict[str, np.ndarray]]: Column arrays cast to ``column_dtypes(table)``.
+    """
+    dtypes = column_dtypes(table)
+    for month in iter_archived(db, table, TABLE_SLIDER_COLUMNS[table], directory=directory):
+        columns = {}
+        for name, dtype in dtypes.items():
+            values = month[name]
+            if values.dtype.kind == 'f':
+                values = np.where(np.isnan(values), null_marker(dtype), values)
+            columns[name] = values.astype(dtype, copy=False)
+        yield columns
+
+
+def export_columnar(db: QSqlDatabase,
+                    table: str,
+                    path: str,
+                    chunk_size: int = tkc.EXPORT_CHUNK_SIZE,
+                    use_arrow: Optional[bool] = None) -> str:
+    """
+    Writes a tracker table as typed columns that consumers can memory-map without parsing.
+
+    With pyarrow installed the result is one Arrow IPC file, written a record
+    batch per chunk, with NULL ts and sliders as Arrow nulls. Otherwise it is a
+    directory holding one ``.npy`` file per column, filled chunk by chunk through
+    ``numpy.lib.format.open_memmap``, and readable with
+    ``numpy.load(..., mmap_mode='r')``; there NULL is ``null_marker`` of the
+    column type. The archived months come first, then the rows still in
+    SQLite, all from one read snapshot so the column lengths always agree.
+
+    Args:
+        db (QSqlDatabase): The open database connection.
+        table (str): The tracker table.
+        path (str): The output path without extension.
+        chunk_size (int): The number of rows per chunk.
+        use_arrow (Optional[bool]): Force or refuse Arrow, default is Arrow when available.
+
+    Returns:
+        str: The file or directory written.
+
+    Raises:
+        RuntimeError: If Arrow is forced without pyarrow installed, or the snapshot fails.
+    """
+    if use_arrow is None:
+        use_arrow = pa is not None
+    if use_arrow and pa is None:
+        raise RuntimeError("pyarrow is not installed")
+    dtypes = column_dtypes(table)
+
+    # a read transaction pins one snapshot for the count and every chunk
+    if not db.transaction():
+        raise RuntimeError(db.lastError().text())
+    try:
+        query = QSqlQuery(db)
+        if not (query.exec(f"SELECT COUNT(*), COALESCE(MAX(id), 0) FROM {live_view(table)}") and query.next()):
+            raise RuntimeError(query.lastError().text())
+        total, last_id = int(query.value(0)), int(query.value(1))
+        query.finish()
+        total += sum(rows for _, _, rows, _, _ in partitions(db, table))
+        chunks = itertools.chain(iter_archived_column_chunks(db, table),
+                                 iter_column_chunks(db, table, last_id, chunk_size))
+
+        if use_arrow:
+            target = f"{path}.arrow"
+            os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+            schema = pa.schema([(name, pa.from_numpy_dtype(dtype)) for name, dtype in dtypes.items()])
+            with pa.OSFile(target, 'wb') as sink, pa.ipc.new_file(sink, schema) as writer:
+                for chunk in chunks:
+                    # the markers become Arrow nulls
+                    arrays = [pa.array(values, type=field.type,
+                                       mask=None if name == 'id' else values == null_marker(values.dtype))
+                              for (name, values), field in zip(chunk.items(), schema)]
+                    writer.write_batch(pa.record_batch(arrays, schema=schema))
+        else:
+            target = path
+            os.makedirs(target, exist_ok=True)
+            columns = {name: np.lib.format.open_memmap(os.path.join(target, f"{name}.npy"),
+                                                       mode='w+', dtype=dtype, shape=(total,))
+                       for name, dtype in dtypes.items()}
+            written = 0
+            for chunk in chunks:
+                size = len(chunk['id'])
+                for name, values in chunk.items():
+                    columns[name][written:written + size] = values
+                written += size
+            for column in columns.values():
+                column.flush()
+            del columns
+    finally:
+        db.rollback()
+    return target
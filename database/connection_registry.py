@@ -0,0 +1,220 @@
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from PyQt6.QtCore import QThread, Qt
+from PyQt6.QtSql import QSqlDatabase
+
+import tracker_config as tkc
+from logger_setup import logger
+
+WRITER = 'writer'
+READER = 'reader'
+
+
+class ConnectionRegistry:
+    """
+    Hands out named, thread-affine QSqlDatabase connections to one database file.
+
+    A QSqlDatabase may only be used from the thread that created it, so every
+    thread asks the registry for its own connection: ``writer`` gives the
+    read-write connection and ``reader`` a read-only one, capped at
+    ``max_readers`` across all threads. SQLite lets one connection write at a
+    time, so only one thread may hold the writer: the others read, and send
+    their writes to the thread that owns it. Connections are closed and removed
+    with ``release`` or, for QThreads, automatically when the thread finishes.
+
+    Attributes:
+        db_name (str): The path to the SQLite database file.
+        max_readers (int): The most read-only connections open at once.
+        connections (Dict[Tuple[int, str], str]): Connection names keyed by (thread ident, role).
+    """
+
+    def __init__(self, db_name: str, max_readers: int = tkc.MAX_READER_CONNECTIONS) -> None:
+        self.db_name: str = db_name
+        self.max_readers: int = max_readers
+        self.connections: Dict[Tuple[int, str], str] = {}
+        self.thread_names: Dict[int, str] = {}
+        self.lock = threading.Lock()
+
+    def writer(self) -> QSqlDatabase:
+        """
+        Returns the calling thread's read-write connection, opening it on first use.
+
+        Returns:
+            QSqlDatabase: The open connection.
+
+        Raises:
+            RuntimeError: If another thread owns the writer or the connection cannot be opened.
+        """
+        return self.connection(WRITER)
+
+    def reader(self) -> QSqlDatabase:
+        """
+        Returns the calling thread's read-only connection, opening it on first use.
+
+        Returns:
+            QSqlDatabase: The open connection.
+
+        Raises:
+            RuntimeError: If ``max_readers`` connections are already open or opening fails.
+        """
+        return self.connection(READER)
+
+    def connection(self, role: str) -> QSqlDatabase:
+        """
+        Returns the calling thread's connection for a role, opening it on first use.
+
+        Args:
+            role (str): ``WRITER`` or ``READER``.
+
+        Returns:
+            QSqlDatabase: The open connection.
+
+        Raises:
+            RuntimeError: If the reader pool is full, another thread owns the writer
+                or the connection cannot be opened.
+        """
+        ident = threading.get_ident()
+        with self.lock:
+            name = self.connections.get((ident, role))
+            if name is not None:
+                return QSqlDatabase.database(name)
+            if role == READER and self.count(READER) >= self.max_readers:
+                raise RuntimeError(f"All {self.max_readers} reader connections are in use")
+            owner = self.writer_owner()
+            if role == WRITER and owner is not None:
+                raise RuntimeError(f"The writer connection is owned by thread "
+                                   f"{self.thread_names.get(owner, owner)}")
+            name = f"{role}-{ident}@{self.db_name}"
+            self.connections[(ident, role)] = name
+            first_for_thread = ident not in self.thread_names
+            # QThreads are Dummy-n to threading, their object name says more
+            self.thread_names[ident] = QThread.currentThread().objectName() or threading.current_thread().name
+
+        db = QSqlDatabase.addDatabase('QSQLITE', name)
+        db.setDatabaseName(self.db_name)
+        if role == READER:
+            db.setConnectOptions('QSQLITE_OPEN_READONLY;QSQLITE_BUSY_TIMEOUT=5000')
+        if not db.open():
+            error = db.lastError().text()
+            del db
+            self.forget(ident, role)
+            raise RuntimeError(f"Unable to open {role} connection: {error}")
+
+        if first_for_thread and not self.is_main_thread():
+            # finished is emitted from the exiting thread itself, where its connections live
+            QThread.currentThread().finished.connect(self.release, Qt.ConnectionType.DirectConnection)
+        logger.info(f"Opened {name}: {self.diagnostics()}")
+        return db
+
+    @staticmethod
+    def is_main_thread() -> bool:
+        """
+        Tells whether the caller runs on the Python main thread, the GUI thread in this app.
+
+        Returns:
+            bool: True on the main thread.
+        """
+        return threading.current_thread() is threading.main_thread()
+
+    def count(self, role: Optional[str] = None) -> int:
+        """
+        Returns the number of open connections, optionally of one role.
+
+        Args:
+            role (Optional[str]): ``WRITER`` or ``READER``, all roles by default.
+
+        Returns:
+            int: The number of connections.
+        """
+        return sum(1 for _, connection_role in self.connections
+                   if role is None or connection_role == role)
+
+    def writer_owner(self) -> Optional[int]:
+        """
+        Returns the ident of the thread holding the writer connection, the caller's lock held.
+
+        Returns:
+            Optional[int]: The owning thread ident, None if no writer is open.
+        """
+        return next((ident for ident, role in self.connections if role == WRITER), None)
+
+    def forget(self, ident: int, role: str) -> None:
+        """
+        Drops the bookkeeping of one connection without touching Qt.
+
+        Args:
+            ident (int): The owning thread ident.
+            role (str): The connection role.
+
+        Returns:
+            None
+        """
+        with self.lock:
+            self.connections.pop((ident, role), None)
+            if not any(owner == ident for owner, _ in self.connections):
+                self.thread_names.pop(ident, None)
+
+    def release(self, role: Optional[str] = None) -> None:
+        """
+        Closes and removes the connections the calling thread holds.
+
+        Args:
+            role (Optional[str]): Only release the connection of this role, e.g.
+                ``WRITER`` to hand the writer to another thread; all roles by default.
+
+        Returns:
+            None
+        """
+        ident = threading.get_ident()
+        with self.lock:
+            owned = [(owned_role, name) for (owner, owned_role), name in self.connections.items()
+                     if owner == ident and (role is None or owned_role == role)]
+        for owned_role, name in owned:
+            db = QSqlDatabase.database(name, False)
+            if db.isOpen():
+                db.close()
+            del db
+            QSqlDatabase.removeDatabase(name)
+            self.forget(ident, owned_role)
+        if owned:
+            logger.info(f"Released {len(owned)} connection(s): {self.diagnostics()}")
+
+    def diagnostics(self) -> Dict[str, Any]:
+        """
+        Describes the pool for logs and troubleshooting.
+
+        Returns:
+            Dict[str, Any]: 'db_name', 'writers', 'readers', 'max_readers' and
+            'threads', the thread name behind each open connection.
+        """
+        with self.lock:
+            return {
+                'db_name': self.db_name,
+                'writers': self.count(WRITER),
+                'readers': self.count(READER),
+                'max_readers': self.max_readers,
+                'threads': {name: self.thread_names.get(ident, '?')
+                            for (ident, _), name in self.connections.items()},
+            }
+
+
+_registries: Dict[str, ConnectionRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def connection_registry(db_name: str) -> ConnectionRegistry:
+    """
+    Returns the process-wide registry of a database file, creating it on first use.
+
+    Args:
+        db_name (str): The path to the SQLite database file.
+
+    Returns:
+        ConnectionRegistry: The registry shared by every thread.
+    """
+    with _registries_lock:
+        registry = _registries.get(db_name)
+        if registry is None:
+            registry = _registries[db_name] = ConnectionRegistry(db_name)
+        return registry
@@ -1,20 +1,90 @@
 import tracker_config as tkc
 from PyQt6.QtSql import QSqlDatabase, QSqlQuery
 import os
-import shutil
+from collections import OrderedDict
+from datetime import datetime
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 from logger_setup import logger
+from database.backup import backup_database
+from database.connection_registry import WRITER, ConnectionRegistry, connection_registry
+from database.migrations import run_migrations
+from database.rollups import (archive_rollup_table, hourly_select_sql, hourly_table, rebuild_sql,
+                              rollup_table)
+from database.tombstones import live_view
+from database.schema import TABLE_COLUMNS, TABLE_SLIDER_COLUMNS, TRACKERS, table_ddl
+from database.database_utility.column_arrays import query_to_columns
 
 user_dir = os.path.expanduser('~')
 db_path = os.path.join(os.getcwd(), tkc.DB_NAME)  # Database Name
 target_db_path = os.path.join(user_dir, tkc.DB_NAME)  # Database Name
 
+# Read queries the covering indexes are built for, checked by DataManager.check_query_plans.
+STANDARD_QUERIES = {
+    'range': "SELECT ts, {sliders} FROM {view} WHERE ts BETWEEN 0 AND 1",
+    'latest': "SELECT ts, {sliders} FROM {view} ORDER BY ts DESC LIMIT 10",
+    'per_day': "SELECT ts / 86400, COUNT(*), {sliders} FROM {view} "
+               "WHERE ts >= 0 GROUP BY ts / 86400",
+}
+
+# SQL giving the epoch start of the bucket a ts falls into; weeks start on Monday.
+BUCKET_EXPRESSIONS = {
+    'hour': "(ts / 3600) * 3600",
+    'day': "(ts / 86400) * 86400",
+    'week': "((ts - 345600) / 604800) * 604800 + 345600",
+    'month': "CAST(strftime('%s', ts, 'unixepoch', 'start of month') AS INTEGER)",
+}
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def to_epoch(date: str, time: str) -> Optional[int]:
+    """
+    Converts a "yyyy-MM-dd" date and "hh:mm:ss" time pair to epoch seconds.
+
+    The pair is read as wall-clock time with no timezone shift, the same as
+    SQLite's ``strftime('%s', date || ' ' || time)``, so rows written here and
+    rows backfilled in SQL share one key.
+
+    Args:
+        date (str): The entry date.
+        time (str): The entry time.
+
+    Returns:
+        Optional[int]: The epoch seconds, or None if the pair does not parse.
+    """
+    try:
+        return int((datetime.fromisoformat(f"{date} {time}") - _EPOCH).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def chunked(rows: Iterable[Sequence], size: int) -> Iterator[List[Sequence]]:
+    """
+    Splits an iterable of rows into lists of at most ``size`` rows.
+
+    Args:
+        rows (Iterable[Sequence]): The rows to split.
+        size (int): The maximum number of rows per chunk.
+
+    Returns:
+        Iterator[List[Sequence]]: The chunks, in order.
+    """
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
 
 def initialize_database() -> None:
     """
     Initializes the database by creating a new database file or copying an existing one.
 
     If the target database file doesn't exist, it checks if the source database file exists.
-    If the source database file exists, it copies it to the target location.
+    If the source database file exists, it copies it to the target location with the
+    SQLite online backup API, so the copy is consistent and integrity-checked.
     If the source database file doesn't exist, it creates a new database file using the 'QSQLITE' driver.
 
     Returns:
@@ -26,7 +96,7 @@ def initialize_database() -> None:
     try:
         if not os.path.exists(target_db_path):
             if os.path.exists(db_path):
-                shutil.copy(db_path, target_db_path)
+                backup_database(db_path, target_db_path)
             else:
                 db: QSqlDatabase = QSqlDatabase.addDatabase('QSQLITE')
                 db.setDatabaseName(target_db_path)
@@ -40,307 +110,501 @@ def initialize_database() -> None:
 class DataManager:
     
     def __init__(self,
-                 db_name: str = target_db_path) -> None:
+                 db_name: str = target_db_path,
+                 migration_progress: Optional[Callable[[str, int, int], None]] = None) -> None:
         """
         Initializes the DataManager object and opens the database connection.
 
+        The connection is the writer from the ``ConnectionRegistry`` of ``db_name``,
+        so a DataManager must be created on the thread that uses it, and only while
+        no other thread owns the writer. ``hand_off_writer`` gives it up once the
+        tables are set up.
+
         Args:
             db_name (str): The path to the SQLite database file.
+            migration_progress (Optional[Callable[[str, int, int], None]]): Called with
+                (step description, done, total) while schema migrations run.
 
         Raises:
             Exception: If there is an error opening the database.
 
         """
+        self.migration_progress = migration_progress
+        self.registry: ConnectionRegistry = connection_registry(db_name)
         try:
-            self.db: QSqlDatabase = QSqlDatabase.addDatabase('QSQLITE')
-            self.db.setDatabaseName(db_name)
-            
-            if not self.db.open():
-                logger.error("Error: Unable to open database")
+            self.db: QSqlDatabase = self.registry.writer()
             logger.info("DB INITIALIZING")
-            self.query: QSqlQuery = QSqlQuery()
+            self.apply_performance_profile()
+            self.query: QSqlQuery = QSqlQuery(self.db)
+            self.insert_queries: Dict[Tuple[str, bool], QSqlQuery] = {}
+            self.statement_cache: 'OrderedDict[str, QSqlQuery]' = OrderedDict()
             self.setup_tables()
+            self.prepare_insert_queries()
         except Exception as e:
             logger.error(f"Error: Unable to open database {e}", exc_info=True)
     
+    def hand_off_writer(self) -> None:
+        """
+        Swaps the writer connection for a read-only one so another thread can own the writer.
+
+        The GUI thread sets up and migrates the tables on the writer, then hands
+        it to the background writer thread and keeps reading on its own connection.
+
+        Returns:
+            None
+        """
+        self.query.finish()
+        self.insert_queries.clear()
+        self.statement_cache.clear()
+        # drop our handles first so the registry can remove the connection cleanly
+        self.query = QSqlQuery()
+        self.db = QSqlDatabase()
+        self.registry.release(WRITER)
+        self.db = self.registry.reader()
+        self.apply_performance_profile()
+        self.query = QSqlQuery(self.db)
+
+    def apply_performance_profile(self,
+                                  profile_name: str = tkc.DB_PERFORMANCE_PROFILE) -> None:
+        """
+        Applies a named SQLite performance profile to the open connection.
+
+        The profiles live in ``tracker_config.DB_PERFORMANCE_PROFILES`` and set
+        journal_mode, synchronous, cache_size, mmap_size, temp_store and busy_timeout.
+
+        Args:
+            profile_name (str): The name of the profile to apply.
+
+        Returns:
+            None
+        """
+        profile = tkc.DB_PERFORMANCE_PROFILES.get(profile_name)
+        if profile is None:
+            logger.error(f"Unknown performance profile: {profile_name}")
+            return
+        
+        query = QSqlQuery(self.db)
+        for pragma, value in profile.items():
+            if not query.exec(f"PRAGMA {pragma} = {value}"):
+                logger.error(f"Error applying PRAGMA {pragma}: {query.lastError().text()}")
+        logger.info(f"DB performance profile: {profile_name} {profile}")
+    
     def setup_tables(self) -> None:
         """
         Sets up the necessary tables in the database.
 
-        This method calls the following setup methods:
-        - setup_wefe_table: Sets up the WEFE table.
-        - setup_into_cspr_exam: Sets up the INTO CSPR exam table.
-        - setup_mental_mental_table: Sets up the Mental Mental table.
+        Every tracker in ``TRACKERS`` gets its table from ``table_ddl`` if it does
+        not exist yet, then older databases are brought up to date with
+        ``run_migrations``.
         """
-        self.setup_wefe_table()
-        self.setup_into_cspr_exam()
-        self.setup_mental_mental_table()
+        for tracker in TRACKERS:
+            if not self.query.exec(table_ddl(tracker)):
+                logger.error(f"Error creating table: {tracker.table} {self.query.lastError().text()}")
+        run_migrations(self.db, self.migration_progress)
     
-    def setup_mental_mental_table(self) -> None:
-            """
-            Sets up the 'mental_mental_table' in the database if it doesn't already exist.
-
-            This method creates a table named 'mental_mental_table' in the database with the following columns:
-            - id: INTEGER (Primary Key, Autoincrement)
-            - mental_mental_date: TEXT
-            - mental_mental_time: TEXT
-            - mood_slider: INTEGER
-            - mania_slider: INTEGER
-            - depression_slider: INTEGER
-            - mixed_risk_slider: INTEGER
-
-            If the table already exists, this method does nothing.
-
-            Returns:
-                None
-            """
-            if not self.query.exec(f"""
-                                CREATE TABLE IF NOT EXISTS mental_mental_table (
-                                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                                mental_mental_date TEXT,
-                                mental_mental_time TEXT,
-                                mood_slider INTEGER,
-                                mania_slider INTEGER,
-                                depression_slider INTEGER,
-                                mixed_risk_slider INTEGER
-                                )"""):
-                logger.error(f"Error creating table: mental_mental_table",
-                             self.query.lastError().text())
+    def analyze(self) -> None:
+        """
+        Refreshes the query planner statistics with ANALYZE.
+
+        Returns:
+            None
+        """
+        if not self.query.exec("ANALYZE"):
+            logger.error(f"Error running ANALYZE: {self.query.lastError().text()}")
     
-    def insert_into_mental_mental_table(self,
-                                        mental_mental_date: int,
-                                        mental_mental_time: int,
-                                        mood_slider: int,
-                                        mania_slider: int,
-                                        depression_slider: int,
-                                        mixed_risk_slider: int) -> None:
+    def check_query_plans(self, strict: bool = False) -> Dict[str, bool]:
         """
-        Inserts data into the mental_mental_table.
+        Checks with EXPLAIN QUERY PLAN that the standard queries use the covering indexes.
 
         Args:
-            mental_mental_date (int): The date of the mental_mental record.
-            mental_mental_time (int): The time of the mental_mental record.
-            mood_slider (int): The value of the mood slider.
-            mania_slider (int): The value of the mania slider.
-            depression_slider (int): The value of the depression slider.
-            mixed_risk_slider (int): The value of the mixed risk slider.
+            strict (bool): Raise instead of only logging when a query misses its index.
 
         Returns:
-            None
+            Dict[str, bool]: Whether each "table:query" pair uses its index.
 
         Raises:
-            ValueError: If the number of bind values does not match the number of placeholders in the SQL query.
-            Exception: If there is an error during data insertion.
+            AssertionError: If ``strict`` is set and a query does not use its index.
+        """
+        results: Dict[str, bool] = {}
+        for table, sliders in TABLE_SLIDER_COLUMNS.items():
+            for name, template in STANDARD_QUERIES.items():
+                sql = template.format(view=live_view(table), sliders=', '.join(sliders))
+                plan: List[str] = []
+                if self.query.exec(f"EXPLAIN QUERY PLAN {sql}"):
+                    while self.query.next():
+                        plan.append(self.query.value(3))
+                self.query.finish()
+                uses_index = any(f"COVERING INDEX idx_{table}_live" in step for step in plan)
+                results[f"{table}:{name}"] = uses_index
+                if not uses_index:
+                    logger.error(f"Query plan misses idx_{table}_live: {name} {plan}")
+        if strict and not all(results.values()):
+            raise AssertionError(f"Queries not using their index: "
+                                 f"{[key for key, ok in results.items() if not ok]}")
+        return results
+    
+    def aggregate(self,
+                  table: str,
+                  bucket: str = 'day',
+                  metrics: Optional[Sequence[str]] = None,
+                  start: Optional[int] = None,
+                  end: Optional[int] = None,
+                  use_rollups: bool = True) -> Dict[str, Any]:
+        """
+        Computes per-hour, per-day, per-week or per-month rollups of a tracker table inside SQLite.
+
+        When the range is whole days the buckets are folded from the ``*_daily``
+        rollup table and, for days moved to the columnar archive or compacted by
+        the retention policy, the ``*_daily_archive`` one, costing O(days). Hours
+        over a range of whole hours fold the ``*_hourly`` table with the live rows
+        grouped by hour. Otherwise GROUP BY, AVG, MIN, MAX and COUNT run over the
+        covering index of live rows, which leaves archived and compacted entries
+        out. Either way only one row per bucket crosses into Python.
+
+        Args:
+            table (str): The tracker table to summarise.
+            bucket (str): One of 'hour', 'day', 'week' or 'month'.
+            metrics (Optional[Sequence[str]]): The slider columns to summarise, all by default.
+            start (Optional[int]): The first epoch second to include.
+            end (Optional[int]): The epoch second to stop before.
+            use_rollups (bool): Read the daily rollup table when the range allows it.
 
+        Returns:
+            Dict[str, Any]: Column arrays (NumPy when installed): 'bucket' holds the epoch
+            start of each bucket, 'count' the number of entries, and each metric gets
+            '<metric>_avg', '<metric>_min' and '<metric>_max'.
+
+        Raises:
+            ValueError: If the table, bucket or a metric is unknown.
         """
-        sql: str = f"""INSERT INTO mental_mental_table(
-            mental_mental_date,
-            mental_mental_time,
-            mood_slider,
-            mania_slider,
-            depression_slider,
-            mixed_risk_slider) VALUES (?, ?, ?, ?, ?, ?)"""
+        sliders = TABLE_SLIDER_COLUMNS.get(table)
+        if sliders is None:
+            raise ValueError(f"Unknown table: {table}")
+        bucket_expression = BUCKET_EXPRESSIONS.get(bucket)
+        if bucket_expression is None:
+            raise ValueError(f"Unknown bucket: {bucket}")
+        metrics = tuple(sliders if metrics is None else metrics)
+        unknown = [metric for metric in metrics if metric not in sliders]
+        if unknown:
+            raise ValueError(f"Unknown metrics for {table}: {unknown}")
         
-        bind_values: List[Union[str, int]] = [mental_mental_date, mental_mental_time,
-                                              mood_slider, mania_slider, depression_slider,
-                                              mixed_risk_slider]
+        granularity = 3600 if bucket == 'hour' else 86400
+        from_rollup = use_rollups and all(limit is None or limit % granularity == 0
+                                          for limit in (start, end))
+        names = ['bucket', 'count']
+        if from_rollup:
+            # rollup hours and days stand in for ts, so the same bucket expressions apply
+            if bucket == 'hour':
+                source = (f"(SELECT hour AS ts, * FROM {hourly_table(table)} UNION ALL "
+                          f"SELECT hour AS ts, * FROM ({hourly_select_sql(table)}))")
+            else:
+                source = (f"(SELECT day AS ts, * FROM {rollup_table(table)} UNION ALL "
+                          f"SELECT day AS ts, * FROM {archive_rollup_table(table)})")
+            selects = [f"{bucket_expression} AS bucket", "SUM(entry_count)"]
+            for metric in metrics:
+                names.extend(f"{metric}_{function}" for function in ('avg', 'min', 'max'))
+                # entries that left the slider NULL are not in its count
+                selects.extend([f"SUM({metric}_sum) * 1.0 / SUM({metric}_count)",
+                                f"MIN({metric}_min)", f"MAX({metric}_max)"])
+        else:
+            source = live_view(table)
+            selects = [f"{bucket_expression} AS bucket", "COUNT(*)"]
+            for metric in metrics:
+                for function in ('avg', 'min', 'max'):
+                    names.append(f"{metric}_{function}")
+                    selects.append(f"{function.upper()}({metric})")
+        
+        query = self.cached_query(f"""SELECT {', '.join(selects)} FROM {source}
+                                      WHERE ts >= ? AND ts < ?
+                                      GROUP BY bucket ORDER BY bucket""")
+        query.bindValue(0, -2 ** 62 if start is None else start)
+        query.bindValue(1, 2 ** 62 if end is None else end)
+        if not query.exec():
+            logger.error(f"Error aggregating {table}: {query.lastError().text()}")
+        return query_to_columns(query, names, ['q', 'q'] + ['d'] * (len(names) - 2))
+    
+    def rebuild_rollups(self, table: Optional[str] = None) -> bool:
+        """
+        Rebuilds the ``*_daily`` rollup tables from the tracker tables.
+
+        The triggers keep the rollups current, so this is only needed to recover
+        from a rollup that was edited or damaged by hand.
+
+        Args:
+            table (Optional[str]): The tracker table to rebuild, all of them by default.
+
+        Returns:
+            bool: True if every rebuild committed.
+        """
+        tables = list(TABLE_SLIDER_COLUMNS) if table is None else [table]
         try:
-            self.query.prepare(sql)
-            for value in bind_values:
-                self.query.addBindValue(value)
-            if sql.count('?') != len(bind_values):
-                raise ValueError(f"""Mismatch: mental_mental_table Expected {sql.count('?')}
-                        bind values, got {len(bind_values)}.""")
-            if not self.query.exec():
-                logger.error(
-                    f"Error inserting data: mental_mental_table - {self.query.lastError().text()}")
-        except ValueError as e:
-            logger.error(f"ValueError mental_mental_table: {e}")
+            if not self.db.transaction():
+                raise RuntimeError(self.db.lastError().text())
+            for name in tables:
+                for sql in rebuild_sql(name, live_only=True):
+                    if not self.query.exec(sql):
+                        raise RuntimeError(self.query.lastError().text())
+            if not self.db.commit():
+                raise RuntimeError(self.db.lastError().text())
+            return True
         except Exception as e:
-            logger.error(f"Error during data insertion: mental_mental_table {e}", exc_info=True)
+            logger.error(f"Error rebuilding rollups: {tables} {e}", exc_info=True)
+            self.db.rollback()
+            return False
     
-    def setup_into_cspr_exam(self) -> None:
+    def prepare_insert_queries(self) -> None:
         """
-        Sets up the cspr_table in the database if it doesn't already exist.
+        Prepares one long-lived insert statement per tracker table.
 
-        This method creates the cspr_table in the database with the following columns:
-        - id: INTEGER (Primary Key, Autoincrement)
-        - cspr_date: TEXT
-        - cspr_time: TEXT
-        - calm_slider: INTEGER
-        - stress_slider: INTEGER
-        - pain_slider: INTEGER
-        - rage_slider: INTEGER
+        Each table owns its own ``QSqlQuery`` so the trackers never clobber each
+        other's prepared state, and the placeholder count is checked once here
+        instead of on every insert.
 
         Returns:
             None
         """
-        if not self.query.exec(f"""
-                        CREATE TABLE IF NOT EXISTS cspr_table (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        cspr_date TEXT,
-                        cspr_time TEXT,
-                        calm_slider INTEGER,
-                        stress_slider INTEGER,
-                        pain_slider INTEGER,
-                        rage_slider INTEGER
-                        )"""):
-            logger.error(f"Error creating table: cspr_table",
-                         self.query.lastError().text())
+        for table in TABLE_COLUMNS:
+            try:
+                self.insert_query(table)
+            except Exception as e:
+                logger.error(f"Error preparing insert: {table} {e}", exc_info=True)
     
-    def insert_into_cspr_exam(self,
-                              cspr_date: str,
-                              cspr_time: str,
-                              calm_slider: int,
-                              stress_slider: int,
-                              pain_slider: int,
-                              rage_slider: int
-                              ) -> None:
+    def insert_query(self, table: str, upsert: bool = False) -> QSqlQuery:
         """
-        Inserts a new record into the cspr_table.
+        Returns the prepared insert statement of a tracker table, preparing it on first use.
+
+        The upsert variant resolves a clash on the unique ts key with
+        ``ON CONFLICT(ts) DO UPDATE``, so the existing entry takes the new values
+        and keeps its id, and a retried insert changes nothing; an entry that was
+        tombstoned at that date and time comes back live. Both return the
+        id of the row written, which ``lastInsertId`` misses for an upsert that updates.
 
         Args:
-            cspr_date (str): The date of the CSRP exam.
-            cspr_time (str): The time of the CSRP exam.
-            calm_slider (int): The value of the calm slider.
-            stress_slider (int): The value of the stress slider.
-            pain_slider (int): The value of the pain slider.
-            rage_slider (int): The value of the rage slider.
+            table (str): The table to insert into, one of ``TABLE_COLUMNS``.
+            upsert (bool): Return the upsert statement instead of the plain insert.
 
         Returns:
-            None
+            QSqlQuery: The prepared insert query.
 
         Raises:
-            ValueError: If the number of bind values does not match the expected number of placeholders in the SQL query.
-            Exception: If there is an error during data insertion.
+            ValueError: If the table is unknown or the placeholders do not match its columns.
+            RuntimeError: If the statement fails to prepare.
+        """
+        query = self.insert_queries.get((table, upsert))
+        if query is not None:
+            return query
+        
+        columns = TABLE_COLUMNS.get(table)
+        if columns is None:
+            raise ValueError(f"Unknown table: {table}")
+        sql: str = f"""INSERT INTO {table}(
+            {', '.join(columns)}, ts) VALUES ({', '.join('?' * (len(columns) + 1))})"""
+        if sql.count('?') != len(columns) + 1:
+            raise ValueError(f"""Mismatch: {table} Expected {sql.count('?')}
+                    bind values, got {len(columns) + 1}.""")
+        if upsert:
+            sql += f"""
+            ON CONFLICT(ts) DO UPDATE SET
+            {', '.join(f"{column} = excluded.{column}" for column in columns)},
+            deleted_at = NULL"""
+        sql += " RETURNING id"
+        
+        query = QSqlQuery(self.db)
+        if not query.prepare(sql):
+            raise RuntimeError(query.lastError().text())
+        self.insert_queries[(table, upsert)] = query
+        return query
+    
+    def cached_query(self, sql: str) -> QSqlQuery:
+        """
+        Returns a prepared query for ad-hoc SQL from a small LRU statement cache.
+
+        The least recently used statement is evicted once the cache holds
+        ``tracker_config.STATEMENT_CACHE_SIZE`` entries.
+
+        Args:
+            sql (str): The SQL statement to prepare.
+
+        Returns:
+            QSqlQuery: The prepared query, ready for bind values.
 
+        Raises:
+            RuntimeError: If the statement fails to prepare.
+        """
+        query = self.statement_cache.get(sql)
+        if query is not None:
+            self.statement_cache.move_to_end(sql)
+            return query
+        
+        query = QSqlQuery(self.db)
+        if not query.prepare(sql):
+            raise RuntimeError(query.lastError().text())
+        self.statement_cache[sql] = query
+        if len(self.statement_cache) > tkc.STATEMENT_CACHE_SIZE:
+            self.statement_cache.popitem(last=False)
+        return query
+    
+    def insert_row(self,
+                   table: str,
+                   bind_values: Sequence[Union[str, int]],
+                   upsert: bool = False) -> Optional[int]:
+        """
+        Inserts one row into a tracker table through its prepared insert statement.
+
+        Args:
+            table (str): The table to insert into, one of ``TABLE_COLUMNS``.
+            bind_values (Sequence[Union[str, int]]): The row, in ``TABLE_COLUMNS[table]`` order.
+            upsert (bool): Overwrite the entry already logged at the same date and time
+                instead of failing on the unique ts index.
+
+        Returns:
+            Optional[int]: The id of the inserted or updated row, None if nothing was written.
         """
-        sql: str = f"""INSERT INTO cspr_table(
-            cspr_date,
-            cspr_time,
-            calm_slider,
-            stress_slider,
-            pain_slider,
-            rage_slider) VALUES (?, ?, ?, ?, ?, ?)"""
-
-        bind_values: List[Union[str, int]] = [cspr_date, cspr_time,
-                                              calm_slider, stress_slider, pain_slider, rage_slider]
         try:
-            self.query.prepare(sql)
-            for value in bind_values:
-                self.query.addBindValue(value)
-            if sql.count('?') != len(bind_values):
-                raise ValueError(f"""Mismatch: cspr_table Expected {sql.count('?')}
+            query = self.insert_query(table, upsert)
+            if len(bind_values) != len(TABLE_COLUMNS[table]):
+                raise ValueError(f"""Mismatch: {table} Expected {len(TABLE_COLUMNS[table])}
                         bind values, got {len(bind_values)}.""")
-            if not self.query.exec():
+            for position, value in enumerate(bind_values):
+                query.bindValue(position, value)
+            query.bindValue(len(bind_values), to_epoch(bind_values[0], bind_values[1]))
+            if not query.exec():
                 logger.error(
-                    f"Error inserting data: cspr_table - {self.query.lastError().text()}")
+                    f"Error inserting data: {table} - {query.lastError().text()}")
+                return None
+            row_id = int(query.value(0)) if query.next() else None
+            # an unfinished RETURNING statement would keep the implicit transaction open
+            query.finish()
+            return row_id
         except ValueError as e:
-            logger.error(f"ValueError cspr_table: {e}")
+            logger.error(f"ValueError {table}: {e}")
         except Exception as e:
-            logger.error(f"Error during data insertion: cspr_table {e}", exc_info=True)
-    
-    def setup_wefe_table(self) -> None:
-            """
-            Sets up the 'wefe_table' in the database if it doesn't already exist.
-
-            This method creates the 'wefe_table' with the following columns:
-            - id: INTEGER (Primary Key, Autoincrement)
-            - wefe_date: TEXT
-            - wefe_time: TEXT
-            - wellbeing_slider: INTEGER
-            - excite_slider: INTEGER
-            - focus_slider: INTEGER
-            - energy_slider: INTEGER
-            - summing_box: INTEGER
-
-            Returns:
-                None
-            """
-            if not self.query.exec(f"""
-                            CREATE TABLE IF NOT EXISTS wefe_table (
-                            id INTEGER PRIMARY KEY AUTOINCREMENT,
-                            wefe_date TEXT,
-                            wefe_time TEXT,
-                            wellbeing_slider INTEGER,
-                            excite_slider INTEGER,
-                            focus_slider INTEGER,
-                            energy_slider INTEGER,
-                            summing_box INTEGER
-                            )"""):
-                logger.error(f"Error creating table: wefe_table",
-                             self.query.lastError().text())
+            logger.error(f"Error during data insertion: {table} {e}", exc_info=True)
+        return None
     
-    def insert_into_wefe_table(self,
-                               wefe_date: str,
-                               wefe_time: str,
-                               wellbeing_slider: int,
-                               excite_slider: int,
-                               focus_slider: int,
-                               energy_slider: int,
-                               summing_box: int
-                               ) -> None:
+    def insert_many(self,
+                    table: str,
+                    rows: Iterable[Sequence[Union[str, int]]],
+                    batch_size: int = tkc.INSERT_BATCH_SIZE,
+                    upsert: bool = False,
+                    analyze: bool = True) -> List[int]:
         """
-        Inserts data into the wefe_table.
+        Inserts many rows into a tracker table inside a single transaction.
+
+        Rows are bound column-wise and executed with ``QSqlQuery.execBatch`` in
+        batches of ``batch_size``, so a backfill pays one commit instead of one per row.
+        Each batch runs inside a SAVEPOINT: a failing batch is rolled back and retried
+        one row at a time, so only the rows that fail themselves are left out.
 
         Args:
-            wefe_date (str): The date of the entry.
-            wefe_time (str): The time of the entry.
-            wellbeing_slider (int): The value of the wellbeing slider.
-            excite_slider (int): The value of the excite slider.
-            focus_slider (int): The value of the focus slider.
-            energy_slider (int): The value of the energy slider.
-            summing_box (int): The value of the summing box.
+            table (str): The table to insert into, one of ``TABLE_COLUMNS``.
+            rows (Iterable[Sequence[Union[str, int]]]): The rows, each in ``TABLE_COLUMNS[table]`` order.
+            batch_size (int): The number of rows bound per ``execBatch`` call.
+            upsert (bool): Overwrite entries already logged at the same date and time,
+                so replaying a load is idempotent. Without it one clashing row fails its batch.
+            analyze (bool): Run ANALYZE when the call adds ``ANALYZE_AFTER_ROWS`` rows or more.
+                Callers loading in chunks pass False and analyze once after the last chunk.
 
         Returns:
-            None
+            List[int]: The indices of the rows that were not written. If the transaction
+            itself fails it is rolled back and every row read so far is reported.
+
+        Raises:
+            ValueError: If the table is not a known tracker table.
         """
-        sql: str = f"""INSERT INTO wefe_table(
-        wefe_date,
-        wefe_time,
-        wellbeing_slider,
-        excite_slider,
-        focus_slider,
-        energy_slider,
-        summing_box) VALUES (?, ?, ?, ?, ?, ?, ?)"""
+        columns = TABLE_COLUMNS.get(table)
+        if columns is None:
+            raise ValueError(f"Unknown table: {table}")
         
-        bind_values: List[Union[str, int]] = [wefe_date,
-                                              wefe_time,
-                                              wellbeing_slider,
-                                              excite_slider,
-                                              focus_slider,
-                                              energy_slider,
-                                              summing_box]
+        error_rows: List[int] = []
+        offset = 0
         try:
-            self.query.prepare(sql)
-            for value in bind_values:
-                self.query.addBindValue(value)
-            if sql.count('?') != len(bind_values):
-                raise ValueError(f"""Mismatch: wefe_table Expected {sql.count('?')}
-                    bind values, got {len(bind_values)}.""")
-            if not self.query.exec():
-                logger.error(
-                    f"Error inserting data: wefe_table - {self.query.lastError().text()}")
-        except ValueError as e:
-            logger.error(f"ValueError wefe_table: {e}")
+            query = self.insert_query(table, upsert)
+            savepoint = QSqlQuery(self.db)
+            if not self.db.transaction():
+                raise RuntimeError(self.db.lastError().text())
+            
+            for batch in chunked(rows, batch_size):
+                good_rows = []
+                for index, row in enumerate(batch, start=offset):
+                    if len(row) != len(columns):
+                        logger.error(f"Mismatch: {table} row {index} Expected {len(columns)} "
+                                     f"bind values, got {len(row)}.")
+                        error_rows.append(index)
+                    else:
+                        good_rows.append((index, row))
+                offset += len(batch)
+                if not good_rows:
+                    continue
+                
+                # the driver runs execBatch row by row, so a failing batch is undone as a whole
+                if not savepoint.exec("SAVEPOINT insert_batch"):
+                    raise RuntimeError(savepoint.lastError().text())
+                for column in range(len(columns)):
+                    query.bindValue(column, [row[column] for _, row in good_rows])
+                query.bindValue(len(columns), [to_epoch(row[0], row[1]) for _, row in good_rows])
+                if not query.execBatch():
+                    logger.error(f"Error inserting batch: {table} rows "
+                                 f"{good_rows[0][0]}-{good_rows[-1][0]} - {query.lastError().text()}")
+                    query.finish()
+                    if not savepoint.exec("ROLLBACK TO insert_batch"):
+                        raise RuntimeError(savepoint.lastError().text())
+                    # retry the batch one row at a time so only the rows that fail are lost
+                    for index, row in good_rows:
+                        for column, value in enumerate(row):
+                            query.bindValue(column, value)
+                        query.bindValue(len(columns), to_epoch(row[0], row[1]))
+                        if not query.exec():
+                            logger.error(f"Error inserting row: {table} row {index} - "
+                                         f"{query.lastError().text()}")
+                            error_rows.append(index)
+                        query.finish()
+                query.finish()
+                if not savepoint.exec("RELEASE insert_batch"):
+                    raise RuntimeError(savepoint.lastError().text())
+            
+            if not self.db.commit():
+                raise RuntimeError(self.db.lastError().text())
         except Exception as e:
-            logger.error(f"Error during data insertion: wefe_table {e}", exc_info=True)
-
+            logger.error(f"Error during batch insertion: {table} {e}", exc_info=True)
+            self.db.rollback()
+            return list(range(offset))
+        
+        if analyze and offset - len(error_rows) >= tkc.ANALYZE_AFTER_ROWS:
+            self.analyze()
+        return error_rows
+    
+    def data_version(self) -> int:
+        """
+        Returns PRAGMA data_version, which changes whenever another connection commits.
 
-def close_database(self) -> None:
-    """
-    Closes the database connection if it is open.
+        Returns:
+            int: The current data version, 0 if it cannot be read.
+        """
+        version = int(self.query.value(0)) if self.query.exec("PRAGMA data_version") \
+            and self.query.next() else 0
+        self.query.finish()
+        return version
+    
+    def close_database(self) -> None:
+        """
+        Closes the database connection if it is open.
 
-    This method checks if the database connection is open and closes it if it is.
-    If the connection is already closed or an error occurs while closing the
-    connection, an exception is logged.
+        This method releases the prepared statements and hands every connection
+        of the calling thread back to the registry, which closes them. If an
+        error occurs while closing the connection, an exception is logged.
 
-    :return: None
-    """
-    try:
-        logger.info("if database is open")
-        if self.db.isOpen():
+        :return: None
+        """
+        try:
+            logger.info("if database is open")
+            self.query.finish()
+            self.insert_queries.clear()
+            self.statement_cache.clear()
+            # drop our handles first so the registry can remove the connection cleanly
+            self.query = QSqlQuery()
+            self.db = QSqlDatabase()
+            self.registry.release()
             logger.info("the database is closed successfully")
-            self.db.close()
-    except Exception as e:
-        logger.exception(f"Error closing database: {e}")
+        except Exception as e:
+            logger.exception(f"Error closing database: {e}")
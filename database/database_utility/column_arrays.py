@@ -0,0 +1,43 @@
+from array import array
+from typing import Any, Dict, Sequence
+
+from PyQt6.QtSql import QSqlQuery
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, plain arrays still work
+    np = None
+
+
+def query_to_columns(query: QSqlQuery,
+                     names: Sequence[str],
+                     typecodes: Sequence[str]) -> Dict[str, Any]:
+    """
+    Reads every remaining row of an executed query into one compact array per column.
+
+    Values land in ``array.array`` buffers of the given typecodes ('q' for 64-bit
+    integers, 'd' for doubles, where NULL becomes NaN) and are handed back as
+    NumPy arrays over the same memory when NumPy is installed.
+
+    Args:
+        query (QSqlQuery): An executed query positioned before its first row.
+        names (Sequence[str]): The names of the result columns, in select order.
+        typecodes (Sequence[str]): The array typecode of each column.
+
+    Returns:
+        Dict[str, Any]: The column arrays keyed by name.
+    """
+    buffers = [array(code) for code in typecodes]
+    defaults = [float('nan') if code == 'd' else 0 for code in typecodes]
+    positions = range(len(buffers))
+    while query.next():
+        for position in positions:
+            buffers[position].append(defaults[position] if query.isNull(position)
+                                     else query.value(position))
+    # an unfinished SELECT would pin the connection to a stale WAL snapshot
+    query.finish()
+
+    if np is None:
+        return dict(zip(names, buffers))
+    return {name: np.frombuffer(buffer, dtype=buffer.typecode)
+            for name, buffer in zip(names, buffers)}
@@ -1,4 +1,6 @@
-from PyQt6.QtWidgets import QTableView, QMainWindow
+from typing import Optional, Sequence, Tuple
+
+from PyQt6.QtWidgets import QApplication, QTableView, QMainWindow
 from logger_setup import logger
 
 
@@ -7,6 +9,9 @@ def delete_selected_rows(main_window_instance: QMainWindow, table_view_widget_na
     """
     Delete the selected rows from the specified QTableView model.
 
+    The whole selection goes to the model at once, which deletes it with
+    set-based statements in a single transaction and removes the rows in place.
+
     Args:
         main_window_instance (QMainWindow): The instance of the main window.
         table_view_widget_name (str): The name of the QTableView widget in the main window.
@@ -22,20 +27,81 @@ def delete_selected_rows(main_window_instance: QMainWindow, table_view_widget_na
     try:
         # Retrieve the QTableView and model instances from the main window
         table_view: QTableView = getattr(main_window_instance, table_view_widget_name)
-        model = getattr(main_window_instance, model_name)  # The model's specific type could vary
-        
+        model = getattr(main_window_instance, model_name)
+
         if table_view is not None:
-            # Get indices of selected rows, sorted in reverse order for deletion
-            selected_rows = table_view.selectionModel().selectedRows()
-            rows_to_delete = sorted([index.row() for index in selected_rows], reverse=True)
-            
-            # Delete each selected row from the model
-            for row in rows_to_delete:
-                model.removeRow(row)
-            
-            # Submit changes and refresh the model
-            model.submitAll()
-            model.select()
-    
+            rows = [index.row() for index in table_view.selectionModel().selectedRows()]
+            if rows:
+                removed = model.remove_row_set(rows)
+                logger.info(f"Deleted {removed} of {len(rows)} selected rows from {model.table}")
+
     except Exception as e:
         logger.error(f"An error occurred while deleting records: {str(e)}")
+
+
+def active_table(main_window_instance: QMainWindow,
+                 tables: Sequence[Tuple[str, str]]) -> Optional[Tuple[str, str]]:
+    """
+    Picks the table view the user is working in.
+
+    The view holding keyboard focus wins; otherwise the only one visible on the
+    current stack page, so the menu action still works after a click elsewhere.
+
+    Args:
+        main_window_instance (QMainWindow): The instance of the main window.
+        tables (Sequence[Tuple[str, str]]): (table view widget name, model name) pairs.
+
+    Returns:
+        Optional[Tuple[str, str]]: The matching pair, or None if no view qualifies.
+    """
+    focus = QApplication.focusWidget()
+    for view_name, model_name in tables:
+        view = getattr(main_window_instance, view_name)
+        if focus is not None and (focus is view or view.isAncestorOf(focus)):
+            return view_name, model_name
+    visible = [(view_name, model_name) for view_name, model_name in tables
+               if getattr(main_window_instance, view_name).isVisible()]
+    return visible[0] if len(visible) == 1 else None
+
+
+def delete_from_active_table(main_window_instance: QMainWindow,
+                             tables: Sequence[Tuple[str, str]]) -> None:
+    """
+    Deletes the selected rows of the active table view only.
+
+    Args:
+        main_window_instance (QMainWindow): The instance of the main window.
+        tables (Sequence[Tuple[str, str]]): (table view widget name, model name) pairs.
+
+    Returns:
+        None
+    """
+    target = active_table(main_window_instance, tables)
+    if target is None:
+        logger.info("Delete ignored, no table view is active")
+        return
+    delete_selected_rows(main_window_instance, *target)
+
+
+def undo_delete_in_active_table(main_window_instance: QMainWindow,
+                                tables: Sequence[Tuple[str, str]]) -> None:
+    """
+    Restores the most recent soft delete of the active table view.
+
+    Args:
+        main_window_instance (QMainWindow): The instance of the main window.
+        tables (Sequence[Tuple[str, str]]): (table view widget name, model name) pairs.
+
+    Returns:
+        None
+    """
+    target = active_table(main_window_instance, tables)
+    if target is None:
+        logger.info("Undo ignored, no table view is active")
+        return
+    try:
+        model = getattr(main_window_instance, target[1])
+        restored = model.undo_delete()
+        logger.info(f"Restored {restored} rows of {model.table}")
+    except Exception as e:
+        logger.error(f"An error occurred while restoring records: {str(e)}")
@@ -0,0 +1,53 @@
+from typing import Iterable, Iterator, List, Tuple
+
+# Ranges ORed into one WHERE clause, well under SQLite's expression depth limit of 1000
+MAX_RANGES_PER_STATEMENT = 200
+
+
+def id_ranges(ids: Iterable[int]) -> List[Tuple[int, int]]:
+    """
+    Coalesces ids into sorted, inclusive (first, last) runs of consecutive values.
+
+    Args:
+        ids (Iterable[int]): The ids, in any order and possibly repeated.
+
+    Returns:
+        List[Tuple[int, int]]: The runs, e.g. [1, 2, 3, 7] gives [(1, 3), (7, 7)].
+    """
+    ranges: List[Tuple[int, int]] = []
+    for row_id in sorted(set(ids)):
+        if ranges and row_id == ranges[-1][1] + 1:
+            ranges[-1] = (ranges[-1][0], row_id)
+        else:
+            ranges.append((row_id, row_id))
+    return ranges
+
+
+def id_conditions(ids: Iterable[int],
+                  column: str = 'id',
+                  max_ranges: int = MAX_RANGES_PER_STATEMENT) -> Iterator[str]:
+    """
+    Yields WHERE conditions that together match exactly the given ids.
+
+    Runs of two or more ids become ``BETWEEN`` terms and lone ids are gathered
+    into one ``IN`` list, so a shift-click selection of thousands of rows is a
+    single short condition. The ids are inlined as integers, which keeps the
+    statement independent of the bound parameter limit.
+
+    Args:
+        ids (Iterable[int]): The ids to match.
+        column (str): The integer key column.
+        max_ranges (int): The most ``BETWEEN`` terms per condition.
+
+    Yields:
+        str: A condition such as "id BETWEEN 1 AND 3 OR id IN (7, 9)".
+    """
+    ranges = id_ranges(ids)
+    for start in range(0, len(ranges), max_ranges):
+        chunk = ranges[start:start + max_ranges]
+        terms = [f"{column} BETWEEN {int(first)} AND {int(last)}"
+                 for first, last in chunk if last > first]
+        singles = [str(int(first)) for first, last in chunk if last == first]
+        if singles:
+            terms.append(f"{column} IN ({', '.join(singles)})")
+        yield ' OR '.join(terms)
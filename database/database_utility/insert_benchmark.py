@@ -0,0 +1,72 @@
+import os
+import sys
+import tempfile
+import time
+from typing import Dict
+
+from PyQt6.QtCore import QCoreApplication
+from PyQt6.QtSql import QSqlQuery
+
+from database.database_manager import DataManager, TABLE_COLUMNS
+
+
+def benchmark_inserts(rows: int = 5000) -> Dict[str, float]:
+    """
+    Measures the per-insert latency of the wefe_table insert path before and after
+    the prepared-statement cache.
+
+    "before" re-prepares the statement and rebuilds the bind list on a shared query
+    for every row, the way the insert methods used to. "after" goes through
+    ``DataManager.insert_row`` and its long-lived prepared query. Both runs happen
+    inside one transaction on a scratch database so commit cost does not drown out
+    the statement overhead.
+
+    Args:
+        rows (int): The number of rows inserted by each run.
+
+    Returns:
+        Dict[str, float]: Microseconds per insert for "before" and "after".
+    """
+    columns = TABLE_COLUMNS['wefe_table']
+    # one entry per second, the unique ts index rejects repeats
+    rows_in = [(f"2024-01-{1 + i // 86400:02d}", f"{i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}",
+                5, 5, 5, 5, 20) for i in range(2 * rows)]
+    results: Dict[str, float] = {}
+
+    with tempfile.TemporaryDirectory() as scratch:
+        manager = DataManager(os.path.join(scratch, 'insert_benchmark.db'))
+        shared_query = QSqlQuery(manager.db)
+
+        manager.db.transaction()
+        start = time.perf_counter()
+        for row in rows_in[:rows]:
+            sql = f"""INSERT INTO wefe_table(
+            {', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"""
+            bind_values = list(row)
+            shared_query.prepare(sql)
+            for value in bind_values:
+                shared_query.addBindValue(value)
+            if sql.count('?') != len(bind_values):
+                raise ValueError("Mismatch: wefe_table")
+            shared_query.exec()
+        results['before'] = (time.perf_counter() - start) / rows * 1e6
+        manager.db.commit()
+
+        manager.db.transaction()
+        start = time.perf_counter()
+        for row in rows_in[rows:]:
+            manager.insert_row('wefe_table', row)
+        results['after'] = (time.perf_counter() - start) / rows * 1e6
+        manager.db.commit()
+
+        shared_query.finish()
+        del shared_query
+        manager.close_database()
+    return results
+
+
+if __name__ == "__main__":
+    app = QCoreApplication(sys.argv)
+    timings = benchmark_inserts()
+    for label, micros in timings.items():
+        print(f"{label:>6}: {micros:8.2f} us/insert")
@@ -0,0 +1,603 @@
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, QObject, Qt
+from PyQt6.QtSql import QSqlDatabase, QSqlQuery
+
+import tracker_config as tkc
+from database.database_utility.id_ranges import id_conditions, id_ranges
+from database.tombstones import LIVE, live_view
+from logger_setup import logger
+
+# Columns the data page shows but never lets the user edit
+READ_ONLY_COLUMNS = frozenset(('id', 'ts', 'deleted_at'))
+# Contiguous runs removed with one signal each before a delete falls back to a layout change
+MAX_REMOVED_RUNS = 32
+
+
+class LazyTableModel(QAbstractTableModel):
+    """
+    A read/write table model that only keeps a window of a tracker table in memory.
+
+    The model holds the row ids in display order, fetched ``fetch_size`` at a
+    time through ``canFetchMore``/``fetchMore`` with keyset pagination over
+    (sort column, id), so the view pulls more as it scrolls and nothing is ever
+    read with OFFSET. Cell values are loaded a page of ``page_size`` rows at a
+    time by primary key and at most ``cached_pages`` pages stay resident, the
+    least recently used being evicted first. Edits are written through at once,
+    like ``QSqlTableModel`` with ``OnFieldChange``, by ``writer`` on the single
+    writer connection while the model itself reads. Rows are read through the
+    table's ``*_live`` view, and with ``soft_delete`` removing rows tombstones
+    them so the last ``UNDO_DEPTH`` deletes can be undone.
+
+    Attributes:
+        db (QSqlDatabase): The connection the model reads through.
+        writer (Callable): Runs a function on the writer connection and returns its result,
+            e.g. ``WriteBehindWorker.call``; by default the function gets ``db``.
+        table (str): The table shown.
+        source (str): The view rows are read from, which hides tombstoned rows.
+        soft_delete (bool): Removing rows sets ``deleted_at`` instead of deleting them.
+        deleted (deque): The id lists of recent soft deletes, newest last.
+        columns (List[str]): The column names, in table order.
+        ids (array): The ids of the fetched rows, in display order.
+        max_id (int): No fetched row has a larger id; AUTOINCREMENT puts every new row above it.
+        pages (OrderedDict): The resident pages of row values, keyed by page number.
+    """
+
+    def __init__(self,
+                 db: QSqlDatabase,
+                 table: str,
+                 fetch_size: int = tkc.MODEL_FETCH_SIZE,
+                 page_size: int = tkc.MODEL_PAGE_SIZE,
+                 cached_pages: int = tkc.MODEL_CACHED_PAGES,
+                 soft_delete: bool = tkc.SOFT_DELETE,
+                 writer: Optional[Callable[[Callable[[QSqlDatabase], Any]], Any]] = None,
+                 parent: QObject = None) -> None:
+        super().__init__(parent)
+        self.db: QSqlDatabase = db
+        self.writer: Callable[[Callable[[QSqlDatabase], Any]], Any] = \
+            writer if writer is not None else (lambda function: function(self.db))
+        self.table: str = table
+        self.source: str = live_view(table)
+        self.soft_delete: bool = soft_delete
+        self.deleted: deque = deque(maxlen=tkc.UNDO_DEPTH)
+        self.fetch_size: int = fetch_size
+        self.page_size: int = page_size
+        self.cached_pages: int = cached_pages
+        self.columns: List[str] = []
+        self.ids: array = array('q')
+        self.max_id: int = 0
+        self.pages: 'OrderedDict[int, Dict[int, Tuple[Any, ...]]]' = OrderedDict()
+        self.sort_column: str = 'id'
+        self.sort_order: Qt.SortOrder = Qt.SortOrder.AscendingOrder
+        self.phases: List[str] = []
+        self.last_key: Optional[Tuple[Any, int]] = None
+
+    def select(self) -> bool:
+        """
+        Reloads the model from the table and fetches the first chunk of ids.
+
+        Returns:
+            bool: True if the table could be read.
+        """
+        query = QSqlQuery(self.db)
+        columns = []
+        if query.exec(f"PRAGMA table_info({self.table})"):
+            while query.next():
+                columns.append(query.value(1))
+        query.finish()
+        if not columns:
+            logger.error(f"Error selecting data from table: {self.table}")
+            return False
+
+        self.beginResetModel()
+        self.columns = columns
+        self.ids = array('q')
+        self.max_id = 0
+        self.pages.clear()
+        # SQLite sorts NULL first, so ascending walks the NULL rows before the values
+        ascending = self.sort_order == Qt.SortOrder.AscendingOrder
+        self.phases = ['null', 'value'] if ascending else ['value', 'null']
+        self.last_key = None
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+        return True
+
+    def fieldIndex(self, name: str) -> int:
+        """
+        Returns the column number of a field, as ``QSqlTableModel.fieldIndex`` does.
+
+        Args:
+            name (str): The column name.
+
+        Returns:
+            int: The column number, -1 if there is no such column.
+        """
+        return self.columns.index(name) if name in self.columns else -1
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.ids)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section: int, orientation: Qt.Orientation,
+                   role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.columns[section] if section < len(self.columns) else None
+        return section + 1
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlag:
+        flags = super().flags(index)
+        if index.isValid() and self.columns[index.column()] not in READ_ONLY_COLUMNS:
+            flags |= Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()) -> bool:
+        return not parent.isValid() and bool(self.phases)
+
+    def fetchMore(self, parent: QModelIndex = QModelIndex()) -> None:
+        """
+        Appends the next ``fetch_size`` ids in display order.
+
+        Args:
+            parent (QModelIndex): Unused, the model is flat.
+
+        Returns:
+            None
+        """
+        if parent.isValid():
+            return
+        fetched = array('q')
+        while self.phases and len(fetched) < self.fetch_size:
+            chunk = self.fetch_keys(self.phases[0], self.fetch_size - len(fetched))
+            if chunk is None:
+                self.phases = []
+                break
+            if len(chunk) < self.fetch_size - len(fetched):
+                self.phases.pop(0)
+                self.last_key = None
+            fetched.extend(chunk)
+        if not fetched:
+            return
+        self.beginInsertRows(QModelIndex(), len(self.ids), len(self.ids) + len(fetched) - 1)
+        self.ids.extend(fetched)
+        self.max_id = max(self.max_id, max(fetched))
+        self.endInsertRows()
+
+    def fetch_keys(self, phase: str, limit: int) -> Optional[array]:
+        """
+        Reads the next ids of one phase of the walk, after ``last_key``.
+
+        The 'null' phase walks the rows whose sort column is NULL by id, the
+        'value' phase walks the others by (sort column, id).
+
+        Args:
+            phase (str): 'null' or 'value'.
+            limit (int): The most ids to read.
+
+        Returns:
+            Optional[array]: The ids, or None if the query failed.
+        """
+        column = self.sort_column
+        ascending = self.sort_order == Qt.SortOrder.AscendingOrder
+        direction, compare = ('ASC', '>') if ascending else ('DESC', '<')
+        binds: List[Any] = []
+        if phase == 'null':
+            conditions = [f"{column} IS NULL"]
+            if self.last_key is not None:
+                conditions.append(f"id {compare} ?")
+                binds.append(self.last_key[1])
+            order = f"id {direction}"
+        else:
+            conditions = [f"{column} IS NOT NULL"]
+            if self.last_key is not None:
+                conditions.append(f"({column}, id) {compare} (?, ?)")
+                binds.extend(self.last_key)
+            order = f"{column} {direction}, id {direction}"
+
+        query = QSqlQuery(self.db)
+        query.setForwardOnly(True)
+        query.prepare(f"""SELECT id, {column} FROM {self.source}
+                          WHERE {' AND '.join(conditions)} ORDER BY {order} LIMIT ?""")
+        for position, value in enumerate(binds + [limit]):
+            query.bindValue(position, value)
+        if not query.exec():
+            logger.error(f"Error fetching {self.table}: {query.lastError().text()}")
+            return None
+        ids = array('q')
+        while query.next():
+            ids.append(query.value(0))
+            self.last_key = (query.value(1), query.value(0))
+        query.finish()
+        return ids
+
+    def row_values(self, row: int) -> Optional[Tuple[Any, ...]]:
+        """
+        Returns the values of one row, loading its page on a miss.
+
+        Args:
+            row (int): The row number.
+
+        Returns:
+            Optional[Tuple[Any, ...]]: The values in ``columns`` order, None if the row is gone.
+        """
+        number = row // self.page_size
+        page = self.pages.get(number)
+        if page is None:
+            page = self.load_page(number)
+        else:
+            self.pages.move_to_end(number)
+        return page.get(self.ids[row])
+
+    def load_page(self, number: int) -> Dict[int, Tuple[Any, ...]]:
+        """
+        Reads one page of rows by primary key and makes it the most recently used.
+
+        Args:
+            number (int): The page number.
+
+        Returns:
+            Dict[int, Tuple[Any, ...]]: The row values keyed by id.
+        """
+        ids = self.ids[number * self.page_size:(number + 1) * self.page_size]
+        page: Dict[int, Tuple[Any, ...]] = {}
+        query = QSqlQuery(self.db)
+        query.setForwardOnly(True)
+        # the ids are integers from the table itself, safe to inline
+        if ids and query.exec(f"SELECT {', '.join(self.columns)} FROM {self.source} "
+                              f"WHERE id IN ({', '.join(map(str, ids))})"):
+            width = len(self.columns)
+            while query.next():
+                values = tuple(None if query.isNull(i) else query.value(i) for i in range(width))
+                page[values[0]] = values
+        elif ids:
+            logger.error(f"Error loading {self.table} rows: {query.lastError().text()}")
+        query.finish()
+
+        self.pages[number] = page
+        while len(self.pages) > self.cached_pages:
+            self.pages.popitem(last=False)
+        return page
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid() or role not in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return None
+        values = self.row_values(index.row())
+        return None if values is None else values[index.column()]
+
+    def setData(self, index: QModelIndex, value: Any, role: int = Qt.ItemDataRole.EditRole) -> bool:
+        """
+        Writes an edited cell straight to the table and reloads its page.
+
+        Args:
+            index (QModelIndex): The edited cell.
+            value (Any): The new value.
+            role (int): Only EditRole is written.
+
+        Returns:
+            bool: True if the row was updated.
+        """
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole:
+            return False
+        column = self.columns[index.column()]
+        if column in READ_ONLY_COLUMNS:
+            return False
+        row_id = self.ids[index.row()]
+
+        def update(db: QSqlDatabase) -> bool:
+            query = QSqlQuery(db)
+            query.prepare(f"UPDATE {self.table} SET {column} = ? WHERE id = ?")
+            query.bindValue(0, value)
+            query.bindValue(1, row_id)
+            if not query.exec():
+                logger.error(f"Error updating {self.table}: {query.lastError().text()}")
+                return False
+            query.finish()
+            return True
+
+        if not self.writer(update):
+            return False
+        # triggers may have rewritten other columns of the row, ts in particular
+        self.pages.pop(index.row() // self.page_size, None)
+        self.dataChanged.emit(self.index(index.row(), 0),
+                              self.index(index.row(), len(self.columns) - 1))
+        return True
+
+    def removeRows(self, row: int, count: int, parent: QModelIndex = QModelIndex()) -> bool:
+        """
+        Deletes rows from the table and drops them from the model.
+
+        Args:
+            row (int): The first row to remove.
+            count (int): The number of rows.
+            parent (QModelIndex): Unused, the model is flat.
+
+        Returns:
+            bool: True if the rows were deleted.
+        """
+        if parent.isValid() or count <= 0 or row < 0 or row + count > len(self.ids):
+            return False
+        return self.remove_row_set(range(row, row + count)) == count
+
+    def remove_row_set(self, rows: Iterable[int]) -> int:
+        """
+        Deletes any set of rows with set-based statements in one transaction.
+
+        The row ids are coalesced into ``BETWEEN`` ranges and one ``IN`` list, so
+        thousands of selected rows cost a statement or two instead of one each.
+        With ``soft_delete`` the statements only stamp ``deleted_at``, a flag
+        write the maintenance purge turns into a real delete later.
+        The model then drops them in place: a removal signal per contiguous run,
+        or a single layout change with remapped persistent indexes when the
+        selection is scattered into more than ``MAX_REMOVED_RUNS`` runs.
+
+        Args:
+            rows (Iterable[int]): The rows to remove, in any order.
+
+        Returns:
+            int: The number of rows removed, 0 if the delete was rolled back.
+        """
+        rows = sorted({row for row in rows if 0 <= row < len(self.ids)})
+        if not rows:
+            return 0
+        ids = [self.ids[row] for row in rows]
+        if not self.writer(lambda db: self.delete_ids(db, ids)):
+            return 0
+        if self.soft_delete:
+            self.deleted.append(ids)
+
+        runs = id_ranges(rows)
+        if len(runs) <= MAX_REMOVED_RUNS:
+            # last run first, so the positions of the earlier runs stay valid
+            for first, last in reversed(runs):
+                self.beginRemoveRows(QModelIndex(), first, last)
+                del self.ids[first:last + 1]
+                self.drop_pages_from(first)
+                self.endRemoveRows()
+            return len(rows)
+
+        self.layoutAboutToBeChanged.emit()
+        removed = set(rows)
+        kept = array('q', (row_id for row, row_id in enumerate(self.ids) if row not in removed))
+        old_indexes = self.persistentIndexList()
+        new_indexes = []
+        for index in old_indexes:
+            if index.row() in removed:
+                new_indexes.append(QModelIndex())
+            else:
+                # every removed row above shifts this one up by one
+                new_indexes.append(self.index(index.row() - bisect_left(rows, index.row()),
+                                              index.column()))
+        self.ids = kept
+        self.pages.clear()
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.layoutChanged.emit()
+        return len(rows)
+
+    def undo_delete(self) -> int:
+        """
+        Restores the rows of the most recent soft delete that are not purged yet.
+
+        Returns:
+            int: The number of rows restored.
+        """
+        if not self.deleted:
+            return 0
+        ids = self.deleted.pop()
+        restored = self.writer(lambda db: self.restore_ids(db, ids))
+        if restored is None:
+            self.deleted.append(ids)
+            return 0
+        self.apply_written(restored)
+        return len(restored)
+
+    def delete_ids(self, db: QSqlDatabase, ids: Sequence[int]) -> bool:
+        """
+        Deletes or tombstones rows by id in one transaction, on the writer connection.
+
+        Args:
+            db (QSqlDatabase): The writer connection.
+            ids (Sequence[int]): The ids of the rows to remove.
+
+        Returns:
+            bool: True if the delete was committed.
+        """
+        if not db.transaction():
+            logger.error(f"Error starting delete on {self.table}: {db.lastError().text()}")
+            return False
+        statement = (f"UPDATE {self.table} SET deleted_at = {int(time.time())} WHERE {LIVE} AND"
+                     if self.soft_delete else f"DELETE FROM {self.table} WHERE")
+        query = QSqlQuery(db)
+        for condition in id_conditions(ids):
+            if not query.exec(f"{statement} ({condition})"):
+                logger.error(f"Error deleting from {self.table}: {query.lastError().text()}")
+                query.finish()
+                db.rollback()
+                return False
+        query.finish()
+        if not db.commit():
+            logger.error(f"Error committing delete on {self.table}: {db.lastError().text()}")
+            db.rollback()
+            return False
+        return True
+
+    def restore_ids(self, db: QSqlDatabase, ids: Sequence[int]) -> Optional[List[int]]:
+        """
+        Clears the tombstones of rows by id in one transaction, on the writer connection.
+
+        Args:
+            db (QSqlDatabase): The writer connection.
+            ids (Sequence[int]): The ids of a soft delete.
+
+        Returns:
+            Optional[List[int]]: The ids restored, None if the undo was rolled back.
+        """
+        if not db.transaction():
+            logger.error(f"Error starting undo on {self.table}: {db.lastError().text()}")
+            return None
+        restored: List[int] = []
+        query = QSqlQuery(db)
+        for condition in id_conditions(ids):
+            if not query.exec(f"UPDATE {self.table} SET deleted_at = NULL "
+                              f"WHERE deleted_at IS NOT NULL AND ({condition}) RETURNING id"):
+                logger.error(f"Error restoring {self.table} rows: {query.lastError().text()}")
+                query.finish()
+                db.rollback()
+                return None
+            while query.next():
+                restored.append(query.value(0))
+            query.finish()
+        if not db.commit():
+            logger.error(f"Error committing undo on {self.table}: {db.lastError().text()}")
+            db.rollback()
+            return None
+        return restored
+
+    def sort_key(self, values: Tuple[Any, ...]) -> Tuple[int, Any, int]:
+        """
+        Returns the (NULL rank, sort value, id) key a row is ordered by.
+
+        Args:
+            values (Tuple[Any, ...]): The row values in ``columns`` order.
+
+        Returns:
+            Tuple[int, Any, int]: The key; NULL ranks below every value, as in SQLite.
+        """
+        value = values[self.columns.index(self.sort_column)]
+        return (0, 0, values[0]) if value is None else (1, value, values[0])
+
+    def position_of(self, key: Tuple[int, Any, int]) -> int:
+        """
+        Binary-searches the fetched rows for where a key belongs in display order.
+
+        Sorting by id compares the id array directly; any other column reads the
+        probed rows, which touches O(log n) pages.
+
+        Args:
+            key (Tuple[int, Any, int]): The key from ``sort_key``.
+
+        Returns:
+            int: The row the key would be inserted at.
+        """
+        ascending = self.sort_order == Qt.SortOrder.AscendingOrder
+        low, high = 0, len(self.ids)
+        while low < high:
+            middle = (low + high) // 2
+            if self.sort_column == 'id':
+                probe = (1, self.ids[middle], self.ids[middle])
+            else:
+                values = self.row_values(middle)
+                if values is None:
+                    raise LookupError(f"Row {middle} of {self.table} is gone")
+                probe = self.sort_key(values)
+            if (probe < key) if ascending else (probe > key):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def drop_pages_from(self, row: int) -> None:
+        """
+        Evicts every cached page at or after a row whose position shifted.
+
+        Args:
+            row (int): The first row that moved.
+
+        Returns:
+            None
+        """
+        first_page = row // self.page_size
+        for number in [number for number in self.pages if number >= first_page]:
+            del self.pages[number]
+
+    def apply_written(self, ids: Sequence[int]) -> None:
+        """
+        Merges rows inserted or upserted elsewhere into the model without a reload.
+
+        Each row is read once by id and placed by binary search, so a commit costs
+        O(log n) instead of a full ``select``. Rows that sort past the fetched
+        window are left for ``fetchMore``, and an upserted row that is already
+        shown is refreshed in place. A new row has an id above ``max_id``, so it
+        is known not to be shown without scanning ``ids``; only an older id that
+        is not at its sorted position (an upsert that moved it under a slider
+        sort, or an undone delete) is looked up by a scan. Falls back to
+        ``select`` if the order cannot be decided.
+
+        Args:
+            ids (Sequence[int]): The ids of the written rows.
+
+        Returns:
+            None
+        """
+        if not ids:
+            return
+        query = QSqlQuery(self.db)
+        query.setForwardOnly(True)
+        rows: List[Tuple[Any, ...]] = []
+        # the ids come from RETURNING, integers safe to inline
+        if query.exec(f"SELECT {', '.join(self.columns)} FROM {self.source} "
+                      f"WHERE id IN ({', '.join(str(int(row_id)) for row_id in ids)})"):
+            width = len(self.columns)
+            while query.next():
+                rows.append(tuple(None if query.isNull(i) else query.value(i) for i in range(width)))
+        query.finish()
+
+        try:
+            for values in rows:
+                row_id = values[0]
+                position = self.position_of(self.sort_key(values))
+                if position < len(self.ids) and self.ids[position] == row_id:
+                    self.pages.pop(position // self.page_size, None)
+                    self.dataChanged.emit(self.index(position, 0),
+                                          self.index(position, len(self.columns) - 1))
+                    continue
+                if row_id <= self.max_id and row_id in self.ids:
+                    # an upsert moved the row under a slider sort
+                    old = self.ids.index(row_id)
+                    self.beginRemoveRows(QModelIndex(), old, old)
+                    del self.ids[old]
+                    self.drop_pages_from(old)
+                    self.endRemoveRows()
+                    position = self.position_of(self.sort_key(values))
+                if position == len(self.ids) and self.canFetchMore():
+                    continue
+                self.beginInsertRows(QModelIndex(), position, position)
+                self.ids.insert(position, row_id)
+                self.max_id = max(self.max_id, row_id)
+                self.drop_pages_from(position)
+                self.endInsertRows()
+        except (LookupError, TypeError) as e:
+            logger.error(f"Reloading {self.table} after an unplaceable write: {e}")
+            self.select()
+
+    def submitAll(self) -> bool:
+        """
+        Kept for ``QSqlTableModel`` callers; edits and removals are already written.
+
+        Returns:
+            bool: Always True.
+        """
+        return True
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.SortOrder.AscendingOrder) -> None:
+        """
+        Re-walks the table in a new order, keyed by (column, id).
+
+        Args:
+            column (int): The column to sort by.
+            order (Qt.SortOrder): The sort direction.
+
+        Returns:
+            None
+        """
+        if not 0 <= column < len(self.columns):
+            return
+        self.sort_column = self.columns[column]
+        self.sort_order = order
+        self.select()
@@ -1,30 +1,46 @@
+from typing import Any, Callable, Optional
+
 from PyQt6 import QtSql
 from PyQt6.QtWidgets import QAbstractItemView
+from database.database_utility.lazy_table_model import LazyTableModel
 from logger_setup import logger
 
 
-def create_and_set_model(table_name: str, view_widget: QAbstractItemView) -> QtSql.QSqlTableModel:
+def create_and_set_model(table_name: str, view_widget: QAbstractItemView,
+                         db: QtSql.QSqlDatabase,
+                         writer: Optional[Callable[[Callable[[QtSql.QSqlDatabase], Any]], Any]] = None
+                         ) -> LazyTableModel:
     """
-    Creates and sets up a QSqlTableModel for the specified table name and view widget.
+    Creates and sets up a LazyTableModel for the specified table name and view widget.
+
+    The model only loads the rows the view scrolls to, so opening the data page
+    costs the same for ten rows or a million.
 
     Args:
         table_name (str): The name of the table to create the model for.
         view_widget (QAbstractItemView): The view widget to set the model on.
+        db (QSqlDatabase): The GUI thread's connection the model reads through.
+        writer (Optional[Callable]): Runs the model's edits and deletes on the writer
+            connection, e.g. ``WriteBehindWorker.call``; ``db`` by default.
 
     Returns:
-        QSqlTableModel: The created QSqlTableModel.
+        LazyTableModel: The created model.
 
     Raises:
         RuntimeError: If there is an error selecting data from the table.
     """
-    model = QtSql.QSqlTableModel()
-    model.setTable(table_name)
-    model.setEditStrategy(QtSql.QSqlTableModel.EditStrategy.OnFieldChange)
+    model = LazyTableModel(db, table_name, writer=writer, parent=view_widget)
 
     if not model.select():
-        error_message = f"Error selecting data from table: {table_name}, {model.lastError().text()}"
+        error_message = f"Error selecting data from table: {table_name}"
         logger.error(error_message)
         raise RuntimeError(error_message)
 
     view_widget.setModel(model)
+    # ts is the machine key behind the date/time columns and deleted_at is
+    # always NULL in the live view, nothing to show
+    for column_name in ('ts', 'deleted_at'):
+        column = model.fieldIndex(column_name)
+        if column >= 0:
+            view_widget.setColumnHidden(column, True)
     return model
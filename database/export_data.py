@@ -0,0 +1,263 @@
+import csv
+import gzip
+import json
+import os
+from typing import Callable, IO, Iterator, List, Optional, Sequence, Tuple
+
+from PyQt6.QtCore import QObject, QThread, pyqtSignal
+from PyQt6.QtSql import QSqlDatabase, QSqlQuery
+
+import tracker_config as tkc
+from database.archive_catalog import partitions
+from database.connection_registry import connection_registry
+from database.schema import TABLE_COLUMNS
+from database.tombstones import live_view
+from logger_setup import logger
+
+EXPORT_FORMATS = ('csv', 'jsonl')
+
+
+def export_columns(table: str) -> Tuple[str, ...]:
+    """
+    Returns the columns written for a tracker table, in file order.
+
+    Args:
+        table (str): The tracker table.
+
+    Returns:
+        Tuple[str, ...]: id, the entered columns, then ts.
+
+    Raises:
+        ValueError: If the table is unknown.
+    """
+    columns = TABLE_COLUMNS.get(table)
+    if columns is None:
+        raise ValueError(f"Unknown table: {table}")
+    return ('id',) + columns + ('ts',)
+
+
+def count_rows(db: QSqlDatabase, table: str,
+               start: Optional[int] = None, end: Optional[int] = None) -> int:
+    """
+    Counts the rows an export of the given range will write.
+
+    Archived months overlapping the range count with their whole catalog
+    row count, so a ranged total may run slightly ahead of the rows written.
+
+    Args:
+        db (QSqlDatabase): The open database connection.
+        table (str): The tracker table.
+        start (Optional[int]): The first epoch second to include.
+        end (Optional[int]): The epoch second to stop before.
+
+    Returns:
+        int: The number of matching rows.
+    """
+    query = QSqlQuery(db)
+    if start is None and end is None:
+        query.prepare(f"SELECT COUNT(*) FROM {live_view(table)}")
+    else:
+        query.prepare(f"SELECT COUNT(*) FROM {live_view(table)} WHERE ts >= ? AND ts < ?")
+        query.bindValue(0, -2 ** 62 if start is None else start)
+        query.bindValue(1, 2 ** 62 if end is None else end)
+    total = int(query.value(0)) if query.exec() and query.next() else 0
+    query.finish()
+    for _, _, rows, first_ts, _ in partitions(db, table, None if start is None else start - 1):
+        if end is None or first_ts < end:
+            total += rows
+    return total
+
+
+def iter_row_chunks(db: QSqlDatabase,
+                    table: str,
+                    start: Optional[int] = None,
+                    end: Optional[int] = None,
+                    chunk_size: int = tkc.EXPORT_CHUNK_SIZE) -> Iterator[List[tuple]]:
+    """
+    Streams a tracker table in fixed-size chunks using keyset pagination.
+
+    Each chunk is a fresh bounded query that resumes after the last key seen,
+    so memory stays flat and no read transaction is held open between chunks.
+    Months moved to the columnar archive come first, oldest month first, then
+    the rows still in SQLite: without a range in id order, with a range in
+    (ts, id) order over the ts index.
+
+    Args:
+        db (QSqlDatabase): The open database connection.
+        table (str): The tracker table.
+        start (Optional[int]): The first epoch second to include.
+        end (Optional[int]): The epoch second to stop before.
+        chunk_size (int): The number of rows per chunk.
+
+    Returns:
+        Iterator[List[tuple]]: Lists of rows in ``export_columns(table)`` order.
+    """
+    columns = export_columns(table)
+    width = len(columns)
+    if partitions(db, table, None if start is None else start - 1):
+        # numpy is only needed once something was archived
+        from database.archive import archived_row_chunks
+        yield from archived_row_chunks(db, table, start, end, chunk_size)
+    ranged = start is not None or end is not None
+    query = QSqlQuery(db)
+    query.setForwardOnly(True)
+    if ranged:
+        query.prepare(f"""SELECT {', '.join(columns)} FROM {live_view(table)}
+                          WHERE (ts, id) > (?, ?) AND ts < ?
+                          ORDER BY ts, id LIMIT ?""")
+        key: Tuple[int, ...] = (-2 ** 62 if start is None else start - 1, 2 ** 62)
+    else:
+        query.prepare(f"SELECT {', '.join(columns)} FROM {live_view(table)} "
+                      f"WHERE id > ? ORDER BY id LIMIT ?")
+        key = (-1,)
+
+    while True:
+        for position, value in enumerate(key):
+            query.bindValue(position, value)
+        if ranged:
+            query.bindValue(2, 2 ** 62 if end is None else end)
+            query.bindValue(3, chunk_size)
+        else:
+            query.bindValue(1, chunk_size)
+        if not query.exec():
+            logger.error(f"Error exporting {table}: {query.lastError().text()}")
+            return
+        chunk = []
+        while query.next():
+            chunk.append(tuple(None if query.isNull(i) else query.value(i) for i in range(width)))
+        query.finish()
+        if not chunk:
+            return
+        yield chunk
+        last = chunk[-1]
+        key = (last[-1], last[0]) if ranged else (last[0],)
+
+
+def open_output(path: str, compress: bool) -> IO[str]:
+    """
+    Opens an export file for text writing, gzip-compressed when asked.
+
+    Args:
+        path (str): The file to write.
+        compress (bool): Write through gzip.
+
+    Returns:
+        IO[str]: The open text stream.
+    """
+    if compress:
+        return gzip.open(path, 'wt', encoding='utf-8', newline='')
+    return open(path, 'w', encoding='utf-8', newline='')
+
+
+def export_table(db: QSqlDatabase,
+                 table: str,
+                 path: str,
+                 fmt: str = 'csv',
+                 start: Optional[int] = None,
+                 end: Optional[int] = None,
+                 compress: bool = False,
+                 progress: Optional[Callable[[int, int], None]] = None,
+                 chunk_size: int = tkc.EXPORT_CHUNK_SIZE) -> int:
+    """
+    Streams one tracker table to a CSV or JSON Lines file, chunk by chunk.
+
+    Archived months are written along with the live rows. A month archived
+    while the export runs would leave its rows out of both, so the export
+    fails rather than write a file that is silently missing them.
+
+    Args:
+        db (QSqlDatabase): The open database connection.
+        table (str): The tracker table.
+        path (str): The file to write.
+        fmt (str): 'csv' or 'jsonl'.
+        start (Optional[int]): The first epoch second to include.
+        end (Optional[int]): The epoch second to stop before.
+        compress (bool): Write the file through gzip.
+        progress (Optional[Callable[[int, int], None]]): Called with (rows written, total rows).
+        chunk_size (int): The number of rows per chunk.
+
+    Returns:
+        int: The number of rows written.
+
+    Raises:
+        ValueError: If the format or table is unknown.
+        RuntimeError: If a month of the table was archived during the export.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    columns = export_columns(table)
+    archived = partitions(db, table)
+    total = count_rows(db, table, start, end)
+    written = 0
+    with open_output(path, compress) as stream:
+        if fmt == 'csv':
+            writer = csv.writer(stream)
+            writer.writerow(columns)
+        for chunk in iter_row_chunks(db, table, start, end, chunk_size):
+            if fmt == 'csv':
+                writer.writerows(chunk)
+            else:
+                stream.writelines(json.dumps(dict(zip(columns, row))) + '\n' for row in chunk)
+            written += len(chunk)
+            if progress is not None:
+                progress(written, total)
+    if partitions(db, table) != archived:
+        raise RuntimeError(f"A month of {table} was archived during the export, export it again")
+    return written
+
+
+class ExportWorker(QThread):
+    """
+    Exports tracker tables off the GUI thread on a read-only connection from the registry.
+
+    Attributes:
+        progress (pyqtSignal): Emitted with (table, rows written, total rows).
+        exported (pyqtSignal): Emitted with (table, path, rows written) per finished file.
+        failed (pyqtSignal): Emitted with an error message if an export fails.
+    """
+
+    progress = pyqtSignal(str, int, int)
+    exported = pyqtSignal(str, str, int)
+    failed = pyqtSignal(str)
+
+    def __init__(self,
+                 db_name: str,
+                 tables: Sequence[str],
+                 directory: str,
+                 fmt: str = tkc.EXPORT_FORMAT,
+                 compress: bool = tkc.EXPORT_COMPRESS,
+                 start: Optional[int] = None,
+                 end: Optional[int] = None,
+                 parent: QObject = None) -> None:
+        super().__init__(parent)
+        self.db_name: str = db_name
+        self.tables: Sequence[str] = tuple(tables)
+        self.directory: str = directory
+        self.fmt: str = fmt
+        self.compress: bool = compress
+        self.start_ts: Optional[int] = start
+        self.end_ts: Optional[int] = end
+
+    def run(self) -> None:
+        """
+        Writes one file per table into the target directory.
+
+        Returns:
+            None
+        """
+        registry = connection_registry(self.db_name)
+        try:
+            db = registry.reader()
+            for table in self.tables:
+                suffix = f".{self.fmt}.gz" if self.compress else f".{self.fmt}"
+                path = os.path.join(self.directory, f"{table}{suffix}")
+                rows = export_table(db, table, path, self.fmt, self.start_ts, self.end_ts,
+                                    self.compress,
+                                    lambda done, total, t=table: self.progress.emit(t, done, total))
+                self.exported.emit(table, path, rows)
+        except Exception as e:
+            logger.error(f"Error exporting tables: {e}", exc_info=True)
+            self.failed.emit(str(e))
+        finally:
+            db = None
+            registry.release()
@@ -0,0 +1,224 @@
+import csv
+import gzip
+import json
+import time
+from typing import Any, Callable, Dict, IO, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+import tracker_config as tkc
+from database.archive import archived_timestamps, stamp_texts
+from database.database_manager import DataManager, chunked, to_epoch
+from database.schema import (COLUMN_RANGES, SLIDER_RANGE, TABLE_COLUMNS, TABLE_SLIDER_COLUMNS,
+                             TRACKERS_BY_TABLE)
+from logger_setup import logger
+
+
+def open_input(path: str) -> IO[str]:
+    """
+    Opens an import file for text reading, through gzip when it ends in .gz.
+
+    Args:
+        path (str): The file to read.
+
+    Returns:
+        IO[str]: The open text stream.
+    """
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return open(path, 'r', encoding='utf-8', newline='')
+
+
+def read_records(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Reads the records of a CSV or JSON Lines file, one dict per entry.
+
+    Files whose name contains ".jsonl" are read as JSON Lines, everything else as
+    CSV with a header row.
+
+    Args:
+        path (str): The file to read.
+
+    Returns:
+        Iterator[Dict[str, Any]]: The records keyed by column name.
+    """
+    with open_input(path) as stream:
+        if '.jsonl' in path:
+            for line in stream:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(stream)
+
+
+def slider_bounds(table: str) -> np.ndarray:
+    """
+    Returns the inclusive (low, high) bounds of each slider column of a table.
+
+    Args:
+        table (str): The tracker table.
+
+    Returns:
+        np.ndarray: A (sliders, 2) array in ``TABLE_SLIDER_COLUMNS[table]`` order.
+    """
+    return np.array([COLUMN_RANGES.get(slider, SLIDER_RANGE)
+                     for slider in TABLE_SLIDER_COLUMNS[table]], dtype=float)
+
+
+def derived_positions(table: str) -> List[Tuple[int, List[int], Callable[..., int]]]:
+    """
+    Returns where each derived slider of a table sits and how it is computed.
+
+    Args:
+        table (str): The tracker table.
+
+    Returns:
+        List[Tuple[int, List[int], Callable[..., int]]]: (position, input positions, formula)
+        per derived field, positions in ``TABLE_SLIDER_COLUMNS[table]`` order.
+    """
+    sliders = TABLE_SLIDER_COLUMNS[table]
+    return [(sliders.index(field.name), [sliders.index(name) for name in field.inputs], field.formula)
+            for field in TRACKERS_BY_TABLE[table].fields if field.derived]
+
+
+def existing_timestamps(manager: DataManager, table: str, first: int, last: int) -> np.ndarray:
+    """
+    Returns the ts values already stored between two epoch seconds, read from the ts index.
+
+    Months moved to the columnar archive count as stored too, so re-importing
+    old history does not bring archived entries back into SQLite.
+
+    Args:
+        manager (DataManager): The data manager to read through.
+        table (str): The tracker table.
+        first (int): The first epoch second to look at.
+        last (int): The last epoch second to look at.
+
+    Returns:
+        np.ndarray: The stored timestamps.
+    """
+    query = manager.cached_query(f"SELECT ts FROM {table} WHERE ts BETWEEN ? AND ?")
+    query.bindValue(0, first)
+    query.bindValue(1, last)
+    found: List[int] = []
+    if query.exec():
+        while query.next():
+            found.append(query.value(0))
+    query.finish()
+    return np.concatenate((np.array(found, dtype=np.int64),
+                           archived_timestamps(manager.db, table, first, last)))
+
+
+def import_file(manager: DataManager,
+                table: str,
+                path: str,
+                quarantine_path: Optional[str] = None,
+                chunk_size: int = tkc.IMPORT_CHUNK_SIZE,
+                upsert: bool = False) -> Dict[str, float]:
+    """
+    Bulk-loads a CSV or JSON Lines file into a tracker table.
+
+    Each chunk is validated in one vectorized pass (every slider a whole number
+    inside its range, a parseable date/time), rows whose (date, time) already
+    exist in the table or earlier in the file are skipped, and the rest are
+    committed with ``DataManager.insert_many`` in one transaction per chunk.
+    The date and time are stored as formatted from the parsed ts, so "20240105"
+    or "09:30" land as "2024-01-05" and "09:30:00" like a GUI entry, and derived
+    sliders such as summing_box are recomputed with their ``Field.formula``;
+    the file's own value of a derived column is ignored and may be missing.
+    ANALYZE runs once after the last chunk. The connection runs the "bulk-load"
+    performance profile for the duration.
+
+    Args:
+        manager (DataManager): The data manager to load through.
+        table (str): The tracker table; the file needs its ``TABLE_COLUMNS`` as keys.
+        path (str): The CSV or JSONL file, optionally gzip-compressed.
+        quarantine_path (Optional[str]): Write rejected records here as JSON Lines with
+            a "reason"; rejected records are only counted when omitted.
+        chunk_size (int): The number of records per chunk.
+        upsert (bool): Overwrite entries already stored at the same date and time
+            instead of skipping them as duplicates.
+
+    Returns:
+        Dict[str, float]: 'read', 'inserted', 'duplicates', 'rejected', 'failed',
+        'seconds' and 'rows_per_second'.
+
+    Raises:
+        ValueError: If the table is unknown.
+    """
+    columns = TABLE_COLUMNS.get(table)
+    if columns is None:
+        raise ValueError(f"Unknown table: {table}")
+    date_column, time_column = columns[:2]
+    sliders = TABLE_SLIDER_COLUMNS[table]
+    derived = derived_positions(table)
+    derived_columns = {position for position, _, _ in derived}
+    entered = [position for position in range(len(sliders)) if position not in derived_columns]
+    bounds = slider_bounds(table)
+    summary = dict.fromkeys(('read', 'inserted', 'duplicates', 'rejected', 'failed'), 0)
+    quarantine = open(quarantine_path, 'w', encoding='utf-8') if quarantine_path else None
+    started = time.perf_counter()
+
+    manager.apply_performance_profile('bulk-load')
+    try:
+        for records in chunked(read_records(path), chunk_size):
+            summary['read'] += len(records)
+            values = np.full((len(records), len(sliders)), np.nan)
+            stamps = np.zeros(len(records), dtype=np.int64)
+            reasons: List[Optional[str]] = [None] * len(records)
+            for row, record in enumerate(records):
+                try:
+                    values[row, entered] = [float(record[sliders[position]]) for position in entered]
+                    for position, inputs, formula in derived:
+                        values[row, position] = formula(*values[row, inputs])
+                except (KeyError, TypeError, ValueError):
+                    reasons[row] = "missing or non-numeric slider"
+                stamp = to_epoch(record.get(date_column), record.get(time_column))
+                if stamp is None:
+                    reasons[row] = reasons[row] or "unparseable date/time"
+                else:
+                    stamps[row] = stamp
+
+            # one vectorized pass over every slider of the chunk
+            in_range = ((values >= bounds[:, 0]) & (values <= bounds[:, 1])
+                        & (values == np.floor(values))).all(axis=1)
+            for row in np.flatnonzero(~in_range):
+                reasons[row] = reasons[row] or "slider out of range"
+            valid = np.array([reason is None for reason in reasons])
+
+            fresh = valid.copy()
+            if valid.any() and not upsert:
+                stored = existing_timestamps(manager, table, int(stamps[valid].min()),
+                                             int(stamps[valid].max()))
+                fresh &= ~np.isin(stamps, stored)
+            if fresh.any():
+                candidates = np.flatnonzero(fresh)
+                _, first_seen = np.unique(stamps[candidates], return_index=True)
+                fresh[:] = False
+                fresh[candidates[first_seen]] = True
+            summary['duplicates'] += int(valid.sum() - fresh.sum())
+            summary['rejected'] += len(records) - int(valid.sum())
+
+            if quarantine is not None:
+                for row in np.flatnonzero(~valid):
+                    quarantine.write(json.dumps({**records[row], 'reason': reasons[row]}) + '\n')
+
+            kept = np.flatnonzero(fresh)
+            dates, times = stamp_texts(stamps[kept])
+            rows = [(str(date), str(time_of_day)) + tuple(int(value) for value in values[row])
+                    for row, date, time_of_day in zip(kept, dates, times)]
+            failed = manager.insert_many(table, rows, upsert=upsert, analyze=False)
+            summary['failed'] += len(failed)
+            summary['inserted'] += len(rows) - len(failed)
+        # once for the whole load, analyzing per chunk would re-read the growing table each time
+        if summary['inserted'] >= tkc.ANALYZE_AFTER_ROWS:
+            manager.analyze()
+    finally:
+        manager.apply_performance_profile(tkc.DB_PERFORMANCE_PROFILE)
+        if quarantine is not None:
+            quarantine.close()
+
+    summary['seconds'] = time.perf_counter() - started
+    summary['rows_per_second'] = summary['inserted'] / summary['seconds'] if summary['seconds'] else 0.0
+    logger.info(f"Imported {path} into {table}: {summary}")
+    return summary
@@ -0,0 +1,409 @@
+import os
+import time
+from typing import Callable, List, Optional
+
+from PyQt6.QtCore import QEvent, QObject, QTimer, pyqtSignal
+from PyQt6.QtSql import QSqlDatabase, QSqlQuery
+from PyQt6.QtWidgets import QApplication
+
+import tracker_config as tkc
+from database.archive_catalog import archive_cutoff, closed_months
+from database.write_behind import WriteBehindWorker, WriterJob
+from database.retention import compact_chunk, drop_hourly, retention_cutoff
+from database.schema import TABLE_SLIDER_COLUMNS
+from database.tombstones import purge_tombstones
+from logger_setup import logger
+
+# Events that count as the user being active
+USER_INPUT_EVENTS = frozenset((
+    QEvent.Type.KeyPress,
+    QEvent.Type.MouseButtonPress,
+    QEvent.Type.MouseMove,
+    QEvent.Type.Wheel,
+))
+
+
+def pragma_value(db: QSqlDatabase, pragma: str) -> int:
+    """
+    Returns the integer result of a read-only PRAGMA.
+
+    Args:
+        db (QSqlDatabase): The open database connection.
+        pragma (str): The pragma to read, e.g. ``freelist_count``.
+
+    Returns:
+        int: The value, 0 if the pragma fails.
+    """
+    query = QSqlQuery(db)
+    value = int(query.value(0)) if query.exec(f"PRAGMA {pragma}") and query.next() else 0
+    query.finish()
+    return value
+
+
+def database_bytes(path: str) -> int:
+    """
+    Returns the on-disk size of a database file together with its WAL.
+
+    Args:
+        path (str): The path to the SQLite database file.
+
+    Returns:
+        int: The combined size in bytes.
+    """
+    return sum(os.path.getsize(name) for name in (path, f"{path}-wal") if os.path.exists(name))
+
+
+def run_pragma(db: QSqlDatabase, pragma: str) -> bool:
+    """
+    Runs a maintenance PRAGMA and steps through any rows it returns.
+
+    Args:
+        db (QSqlDatabase): The open database connection.
+        pragma (str): The pragma statement without the PRAGMA keyword.
+
+    Returns:
+        bool: True if the pragma ran.
+    """
+    query = QSqlQuery(db)
+    if not query.exec(f"PRAGMA {pragma}"):
+        logger.error(f"Error running PRAGMA {pragma}: {query.lastError().text()}")
+        return False
+    while query.next():
+        pass
+    query.finish()
+    return True
+
+
+def convert_to_incremental_vacuum(db: QSqlDatabase) -> bool:
+    """
+    Runs the one full VACUUM that puts auto_vacuum=INCREMENTAL into effect.
+
+    Migration 5 only asks for the mode, and the request lasts for one
+    connection, so it is repeated right before the rewrite. Once the mode
+    is in force PRAGMA auto_vacuum reads 2 and nothing is done.
+
+    Args:
+        db (QSqlDatabase): The writer connection.
+
+    Returns:
+        bool: True if the database is in incremental mode afterwards.
+    """
+    if pragma_value(db, "auto_vacuum") == 2:
+        return True
+    started = time.monotonic()
+    if not run_pragma(db, "auto_vacuum = INCREMENTAL"):
+        return False
+    query = QSqlQuery(db)
+    if not query.exec("VACUUM"):
+        logger.error(f"Error running VACUUM: {query.lastError().text()}")
+        return False
+    query.finish()
+    logger.info(f"Switched to incremental auto_vacuum in "
+                f"{(time.monotonic() - started) * 1000:.1f} ms")
+    return pragma_value(db, "auto_vacuum") == 2
+
+
+class MaintenanceScheduler(QObject):
+    """
+    Runs database upkeep on the writer connection once the user has been idle for a while.
+
+    After ``idle_seconds`` without keyboard or mouse input, and at most once per
+    ``interval_seconds``, a run walks through a passive WAL checkpoint, PRAGMA
+    optimize, the purge of expired tombstones in batches of ``PURGE_BATCH_SIZE``
+    rows, the archiving of closed months one month per slice when
+    ``ARCHIVE_AFTER_MONTHS`` is set, the retention policy when
+    ``RETENTION_RAW_DAYS`` or ``RETENTION_HOURLY_DAYS`` is set, the one-off
+    VACUUM that switches an older file to incremental auto_vacuum, posted to
+    the writer thread without waiting for it, and incremental_vacuum in slices
+    of ``vacuum_pages`` pages. Every
+    slice is a separate event-loop callback whose database work is a ``call`` on
+    the writer thread, and the run stops at the next slice boundary as soon as
+    input arrives, so a commit never waits behind it.
+
+    Attributes:
+        finished (pyqtSignal): Emitted with (milliseconds taken, bytes reclaimed) after a run.
+        rows_removed (pyqtSignal): Emitted with a table whose live rows were archived or
+            compacted; they are not external changes, so data_version polling misses them.
+        writer (WriteBehindWorker): The writer thread owning the maintained connection.
+        conversion (Optional[WriterJob]): The posted VACUUM to incremental auto_vacuum, if any.
+        last_input (float): The monotonic time of the last user input.
+        last_run (Optional[float]): The monotonic time the last run finished.
+    """
+
+    finished = pyqtSignal(float, int)
+    rows_removed = pyqtSignal(str)
+
+    def __init__(self,
+                 writer: WriteBehindWorker,
+                 idle_seconds: int = tkc.MAINTENANCE_IDLE_SECONDS,
+                 interval_seconds: int = tkc.MAINTENANCE_INTERVAL_SECONDS,
+                 vacuum_pages: int = tkc.MAINTENANCE_VACUUM_PAGES,
+                 parent: QObject = None) -> None:
+        super().__init__(parent)
+        self.writer: WriteBehindWorker = writer
+        self.idle_seconds: int = idle_seconds
+        self.interval_seconds: int = interval_seconds
+        self.vacuum_pages: int = vacuum_pages
+        self.last_input: float = time.monotonic()
+        self.last_run: Optional[float] = None
+        self.steps: List[Callable[[], bool]] = []
+        self.run_started: float = 0.0
+        self.bytes_before: int = 0
+        self.conversion: Optional[WriterJob] = None
+
+        self.idle_timer = QTimer(self)
+        self.idle_timer.setSingleShot(True)
+        self.idle_timer.timeout.connect(self.on_idle_timeout)
+
+    def start(self) -> None:
+        """
+        Starts watching for user input and arms the idle timer.
+
+        Returns:
+            None
+        """
+        QApplication.instance().installEventFilter(self)
+        self.idle_timer.start(self.idle_seconds * 1000)
+
+    def stop(self) -> None:
+        """
+        Stops the scheduler and abandons a run in progress.
+
+        Returns:
+            None
+        """
+        app = QApplication.instance()
+        if app is not None:
+            app.removeEventFilter(self)
+        self.idle_timer.stop()
+        self.steps = []
+
+    def eventFilter(self, watched: QObject, event: QEvent) -> bool:
+        """
+        Notes the time of every user input; it sees every event, so it only stores a float.
+
+        Args:
+            watched (QObject): The object receiving the event.
+            event (QEvent): The event.
+
+        Returns:
+            bool: Always False, events are never consumed.
+        """
+        if event.type() in USER_INPUT_EVENTS:
+            self.last_input = time.monotonic()
+        return False
+
+    def on_idle_timeout(self) -> None:
+        """
+        Starts a run if the user has been idle long enough, otherwise re-arms the timer.
+
+        Returns:
+            None
+        """
+        now = time.monotonic()
+        if self.converting():
+            # every step would queue behind the VACUUM, try again once it is done
+            self.idle_timer.start(self.idle_seconds * 1000)
+            return
+        wait = max(self.last_input + self.idle_seconds - now,
+                   0.0 if self.last_run is None else self.last_run + self.interval_seconds - now)
+        if wait > 0:
+            self.idle_timer.start(int(wait * 1000) + 1)
+            return
+        self.run_started = now
+        self.bytes_before = database_bytes(self.writer.db_name)
+        self.steps = [lambda: self.writer.call(lambda db: run_pragma(db, "wal_checkpoint(PASSIVE)")),
+                      lambda: self.writer.call(lambda db: run_pragma(db, "optimize"))]
+        self.steps.extend(self.purge_step(table) for table in TABLE_SLIDER_COLUMNS)
+        if tkc.ARCHIVE_AFTER_MONTHS is not None:
+            self.steps.extend(self.archive_step(table) for table in TABLE_SLIDER_COLUMNS)
+        if tkc.RETENTION_RAW_DAYS is not None:
+            self.steps.extend(self.compact_step(table) for table in TABLE_SLIDER_COLUMNS)
+        if tkc.RETENTION_HOURLY_DAYS is not None:
+            self.steps.extend(self.drop_hourly_step(table) for table in TABLE_SLIDER_COLUMNS)
+        self.steps.extend([self.convert_to_incremental_vacuum, self.vacuum_slice])
+        QTimer.singleShot(0, self.run_slice)
+
+    def purge_step(self, table: str) -> Callable[[], bool]:
+        """
+        Returns a step that purges one batch of a table's expired tombstones.
+
+        A full batch queues another one right behind it, so the purge of a
+        large cleanup is spread over as many slices as it needs.
+
+        Args:
+            table (str): The tracker table.
+
+        Returns:
+            Callable[[], bool]: The step.
+        """
+        def purge() -> bool:
+            purged = self.writer.call(lambda db: purge_tombstones(db, table))
+            if purged is None:
+                return False
+            if purged > 0:
+                logger.info(f"Purged {purged} tombstoned rows from {table}")
+            if purged >= tkc.PURGE_BATCH_SIZE:
+                self.steps.insert(0, purge)
+            return purged >= 0
+        return purge
+
+    def archive_step(self, table: str) -> Callable[[], bool]:
+        """
+        Returns a step that moves the oldest closed month of a table to the archive.
+
+        The step queues itself again while closed months remain.
+
+        Args:
+            table (str): The tracker table.
+
+        Returns:
+            Callable[[], bool]: The step.
+        """
+        def archive() -> bool:
+            # the partition writer needs numpy, which the app does not require unless archiving is on
+            from database.archive import archive_month
+            months = self.writer.call(
+                lambda db: closed_months(db, table, archive_cutoff(tkc.ARCHIVE_AFTER_MONTHS)))
+            if not months:
+                return True
+            if self.writer.call(lambda db: archive_month(db, table, months[0])) is not None:
+                self.rows_removed.emit(table)
+            if len(months) > 1:
+                self.steps.insert(0, archive)
+            return True
+        return archive
+
+    def compact_step(self, table: str) -> Callable[[], bool]:
+        """
+        Returns a step that compacts the oldest chunk of a table's expired raw entries.
+
+        The step queues itself again while entries older than ``RETENTION_RAW_DAYS``
+        remain; the vacuum slices after it hand the freed pages back.
+
+        Args:
+            table (str): The tracker table.
+
+        Returns:
+            Callable[[], bool]: The step.
+        """
+        def compact() -> bool:
+            compacted = self.writer.call(
+                lambda db: compact_chunk(db, table, retention_cutoff(tkc.RETENTION_RAW_DAYS)))
+            if compacted:
+                self.rows_removed.emit(table)
+                self.steps.insert(0, compact)
+            return True
+        return compact
+
+    def drop_hourly_step(self, table: str) -> Callable[[], bool]:
+        """
+        Returns a step that drops one batch of a table's hourly rollups past ``RETENTION_HOURLY_DAYS``.
+
+        Args:
+            table (str): The tracker table.
+
+        Returns:
+            Callable[[], bool]: The step.
+        """
+        def drop() -> bool:
+            dropped = self.writer.call(
+                lambda db: drop_hourly(db, table, retention_cutoff(tkc.RETENTION_HOURLY_DAYS)))
+            if dropped is None:
+                return False
+            if dropped > 0:
+                logger.info(f"Dropped {dropped} hourly rollups of {table}")
+            if dropped >= tkc.PURGE_BATCH_SIZE:
+                self.steps.insert(0, drop)
+            return dropped >= 0
+        return drop
+
+    def converting(self) -> bool:
+        """
+        Tells whether the posted VACUUM to incremental auto_vacuum is still running.
+
+        Returns:
+            bool: True while the writer thread is busy with it.
+        """
+        return self.conversion is not None and not self.conversion.done.is_set()
+
+    def convert_to_incremental_vacuum(self) -> bool:
+        """
+        Posts the one full VACUUM that puts auto_vacuum=INCREMENTAL into effect.
+
+        The VACUUM rewrites the whole file: it takes about as long as copying
+        it, needs as much free disk space again, and holds the write lock
+        throughout, so new entries wait in the write-behind queue and a delete
+        or edit waits for it to finish. The GUI does not wait: the job is posted
+        to the writer thread, the rest of the run is dropped, and the next run
+        starts once it is done. Files over ``VACUUM_CONVERT_MAX_BYTES`` keep
+        their mode, as a VACUUM that long is not worth the wait.
+
+        Returns:
+            bool: Always True; the posted job reports its own errors.
+        """
+        if self.writer.call(lambda db: pragma_value(db, "auto_vacuum")) == 2:
+            return True
+        size = database_bytes(self.writer.db_name)
+        if size > tkc.VACUUM_CONVERT_MAX_BYTES:
+            logger.info(f"Not switching to incremental auto_vacuum, "
+                        f"{size} bytes is over VACUUM_CONVERT_MAX_BYTES")
+            return True
+        self.conversion = self.writer.post(convert_to_incremental_vacuum)
+        if self.converting():
+            self.steps = []
+        return True
+
+    def vacuum_slice(self) -> bool:
+        """
+        Frees up to ``vacuum_pages`` pages and queues another slice while free pages remain.
+
+        Returns:
+            bool: True if the slice ran.
+        """
+        def vacuum(db: QSqlDatabase) -> Optional[int]:
+            if not run_pragma(db, f"incremental_vacuum({self.vacuum_pages})"):
+                return None
+            return pragma_value(db, "freelist_count")
+
+        free_pages = self.writer.call(vacuum)
+        if free_pages is None:
+            return False
+        if free_pages > 0:
+            self.steps.insert(0, self.vacuum_slice)
+        return True
+
+    def run_slice(self) -> None:
+        """
+        Runs the next maintenance step, then yields to the event loop.
+
+        Returns:
+            None
+        """
+        if not self.steps:
+            return
+        if self.last_input > self.run_started:
+            logger.info("Database maintenance interrupted by user input")
+            self.steps = []
+            self.idle_timer.start(self.idle_seconds * 1000)
+            return
+
+        step = self.steps.pop(0)
+        try:
+            step()
+        except Exception as e:
+            logger.error(f"Error during database maintenance: {e}", exc_info=True)
+            self.steps = []
+
+        if self.steps:
+            QTimer.singleShot(0, self.run_slice)
+            return
+        if not self.converting():
+            # one last checkpoint moves the vacuumed pages out of the WAL
+            self.writer.call(lambda db: run_pragma(db, "wal_checkpoint(PASSIVE)"))
+        self.last_run = time.monotonic()
+        elapsed_ms = (self.last_run - self.run_started) * 1000
+        reclaimed = self.bytes_before - database_bytes(self.writer.db_name)
+        logger.info(f"Database maintenance took {elapsed_ms:.1f} ms, reclaimed {reclaimed} bytes")
+        self.finished.emit(elapsed_ms, reclaimed)
+        self.idle_timer.start(self.interval_seconds * 1000)
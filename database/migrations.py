@@ -0,0 +1,411 @@
+from typing import Callable, List, NamedTuple, Optional
+
+from PyQt6.QtSql import QSqlDatabase, QSqlQuery
+
+import tracker_config as tkc
+from database.archive_catalog import archive_ddl
+from database.retention import retention_ddl
+from database.rollups import (archive_rollup_table, drop_triggers_sql, hourly_table, rebuild_sql,
+                              rollup_ddl, rollup_table)
+from database.schema import TABLE_DATETIME_COLUMNS, TABLE_SLIDER_COLUMNS
+from database.tombstones import tombstone_ddl
+from logger_setup import logger
+
+ProgressCallback = Optional[Callable[[str, int, int], None]]
+
+
+class Migration(NamedTuple):
+    """
+    One schema step, applied when PRAGMA user_version is below ``version``.
+
+    Attributes:
+        version (int): The user_version the database is at once the step has run.
+        description (str): A short description used in logs and progress reports.
+        apply (Callable[[QSqlDatabase, ProgressCallback], None]): Runs the step, raising on failure.
+        chunked (bool): The step commits its own chunks instead of running in one transaction.
+    """
+    version: int
+    description: str
+    apply: Callable[[QSqlDatabase, ProgressCallback], None]
+    chunked: bool = False
+
+
+def execute(db: QSqlDatabase, sql: str) -> None:
+    """
+    Executes one statement and raises if it fails.
+
+    Args:
+        db (QSqlDatabase): The open database connection.
+        sql (str): The statement to execute.
+
+    Returns:
+        None
+
+    Raises:
+        RuntimeError: If the statement fails.
+    """
+    query = QSqlQuery(db)
+    if not query.exec(sql):
+        raise RuntimeError(f"{query.lastError().text()} in: {sql.strip()}")
+    query.finish()
+
+
+def table_columns(db: QSqlDatabase, table: str) -> List[str]:
+    """
+    Returns the column names of a table.
+
+    Args:
+        db (QSqlDatabase): The open database connection.
+        table (str): The table to inspect.
+
+    Returns:
+        List[str]: The column names, in table order.
+    """
+    query = QSqlQuery(db)
+    columns = []
+    if query.exec(f"PRAGMA table_info({table})"):
+        while query.next():
+            columns.append(query.value(1))
+    query.finish()
+    return columns
+
+
+def rewrite_in_chunks(db: QSqlDatabase,
+                      table: str,
+                      sql: str,
+                      description: str,
+                      progress: ProgressCallback = None,
+                      chunk_size: int = tkc.MIGRATION_CHUNK_SIZE) -> None:
+    """
+    Runs a data rewrite over a table in id ranges, one transaction per range.
+
+    ``sql`` must bind the first and last id of the range as its two placeholders,
+    e.g. ``UPDATE t SET x = ... WHERE id BETWEEN ? AND ?``. Progress is reported
+    after every committed range so a long upgrade never holds one huge transaction
+    and the caller can keep the UI alive. Only chunked migrations may call this,
+    since it opens and commits its own transactions.
+
+    Args:
+        db (QSqlDatabase): The open database connection.
+        table (str): The table whose id range is walked.
+        sql (str): The rewrite statement with two id placeholders.
+        description (str): The label passed to ``progress``.
+        progress (ProgressCallback): Called with (description, done ids, total ids).
+        chunk_size (int): The number of ids covered by each transaction.
+
+    Returns:
+        None
+
+    Raises:
+        RuntimeError: If a chunk fails; earlier chunks stay committed.
+    """
+    query = QSqlQuery(db)
+    if not query.exec(f"SELECT MIN(id), MAX(id) FROM {table}"):
+        raise RuntimeError(query.lastError().text())
+    query.next()
+    empty = query.isNull(0)
+    first_id, last_id = query.value(0), query.value(1)
+    # an unfinished SELECT would pin this connection to a stale WAL snapshot
+    query.finish()
+    if empty:
+        return
+
+    if not query.prepare(sql):
+        raise RuntimeError(query.lastError().text())
+    total = last_id - first_id + 1
+    for start in range(first_id, last_id + 1, chunk_size):
+        db.transaction()
+        query.bindValue(0, start)
+        query.bindValue(1, start + chunk_size - 1)
+        if not query.exec():
+            db.rollback()
+            raise RuntimeError(query.lastError().text())
+        db.commit()
+        if progress is not None:
+            progress(description, min(start + chunk_size, last_id + 1) - first_id, total)
+
+
+def add_timestamp_columns(db: QSqlDatabase, progress: ProgressCallback) -> None:
+    """
+    Adds the INTEGER ts column to older tables and backfills it from the date/time pair.
+
+    A trigger keeps ts in step when the date or time of a row is edited from the
+    data page.
+
+    Args:
+        db (QSqlDatabase): The open database connection.
+        progress (ProgressCallback): Receives backfill progress.
+
+    Returns:
+        None
+    """
+    for table, (date_column, time_column) in TABLE_DATETIME_COLUMNS.items():
+        if 'ts' not in table_columns(db, table):
+            execute(db, f"ALTER TABLE {table} ADD COLUMN ts INTEGER")
+
+        ts_expression = f"CAST(strftime('%s', {date_column} || ' ' || {time_column}) AS INTEGER)"
+        execute(db, f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_ts_update
+                AFTER UPDATE OF {date_column}, {time_column} ON {table}
+                BEGIN
+                    UPDATE {table} SET ts = {ts_expression} WHERE id = NEW.id;
+                END""")
+        rewrite_in_chunks(db, table,
+                          f"""UPDATE {table} SET ts = {ts_expression}
+                              WHERE id BETWEEN ? AND ? AND ts IS NULL""",
+                          f"Backfilling {table} timestamps", progress)
+
+
+def add_covering_indexes(db: QSqlDatabase, progress: ProgressCallback) -> None:
+    """
+    Creates a covering index on each table's ts key and slider columns.
+
+    Time-range filters, latest-N lookups and per-day rollups over ts can then be
+    answered from the index alone instead of scanning the table.
+
+    Args:
+        db (QSqlDatabase): The open database connection.
+        progress (ProgressCallback): Unused, the step is a single transaction.
+
+    Returns:
+        None
+    """
+    for table, sliders in TABLE_SLIDER_COLUMNS.items():
+        execute(db, f"""
+                CREATE INDEX IF NOT EXISTS idx_{table}_ts
+                ON {table}(ts, {', '.join(sliders)})""")
+
+
+def add_daily_rollups(db: QSqlDatabase, progress: ProgressCallback) -> None:
+    """
+    Creates the trigger-maintained ``*_daily`` rollup tables and fills them from history.
+
+    Args:
+        db (QSqlDatabase): The open database connection.
+        progress (ProgressCallback): Receives one report per table.
+
+    Returns:
+        None
+    """
+    for done, table in enumerate(TABLE_SLIDER_COLUMNS, start=1):
+        for sql in rollup_ddl(table) + rebuild_sql(table):
+            execute(db, sql)
+        if progress is not None:
+            progress("Building daily rollups", done, len(TABLE_SLIDER_COLUMNS))
+
+
+def add_unique_timestamps(db: QSqlDatabase, progress: ProgressCallback) -> None:
+    """
+    Resolves duplicate entries and adds a unique index on each table's ts key.
+
+    Of several rows sharing one ts only the most recently inserted is kept, the
+    same row an upsert would have left behind. The rows dropped are copied to a
+    ``<table>_duplicates`` table first and counted in the log, so an entry whose
+    sliders differed from the kept one can still be recovered. Rows without a
+    ts are untouched, since UNIQUE allows any number of NULLs. The rollup
+    triggers recompute every day that loses a row.
+
+    Args:
+        db (QSqlDatabase): The open database connection.
+        progress (ProgressCallback): Receives one report per table.
+
+    Returns:
+        None
+    """
+    for done, table in enumerate(TABLE_SLIDER_COLUMNS, start=1):
+        duplicates = f"""ts IS NOT NULL AND id NOT IN (
+                         SELECT MAX(id) FROM {table} WHERE ts IS NOT NULL GROUP BY ts)"""
+        execute(db, f"CREATE TABLE IF NOT EXISTS {table}_duplicates AS SELECT * FROM {table} WHERE 0")
+        copied = ', '.join(table_columns(db, f"{table}_duplicates"))
+        query = QSqlQuery(db)
+        if not query.exec(f"INSERT INTO {table}_duplicates ({copied}) "
+                          f"SELECT {copied} FROM {table} WHERE {duplicates}"):
+            raise RuntimeError(f"{query.lastError().text()} copying duplicates of {table}")
+        moved = query.numRowsAffected()
+        query.finish()
+        if moved > 0:
+            logger.info(f"Moved {moved} duplicate entries of {table} to {table}_duplicates")
+        execute(db, f"DELETE FROM {table} WHERE {duplicates}")
+        execute(db, f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{table}_ts_unique ON {table}(ts)")
+        if progress is not None:
+            progress("Removing duplicate entries", done, len(TABLE_SLIDER_COLUMNS))
+
+
+def enable_incremental_vacuum(db: QSqlDatabase, progress: ProgressCallback) -> None:
+    """
+    Asks for auto_vacuum=INCREMENTAL so free pages can be returned in slices.
+
+    On a file that already has tables the mode only takes effect after a full
+    VACUUM. That rewrite can take a long time on a large file and reports no
+    progress, so it is not run here: ``MaintenanceScheduler`` has the writer
+    thread run it once, the first time the user is idle and only for files up to
+    ``VACUUM_CONVERT_MAX_BYTES``, and hands space back incrementally afterwards.
+
+    Args:
+        db (QSqlDatabase): The open database connection.
+        progress (ProgressCallback): Unused, the step is a single pragma.
+
+    Returns:
+        None
+    """
+    execute(db, "PRAGMA auto_vacuum = INCREMENTAL")
+
+
+def add_tombstones(db: QSqlDatabase, progress: ProgressCallback) -> None:
+    """
+    Adds the ``deleted_at`` tombstone column, its partial indexes and the ``*_live`` views.
+
+    The rollup triggers are recreated to leave tombstoned rows out, and the
+    covering ts index is replaced by one over live rows only.
+
+    Args:
+        db (QSqlDatabase): The open database connection.
+        progress (ProgressCallback): Receives one report per table.
+
+    Returns:
+        None
+    """
+    for done, table in enumerate(TABLE_SLIDER_COLUMNS, start=1):
+        for sql in tombstone_ddl(table) + drop_triggers_sql(table) + rollup_ddl(table, live_only=True):
+            execute(db, sql)
+        if progress is not None:
+            progress("Adding soft deletes", done, len(TABLE_SLIDER_COLUMNS))
+
+
+def add_archive_catalog(db: QSqlDatabase, progress: ProgressCallback) -> None:
+    """
+    Creates the catalog of archived months and the rollup tables of archived days.
+
+    Args:
+        db (QSqlDatabase): The open database connection.
+        progress (ProgressCallback): Unused, the step is a single transaction.
+
+    Returns:
+        None
+    """
+    for sql in archive_ddl():
+        execute(db, sql)
+
+
+def add_hourly_rollups(db: QSqlDatabase, progress: ProgressCallback) -> None:
+    """
+    Creates the ``*_hourly`` rollup tables the retention policy compacts old entries into.
+
+    Args:
+        db (QSqlDatabase): The open database connection.
+        progress (ProgressCallback): Unused, the step is a single transaction.
+
+    Returns:
+        None
+    """
+    for sql in retention_ddl():
+        execute(db, sql)
+
+
+def add_slider_counts(db: QSqlDatabase, progress: ProgressCallback) -> None:
+    """
+    Adds a ``<slider>_count`` column to every rollup table, the divisor of the slider's average.
+
+    Dividing a slider's sum by ``entry_count`` counted the entries that left it
+    NULL as zeros. The daily rollups are rebuilt from the live rows with exact
+    counts and the triggers recreated to keep them. The archived and hourly
+    rollups have no rows left to count, so their buckets get ``entry_count``
+    where the slider has a sum and 0 where it has none, which keeps the averages
+    they gave before. Tables that already have the columns, as on a database
+    created after this step was written, are left alone.
+
+    Args:
+        db (QSqlDatabase): The open database connection.
+        progress (ProgressCallback): Receives one report per table.
+
+    Returns:
+        None
+    """
+    for done, (table, sliders) in enumerate(TABLE_SLIDER_COLUMNS.items(), start=1):
+        for target in (rollup_table(table), archive_rollup_table(table), hourly_table(table)):
+            columns = table_columns(db, target)
+            for slider in sliders:
+                if f"{slider}_count" in columns:
+                    continue
+                execute(db, f"ALTER TABLE {target} ADD COLUMN {slider}_count INTEGER NOT NULL DEFAULT 0")
+                execute(db, f"UPDATE {target} SET {slider}_count = entry_count "
+                            f"WHERE {slider}_sum IS NOT NULL")
+        for sql in drop_triggers_sql(table) + rollup_ddl(table, live_only=True) \
+                + rebuild_sql(table, live_only=True):
+            execute(db, sql)
+        if progress is not None:
+            progress("Counting slider values", done, len(TABLE_SLIDER_COLUMNS))
+
+
+# Ordered by version; append new steps, never renumber or edit shipped ones.
+MIGRATIONS: List[Migration] = [
+    Migration(1, "INTEGER ts column backfilled from the date/time pairs",
+              add_timestamp_columns, chunked=True),
+    Migration(2, "covering ts indexes", add_covering_indexes),
+    Migration(3, "trigger-maintained daily rollup tables", add_daily_rollups),
+    Migration(4, "unique ts index with duplicates resolved", add_unique_timestamps),
+    Migration(5, "incremental auto_vacuum", enable_incremental_vacuum),
+    Migration(6, "deleted_at tombstones with live views", add_tombstones),
+    Migration(7, "columnar archive catalog", add_archive_catalog),
+    Migration(8, "hourly rollup tables for the retention policy", add_hourly_rollups),
+    Migration(9, "per-slider value counts in the rollup tables", add_slider_counts),
+]
+
+
+def schema_version(db: QSqlDatabase) -> int:
+    """
+    Returns the schema version stored in PRAGMA user_version.
+
+    Args:
+        db (QSqlDatabase): The open database connection.
+
+    Returns:
+        int: The current schema version, 0 for a database never migrated.
+    """
+    query = QSqlQuery(db)
+    version = 0
+    if query.exec("PRAGMA user_version") and query.next():
+        version = int(query.value(0))
+    query.finish()
+    return version
+
+
+def run_migrations(db: QSqlDatabase, progress: ProgressCallback = None) -> int:
+    """
+    Applies every migration newer than the database's PRAGMA user_version, in order.
+
+    Each step runs in its own transaction together with the user_version bump,
+    except chunked steps, which commit their own chunks and must be safe to
+    resume. The first failing step is rolled back and stops the run, so the
+    next start retries it.
+
+    Args:
+        db (QSqlDatabase): The open database connection.
+        progress (ProgressCallback): Called with (step description, done, total).
+
+    Returns:
+        int: The schema version the database ends up at.
+    """
+    version = schema_version(db)
+    for migration in MIGRATIONS:
+        if migration.version <= version:
+            continue
+        logger.info(f"Migrating schema to v{migration.version}: {migration.description}")
+        try:
+            if migration.chunked:
+                migration.apply(db, progress)
+                db.transaction()
+            else:
+                db.transaction()
+                migration.apply(db, progress)
+            execute(db, f"PRAGMA user_version = {migration.version}")
+            if not db.commit():
+                raise RuntimeError(db.lastError().text())
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error migrating schema to v{migration.version}: {e}", exc_info=True)
+            break
+        version = migration.version
+        if progress is not None:
+            progress(migration.description, 1, 1)
+    return version
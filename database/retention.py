@@ -0,0 +1,140 @@
+from datetime import datetime
+from typing import List, Optional
+
+from PyQt6.QtSql import QSqlDatabase, QSqlQuery
+
+import tracker_config as tkc
+from database.rollups import (archive_rollup_table, fold_into_sql, hourly_select_sql, hourly_table,
+                              rollup_columns_sql, rollup_table)
+from database.schema import TABLE_SLIDER_COLUMNS
+from logger_setup import logger
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def retention_ddl() -> List[str]:
+    """
+    Returns the statements that create the ``*_hourly`` rollup tables.
+
+    Returns:
+        List[str]: The CREATE statements, safe to run more than once.
+    """
+    return [f"""CREATE TABLE IF NOT EXISTS {hourly_table(table)} (
+                {rollup_columns_sql(table, 'hour')}
+                )""" for table in TABLE_SLIDER_COLUMNS]
+
+
+def retention_cutoff(days: int, now: Optional[float] = None) -> int:
+    """
+    Returns the start of the oldest day a retention tier keeps.
+
+    Args:
+        days (int): The age in days the tier keeps.
+        now (Optional[float]): The current epoch time, default the clock.
+
+    Returns:
+        int: Data before this second is past the tier; always a day boundary.
+    """
+    if now is None:
+        now = (datetime.now() - _EPOCH).total_seconds()
+    return (int(now) // 86400 - days) * 86400
+
+
+def compact_chunk(db: QSqlDatabase,
+                  table: str,
+                  cutoff: int,
+                  chunk_days: int = tkc.RETENTION_CHUNK_DAYS) -> int:
+    """
+    Compacts the oldest raw entries of a tracker before ``cutoff`` into hourly rollups.
+
+    Up to ``chunk_days`` whole days are handled in one transaction: their live
+    rows are grouped into the ``*_hourly`` table, their daily rollups are folded
+    into the ``*_daily_archive`` table, and every row of those days is deleted,
+    tombstones included. Both folds add to buckets already there, so rows
+    back-dated into a compacted day are simply compacted again later, and the
+    rollup based aggregates keep covering the compacted days.
+
+    Args:
+        db (QSqlDatabase): The open database connection.
+        table (str): The tracker table.
+        cutoff (int): The start of the oldest day whose entries stay raw.
+        chunk_days (int): The most days compacted.
+
+    Returns:
+        int: The number of rows compacted, 0 once nothing before ``cutoff`` is left.
+
+    Raises:
+        RuntimeError: If a statement or the transaction fails.
+    """
+    query = QSqlQuery(db)
+    query.prepare(f"SELECT MIN(ts) FROM {table} WHERE ts < ?")
+    query.bindValue(0, cutoff)
+    if not query.exec():
+        raise RuntimeError(query.lastError().text())
+    query.next()
+    empty = query.isNull(0)
+    first = None if empty else (int(query.value(0)) // 86400) * 86400
+    query.finish()
+    if empty:
+        return 0
+    end = min(cutoff, first + chunk_days * 86400)
+
+    if not db.transaction():
+        raise RuntimeError(db.lastError().text())
+    try:
+        statements = [
+            fold_into_sql(table, hourly_table(table),
+                          hourly_select_sql(table, "ts >= ? AND ts < ?"), 'hour'),
+            fold_into_sql(table, archive_rollup_table(table),
+                          f"SELECT * FROM {rollup_table(table)} WHERE day >= ? AND day < ?"),
+            # the delete trigger drops the emptied days from the live rollup
+            f"DELETE FROM {table} WHERE ts >= ? AND ts < ?",
+        ]
+        for sql in statements:
+            query.prepare(sql)
+            query.bindValue(0, first)
+            query.bindValue(1, end)
+            if not query.exec():
+                raise RuntimeError(query.lastError().text())
+        compacted = query.numRowsAffected()
+        query.finish()
+        if not db.commit():
+            raise RuntimeError(db.lastError().text())
+    except Exception:
+        query.finish()
+        db.rollback()
+        raise
+    logger.info(f"Compacted {compacted} rows of {table} into hourly rollups")
+    return compacted
+
+
+def drop_hourly(db: QSqlDatabase,
+                table: str,
+                cutoff: int,
+                batch_size: int = tkc.PURGE_BATCH_SIZE) -> int:
+    """
+    Deletes one batch of a tracker's hourly rollups from before ``cutoff``.
+
+    The days they belong to keep their rows in the ``*_daily_archive`` table.
+
+    Args:
+        db (QSqlDatabase): The open database connection.
+        table (str): The tracker table.
+        cutoff (int): The start of the oldest day whose hourly rollups stay.
+        batch_size (int): The most rows deleted.
+
+    Returns:
+        int: The number of hourly rows deleted, -1 on error.
+    """
+    hourly = hourly_table(table)
+    query = QSqlQuery(db)
+    query.prepare(f"""DELETE FROM {hourly} WHERE hour IN (
+                          SELECT hour FROM {hourly} WHERE hour < ? LIMIT ?)""")
+    query.bindValue(0, cutoff)
+    query.bindValue(1, batch_size)
+    if not query.exec():
+        logger.error(f"Error dropping hourly rollups of {table}: {query.lastError().text()}")
+        return -1
+    dropped = query.numRowsAffected()
+    query.finish()
+    return dropped
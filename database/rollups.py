@@ -0,0 +1,263 @@
+from typing import List
+
+from database.schema import TABLE_SLIDER_COLUMNS
+from database.tombstones import live_view
+
+DAY_EXPRESSION = "(({ts}) / 86400) * 86400"
+HOUR_EXPRESSION = "(({ts}) / 3600) * 3600"
+
+
+def rollup_table(table: str) -> str:
+    """
+    Returns the name of a tracker table's daily rollup table.
+
+    Args:
+        table (str): The tracker table.
+
+    Returns:
+        str: The rollup table name.
+    """
+    return f"{table}_daily"
+
+
+def archive_rollup_table(table: str) -> str:
+    """
+    Returns the name of the table holding the daily rollups of days whose rows left the tracker table.
+
+    Months moved to the columnar archive and days compacted by the retention
+    policy both keep their rollups here.
+
+    Args:
+        table (str): The tracker table.
+
+    Returns:
+        str: The archived rollup table name.
+    """
+    return f"{table}_daily_archive"
+
+
+def hourly_table(table: str) -> str:
+    """
+    Returns the name of a tracker table's hourly rollup table, filled by the retention policy.
+
+    Args:
+        table (str): The tracker table.
+
+    Returns:
+        str: The hourly table name.
+    """
+    return f"{table}_hourly"
+
+
+def rollup_columns_sql(table: str, key: str = 'day') -> str:
+    """
+    Returns the column definitions shared by a tracker's rollup tables.
+
+    ``entry_count`` counts the entries of a bucket and ``<slider>_count`` those
+    with the slider set, the divisor of its average. The per-slider counts come
+    last, where migration 9 added them to older tables, so every rollup table
+    has the same column order.
+
+    Args:
+        table (str): The tracker table.
+        key (str): The bucket start column, 'day' or 'hour'.
+
+    Returns:
+        str: The column list for a CREATE TABLE statement.
+    """
+    columns = ',\n'.join(f"{slider}_sum INTEGER, {slider}_min INTEGER, {slider}_max INTEGER"
+                         for slider in TABLE_SLIDER_COLUMNS[table])
+    counts = ',\n'.join(f"{slider}_count INTEGER NOT NULL DEFAULT 0"
+                        for slider in TABLE_SLIDER_COLUMNS[table])
+    return f"""{key} INTEGER PRIMARY KEY,
+            entry_count INTEGER NOT NULL,
+            {columns},
+            {counts}"""
+
+
+def aggregates_sql(table: str) -> str:
+    """
+    Returns the aggregates of a tracker's rows in the rollup column order after the counts.
+
+    Args:
+        table (str): The tracker table.
+
+    Returns:
+        str: The sum, min and max of every slider, then the count of its non-NULL values.
+    """
+    sliders = TABLE_SLIDER_COLUMNS[table]
+    return ', '.join([f"SUM({slider}), MIN({slider}), MAX({slider})" for slider in sliders]
+                     + [f"COUNT({slider})" for slider in sliders])
+
+
+def folds_sql(table: str) -> str:
+    """
+    Returns the SET terms that fold an ``excluded`` rollup row's sliders into the existing row.
+
+    NULL slider values are ignored, so a bucket with none keeps the other side's
+    value, and the per-slider counts add up.
+
+    Args:
+        table (str): The tracker table.
+
+    Returns:
+        str: The terms for an ON CONFLICT DO UPDATE clause, entry_count left out.
+    """
+    return ',\n'.join(
+        f"{slider}_sum = COALESCE({slider}_sum + excluded.{slider}_sum, "
+        f"{slider}_sum, excluded.{slider}_sum), "
+        f"{slider}_min = COALESCE(MIN({slider}_min, excluded.{slider}_min), "
+        f"{slider}_min, excluded.{slider}_min), "
+        f"{slider}_max = COALESCE(MAX({slider}_max, excluded.{slider}_max), "
+        f"{slider}_max, excluded.{slider}_max), "
+        f"{slider}_count = {slider}_count + excluded.{slider}_count"
+        for slider in TABLE_SLIDER_COLUMNS[table])
+
+
+def fold_into_sql(table: str, target: str, select: str, key: str = 'day') -> str:
+    """
+    Returns an upsert that adds the rollup rows of ``select`` into ``target``.
+
+    Buckets already in ``target`` have their counts added and sums, minimums and
+    maximums folded, so the same bucket can be moved in more than once.
+
+    Args:
+        table (str): The tracker table.
+        target (str): The rollup table written to.
+        select (str): A SELECT with a WHERE clause returning rows in the rollup column order.
+        key (str): The bucket start column of ``target``.
+
+    Returns:
+        str: The statement.
+    """
+    return f"""INSERT INTO {target}
+            {select}
+            ON CONFLICT({key}) DO UPDATE SET
+            entry_count = entry_count + excluded.entry_count,
+            {folds_sql(table)}"""
+
+
+def hourly_select_sql(table: str, where: str = "ts IS NOT NULL") -> str:
+    """
+    Returns a SELECT that groups a tracker's live rows into hourly rollup rows.
+
+    Args:
+        table (str): The tracker table.
+        where (str): The condition on the rows, e.g. a ts range with placeholders.
+
+    Returns:
+        str: The statement, in the hourly table's column order.
+    """
+    sliders = TABLE_SLIDER_COLUMNS[table]
+    aggregates = ', '.join([f"SUM({slider}) AS {slider}_sum, MIN({slider}) AS {slider}_min, "
+                            f"MAX({slider}) AS {slider}_max" for slider in sliders]
+                           + [f"COUNT({slider}) AS {slider}_count" for slider in sliders])
+    return f"""SELECT {HOUR_EXPRESSION.format(ts='ts')} AS hour, COUNT(*) AS entry_count, {aggregates}
+            FROM {live_view(table)} WHERE {where} GROUP BY hour"""
+
+
+def _recompute_day(table: str, ts: str, live_only: bool = False) -> str:
+    """
+    Returns the statements that rebuild the rollup row of the day ``ts`` falls into.
+
+    Args:
+        table (str): The tracker table.
+        ts (str): The SQL expression of a timestamp inside the day, e.g. ``OLD.ts``.
+        live_only (bool): Leave tombstoned rows out of the day.
+
+    Returns:
+        str: Two statements ready for a trigger body.
+    """
+    day = DAY_EXPRESSION.format(ts=ts)
+    return f"""
+            DELETE FROM {rollup_table(table)} WHERE day = {day};
+            INSERT INTO {rollup_table(table)}
+            SELECT {day}, COUNT(*), {aggregates_sql(table)} FROM {table}
+            WHERE ts >= {day} AND ts < {day} + 86400{' AND deleted_at IS NULL' if live_only else ''}
+            HAVING COUNT(*) > 0;"""
+
+
+def drop_triggers_sql(table: str) -> List[str]:
+    """
+    Returns the statements that drop a tracker table's rollup triggers, to recreate them.
+
+    Args:
+        table (str): The tracker table.
+
+    Returns:
+        List[str]: The DROP statements.
+    """
+    rollup = rollup_table(table)
+    return [f"DROP TRIGGER IF EXISTS {rollup}_{event}" for event in ('insert', 'delete', 'update')]
+
+
+def rollup_ddl(table: str, live_only: bool = False) -> List[str]:
+    """
+    Returns the statements that create a tracker table's daily rollup and its triggers.
+
+    The rollup keeps the entry count and the per-slider sum, min, max and count
+    of each day. Inserts fold into the day's row directly; deletes and updates recompute
+    the affected day from the tracker table, which the ts index keeps cheap.
+    With ``live_only`` tombstoned rows are left out: setting or clearing
+    ``deleted_at`` recomputes the day, and purging a tombstone touches nothing.
+
+    Args:
+        table (str): The tracker table.
+        live_only (bool): The table has a ``deleted_at`` column to honour.
+
+    Returns:
+        List[str]: The CREATE statements, safe to run more than once.
+    """
+    sliders = TABLE_SLIDER_COLUMNS[table]
+    rollup = rollup_table(table)
+    insert_columns = ', '.join(f"{slider}_sum, {slider}_min, {slider}_max, {slider}_count"
+                               for slider in sliders)
+    insert_values = ', '.join(f"NEW.{slider}, NEW.{slider}, NEW.{slider}, NEW.{slider} IS NOT NULL"
+                              for slider in sliders)
+    folds = folds_sql(table)
+    live_new = ' AND NEW.deleted_at IS NULL' if live_only else ''
+    live_old = ' AND OLD.deleted_at IS NULL' if live_only else ''
+    watched = ['ts'] + (['deleted_at'] if live_only else []) + list(sliders)
+
+    return [
+        f"""CREATE TABLE IF NOT EXISTS {rollup} (
+            {rollup_columns_sql(table)}
+            )""",
+        f"""CREATE TRIGGER IF NOT EXISTS {rollup}_insert
+            AFTER INSERT ON {table} WHEN NEW.ts IS NOT NULL{live_new}
+            BEGIN
+                INSERT INTO {rollup}(day, entry_count, {insert_columns})
+                VALUES ({DAY_EXPRESSION.format(ts='NEW.ts')}, 1, {insert_values})
+                ON CONFLICT(day) DO UPDATE SET
+                entry_count = entry_count + 1,
+                {folds};
+            END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {rollup}_delete
+            AFTER DELETE ON {table} WHEN OLD.ts IS NOT NULL{live_old}
+            BEGIN{_recompute_day(table, 'OLD.ts', live_only)}
+            END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {rollup}_update
+            AFTER UPDATE OF {', '.join(watched)} ON {table}
+            BEGIN{_recompute_day(table, 'OLD.ts', live_only)}{_recompute_day(table, 'NEW.ts', live_only)}
+            END""",
+    ]
+
+
+def rebuild_sql(table: str, live_only: bool = False) -> List[str]:
+    """
+    Returns the statements that rebuild a tracker table's whole daily rollup.
+
+    Args:
+        table (str): The tracker table.
+        live_only (bool): Leave tombstoned rows out.
+
+    Returns:
+        List[str]: The statements, to be run in one transaction.
+    """
+    day = DAY_EXPRESSION.format(ts='ts')
+    return [
+        f"DELETE FROM {rollup_table(table)}",
+        f"""INSERT INTO {rollup_table(table)}
+            SELECT {day} AS day, COUNT(*), {aggregates_sql(table)} FROM {table}
+            WHERE ts IS NOT NULL{' AND deleted_at IS NULL' if live_only else ''} GROUP BY day""",
+    ]
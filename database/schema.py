@@ -0,0 +1,121 @@
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+
+class Field(NamedTuple):
+    """
+    One entered column of a tracker and the form widget it is read from.
+
+    Attributes:
+        name (str): The column name, also the attribute of its widget on the main window.
+        kind (str): 'date', 'time' or 'value'; dates and times are stored as TEXT.
+        value_range (Tuple[int, int]): The inclusive range of a 'value' field.
+        spinbox (Optional[str]): The spinbox kept in step with a slider, if any.
+        inputs (Tuple[str, ...]): The fields a derived value is computed from.
+        formula (Optional[Callable[..., int]]): Computes a derived value from the
+            ``inputs`` values, passed in order; None for an entered field.
+    """
+    name: str
+    kind: str = 'value'
+    value_range: Tuple[int, int] = (0, 10)
+    spinbox: Optional[str] = None
+    inputs: Tuple[str, ...] = ()
+    formula: Optional[Callable[..., int]] = None
+
+    @property
+    def derived(self) -> bool:
+        """The value is computed from other fields rather than entered."""
+        return self.formula is not None
+
+
+class Tracker(NamedTuple):
+    """
+    A tracker declared once; its table, insert statements, form and model are generated from it.
+
+    Attributes:
+        table (str): The table name.
+        fields (Tuple[Field, ...]): The entered columns in bind order, the date and time first.
+        commit_action (str): The main window QAction that commits the form.
+        view (str): The main window QTableView that shows the table.
+        model (str): The main window attribute the table model is stored in.
+    """
+    table: str
+    fields: Tuple[Field, ...]
+    commit_action: str
+    view: str
+    model: str
+
+
+# Every tracker of the app; adding one here is enough for the database side,
+# given its widgets exist in the UI.
+TRACKERS: Tuple[Tracker, ...] = (
+    Tracker('wefe_table', (
+        Field('wefe_date', 'date'),
+        Field('wefe_time', 'time'),
+        Field('wellbeing_slider', spinbox='wellbeing_spinbox'),
+        Field('excite_slider', spinbox='excite_spinbox'),
+        Field('focus_slider', spinbox='focus_spinbox'),
+        Field('energy_slider', spinbox='energy_spinbox'),
+        Field('summing_box', value_range=(0, 40),
+              inputs=('wellbeing_slider', 'excite_slider', 'focus_slider', 'energy_slider'),
+              formula=lambda *values: sum(values)),
+    ), 'actionCommitWEFE', 'wefe_tableview', 'wefe_model'),
+    Tracker('cspr_table', (
+        Field('cspr_date', 'date'),
+        Field('cspr_time', 'time'),
+        Field('calm_slider', spinbox='calm_spinbox'),
+        Field('stress_slider', spinbox='stress_spinbox'),
+        Field('pain_slider', spinbox='pain_spinbox'),
+        Field('rage_slider', spinbox='rage_spinbox'),
+    ), 'actionCommitCSPR', 'cspr_tableview', 'cspr_model'),
+    Tracker('mental_mental_table', (
+        Field('mental_mental_date', 'date'),
+        Field('mental_mental_time', 'time'),
+        Field('mood_slider', spinbox='mood'),
+        Field('mania_slider', spinbox='mania'),
+        Field('depression_slider', spinbox='depression'),
+        Field('mixed_risk_slider', spinbox='mixed_risk'),
+    ), 'actionCommitMM', 'mental_mental_table', 'mental_mental_model'),
+)
+
+TRACKERS_BY_TABLE: Dict[str, Tracker] = {tracker.table: tracker for tracker in TRACKERS}
+
+# Insert columns of each tracker table, in bind order.
+TABLE_COLUMNS = {tracker.table: tuple(field.name for field in tracker.fields)
+                 for tracker in TRACKERS}
+
+# The TEXT date and time columns each table's INTEGER ts column is derived from.
+TABLE_DATETIME_COLUMNS = {
+    tracker.table: tuple(field.name for field in tracker.fields if field.kind in ('date', 'time'))
+    for tracker in TRACKERS}
+
+# The slider columns of each table, kept in its covering ts index.
+TABLE_SLIDER_COLUMNS = {
+    tracker.table: tuple(field.name for field in tracker.fields if field.kind == 'value')
+    for tracker in TRACKERS}
+
+# Columns computed from the sliders rather than entered, left out of cross-tracker analysis.
+DERIVED_COLUMNS = {field.name for tracker in TRACKERS for field in tracker.fields if field.derived}
+
+# Inclusive value range of each slider column; summing_box adds up the four WEFE sliders.
+SLIDER_RANGE = Field._field_defaults['value_range']
+COLUMN_RANGES = {field.name: field.value_range for tracker in TRACKERS for field in tracker.fields
+                 if field.kind == 'value' and field.value_range != SLIDER_RANGE}
+
+
+def table_ddl(tracker: Tracker) -> str:
+    """
+    Returns the CREATE TABLE statement of a tracker.
+
+    Args:
+        tracker (Tracker): The tracker.
+
+    Returns:
+        str: The statement, safe to run more than once.
+    """
+    columns = ',\n               '.join(f"{field.name} {'INTEGER' if field.kind == 'value' else 'TEXT'}"
+                         for field in tracker.fields)
+    return f"""CREATE TABLE IF NOT EXISTS {tracker.table} (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               {columns},
+               ts INTEGER
+               )"""
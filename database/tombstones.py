@@ -0,0 +1,87 @@
+import time
+from typing import List, Optional
+
+from PyQt6.QtSql import QSqlDatabase, QSqlQuery
+
+import tracker_config as tkc
+from database.schema import TABLE_SLIDER_COLUMNS
+from logger_setup import logger
+
+# The condition every reader adds to see only live rows
+LIVE = "deleted_at IS NULL"
+
+
+def live_view(table: str) -> str:
+    """
+    Returns the name of the view that hides a tracker table's tombstoned rows.
+
+    Args:
+        table (str): The tracker table.
+
+    Returns:
+        str: The view name.
+    """
+    return f"{table}_live"
+
+
+def tombstone_ddl(table: str) -> List[str]:
+    """
+    Returns the statements that add soft deletes to a tracker table.
+
+    A row is tombstoned by setting ``deleted_at`` to the epoch second it was
+    deleted. The covering ts index becomes partial over live rows, so reads
+    through the view stay index-only and tombstones cost no index space there.
+    A second partial index holds only the tombstones, for undo and the purge.
+
+    Args:
+        table (str): The tracker table.
+
+    Returns:
+        List[str]: The statements, to be run once in one transaction.
+    """
+    sliders = ', '.join(TABLE_SLIDER_COLUMNS[table])
+    return [
+        f"ALTER TABLE {table} ADD COLUMN deleted_at INTEGER",
+        f"DROP INDEX IF EXISTS idx_{table}_ts",
+        # SQLite only counts the index as covering when it also holds deleted_at
+        f"""CREATE INDEX IF NOT EXISTS idx_{table}_live
+            ON {table}(ts, {sliders}, deleted_at) WHERE {LIVE}""",
+        f"""CREATE INDEX IF NOT EXISTS idx_{table}_deleted
+            ON {table}(deleted_at) WHERE deleted_at IS NOT NULL""",
+        f"CREATE VIEW IF NOT EXISTS {live_view(table)} AS SELECT * FROM {table} WHERE {LIVE}",
+    ]
+
+
+def purge_tombstones(db: QSqlDatabase,
+                     table: str,
+                     older_than: Optional[int] = None,
+                     batch_size: int = tkc.PURGE_BATCH_SIZE) -> int:
+    """
+    Physically deletes one batch of a table's tombstoned rows.
+
+    Tombstoned rows are already gone from the rollups, so the delete trigger
+    leaves them alone and a batch is a plain walk of the tombstone index.
+
+    Args:
+        db (QSqlDatabase): The open database connection.
+        table (str): The tracker table.
+        older_than (Optional[int]): Only purge rows tombstoned before this epoch
+            second, ``PURGE_AFTER_SECONDS`` ago by default.
+        batch_size (int): The most rows deleted.
+
+    Returns:
+        int: The number of rows purged, -1 on error.
+    """
+    if older_than is None:
+        older_than = int(time.time()) - tkc.PURGE_AFTER_SECONDS
+    query = QSqlQuery(db)
+    query.prepare(f"""DELETE FROM {table} WHERE id IN (
+                          SELECT id FROM {table} WHERE deleted_at < ? LIMIT ?)""")
+    query.bindValue(0, older_than)
+    query.bindValue(1, batch_size)
+    if not query.exec():
+        logger.error(f"Error purging tombstones of {table}: {query.lastError().text()}")
+        return -1
+    purged = query.numRowsAffected()
+    query.finish()
+    return purged
@@ -0,0 +1,269 @@
+from typing import Any, Callable, List, Sequence, Tuple
+
+from PyQt6.QtCore import QDate, QTime
+
+from database.schema import Field, Tracker
+from logger_setup import logger
+
+# The text formats the date and time columns are stored in
+FIELD_FORMATS = {'date': "yyyy-MM-dd", 'time': "hh:mm:ss"}
+
+
+def field_reader(widget: Any, field: Field) -> Callable[[], Any]:
+    """
+    Returns a callable that reads one field's value from its widget.
+
+    Args:
+        widget (Any): The QDateEdit, QTimeEdit, slider or spinbox.
+        field (Field): The field the widget edits.
+
+    Returns:
+        Callable[[], Any]: The reader; dates and times come back as formatted text.
+    """
+    if field.kind == 'date':
+        return lambda: widget.date().toString(FIELD_FORMATS['date'])
+    if field.kind == 'time':
+        return lambda: widget.time().toString(FIELD_FORMATS['time'])
+    return widget.value
+
+
+def field_writer(widget: Any, field: Field) -> Callable[[Any], None]:
+    """
+    Returns a callable that puts a stored value back into one field's widget.
+
+    Args:
+        widget (Any): The QDateEdit, QTimeEdit, slider or spinbox.
+        field (Field): The field the widget edits.
+
+    Returns:
+        Callable[[Any], None]: The writer; dates and times are parsed from their text.
+    """
+    if field.kind == 'date':
+        return lambda value: widget.setDate(QDate.fromString(value, FIELD_FORMATS['date']))
+    if field.kind == 'time':
+        return lambda value: widget.setTime(QTime.fromString(value, FIELD_FORMATS['time']))
+    return lambda value: widget.setValue(int(value))
+
+
+def field_changed(widget: Any, field: Field) -> Any:
+    """
+    Returns the signal a field's widget emits when its value changes.
+
+    Args:
+        widget (Any): The QDateEdit, QTimeEdit, slider or spinbox.
+        field (Field): The field the widget edits.
+
+    Returns:
+        Any: The bound ``dateChanged``, ``timeChanged`` or ``valueChanged`` signal.
+    """
+    if field.kind == 'date':
+        return widget.dateChanged
+    if field.kind == 'time':
+        return widget.timeChanged
+    return widget.valueChanged
+
+
+def field_resetter(widget: Any, field: Field) -> Callable[[], None]:
+    """
+    Returns a callable that puts one field's widget back to its blank state.
+
+    Args:
+        widget (Any): The QDateEdit, QTimeEdit, slider or spinbox.
+        field (Field): The field the widget edits.
+
+    Returns:
+        Callable[[], None]: The resetter; dates and times go to now, values to 0.
+    """
+    if field.kind == 'date':
+        return lambda: widget.setDate(QDate.currentDate())
+    if field.kind == 'time':
+        return lambda: widget.setTime(QTime.currentTime())
+    return lambda: widget.setValue(0)
+
+
+class TrackerForm:
+    """
+    Reads, submits and resets the entry form of one tracker.
+
+    The widgets are looked up and their readers bound once, when the form is
+    built, so a commit is just one call per field and a tuple. Building the
+    form also gives every value widget, and its spinbox, the field's
+    ``value_range`` and resets it, so the dates and times start at now. A form that is
+    untouched since its last reset is never submitted, and its commit action
+    stays disabled until an entered field changes, so a double-clicked commit
+    cannot queue a second, blank entry.
+
+    Attributes:
+        tracker (Tracker): The tracker the form enters rows for.
+        action (Any): The commit QAction, enabled only while the form is touched.
+        touched (bool): An entered field changed since the last reset.
+        readers (Tuple[Callable[[], Any], ...]): The field readers, in bind order.
+        writers (Tuple[Callable[[Any], None], ...]): The field writers, in bind order.
+        resetters (Tuple[Callable[[], None], ...]): The field resetters.
+    """
+
+    def __init__(self, main_window_instance: Any, tracker: Tracker) -> None:
+        self.tracker: Tracker = tracker
+        widgets = [getattr(main_window_instance, field.name) for field in tracker.fields]
+        self.readers: Tuple[Callable[[], Any], ...] = tuple(
+            field_reader(widget, field) for widget, field in zip(widgets, tracker.fields))
+        self.writers: Tuple[Callable[[Any], None], ...] = tuple(
+            field_writer(widget, field) for widget, field in zip(widgets, tracker.fields))
+        self.resetters: Tuple[Callable[[], None], ...] = tuple(
+            field_resetter(widget, field) for widget, field in zip(widgets, tracker.fields))
+        self.action: Any = getattr(main_window_instance, tracker.commit_action, None)
+        self.resetting: bool = False
+        self.touched: bool = False
+        for widget, field in zip(widgets, tracker.fields):
+            if field.kind == 'value':
+                widget.setRange(*field.value_range)
+                if field.spinbox is not None:
+                    getattr(main_window_instance, field.spinbox).setRange(*field.value_range)
+            if not field.derived:
+                field_changed(widget, field).connect(self.mark_touched)
+        self.reset()
+
+    def mark_touched(self, *_: Any) -> None:
+        """
+        Notes that the user changed an entered field, unless the form is resetting itself.
+
+        Returns:
+            None
+        """
+        if not self.resetting:
+            self.set_touched(True)
+
+    def set_touched(self, touched: bool) -> None:
+        """
+        Records whether the form holds an entry and enables the commit action to match.
+
+        Args:
+            touched (bool): An entered field changed since the last reset.
+
+        Returns:
+            None
+        """
+        self.touched = touched
+        if self.action is not None:
+            self.action.setEnabled(touched)
+
+    def read(self) -> Tuple[Any, ...]:
+        """
+        Returns the form's current values.
+
+        Returns:
+            Tuple[Any, ...]: The row, in ``TABLE_COLUMNS`` order.
+        """
+        return tuple(reader() for reader in self.readers)
+
+    def restore(self, row: Sequence[Any]) -> None:
+        """
+        Puts a row back into the form, e.g. one the background writer could not commit.
+
+        Args:
+            row (Sequence[Any]): The row, in ``TABLE_COLUMNS`` order.
+
+        Returns:
+            None
+        """
+        try:
+            for writer, value in zip(self.writers, row):
+                writer(value)
+        except Exception as e:
+            logger.error(f"Error restoring {self.tracker.table} form: {e}")
+
+    def reset(self) -> None:
+        """
+        Clears the form for the next entry and marks it untouched.
+
+        Returns:
+            None
+        """
+        self.resetting = True
+        try:
+            for resetter in self.resetters:
+                resetter()
+        except Exception as e:
+            logger.error(f"Error resetting {self.tracker.table} form: {e}")
+        finally:
+            self.resetting = False
+        self.set_touched(False)
+
+    def commit(self, submit: Callable[[str, Sequence[Any]], bool]) -> None:
+        """
+        Hands the form's row to ``submit`` and clears the form once it is accepted.
+
+        An untouched form is not submitted: it still holds the blank entry of
+        the last reset, which is what a second click on the commit would send.
+
+        Args:
+            submit (Callable[[str, Sequence[Any]], bool]): Takes the table and row,
+                e.g. ``WriteBehindWorker.submit``; False keeps the form values.
+
+        Returns:
+            None
+        """
+        if not self.touched:
+            logger.info(f"Nothing entered in the {self.tracker.table} form since the last commit")
+            return
+        try:
+            if submit(self.tracker.table, self.read()) is False:
+                logger.error("Data was not queued for the database, keeping the form values")
+                return
+            self.reset()
+        except Exception as e:
+            logger.error(f"Error inserting data into the database: {e}")
+
+
+def connect_spinboxes(main_window_instance: Any, trackers: Sequence[Tracker],
+                      connect: Callable[[Any, Any], None]) -> List[Tuple[str, str]]:
+    """
+    Pairs every slider that declares a spinbox with it.
+
+    Args:
+        main_window_instance (Any): The main window holding the widgets.
+        trackers (Sequence[Tracker]): The trackers whose sliders to pair.
+        connect (Callable[[Any, Any], None]): Links one slider and spinbox.
+
+    Returns:
+        List[Tuple[str, str]]: The (slider, spinbox) names connected.
+    """
+    pairs = [(field.name, field.spinbox) for tracker in trackers for field in tracker.fields
+             if field.spinbox is not None]
+    for slider, spinbox in pairs:
+        connect(getattr(main_window_instance, slider), getattr(main_window_instance, spinbox))
+    return pairs
+
+
+def connect_derived_fields(main_window_instance: Any, trackers: Sequence[Tracker]) -> List[str]:
+    """
+    Keeps every derived field's widget computed from its inputs with the field's formula.
+
+    The derived widget is disabled, set once now and again whenever one of its
+    inputs changes.
+
+    Args:
+        main_window_instance (Any): The main window holding the widgets.
+        trackers (Sequence[Tracker]): The trackers whose derived fields to connect.
+
+    Returns:
+        List[str]: The names of the derived fields connected.
+    """
+    connected = []
+    for field in (field for tracker in trackers for field in tracker.fields if field.derived):
+        widget = getattr(main_window_instance, field.name)
+        inputs = [getattr(main_window_instance, name) for name in field.inputs]
+
+        def update(_: Any = None, widget: Any = widget, inputs: List[Any] = inputs,
+                   field: Field = field) -> None:
+            try:
+                widget.setValue(int(field.formula(*(source.value() for source in inputs))))
+            except Exception as e:
+                logger.error(f"Error computing {field.name}: {e}", exc_info=True)
+
+        widget.setEnabled(False)
+        for source in inputs:
+            source.valueChanged.connect(update)
+        update()
+        connected.append(field.name)
+    return connected
@@ -0,0 +1,327 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from PyQt6.QtCore import QObject, QThread, pyqtSignal
+from PyQt6.QtSql import QSqlDatabase
+
+import tracker_config as tkc
+from database.database_manager import DataManager, target_db_path
+from logger_setup import logger
+
+# Queued after the last row to tell the writer to drain and exit
+_STOP = object()
+# Queued with a job so a writer waiting for rows wakes up to run it
+_WAKE = object()
+# SQLite's primary result code for a constraint violation
+SQLITE_CONSTRAINT = 19
+
+
+class WriterJob:
+    """
+    A function waiting to run on the writer connection, and its result.
+
+    Attributes:
+        function (Callable[[QSqlDatabase], Any]): Called with the writer connection.
+        done (threading.Event): Set once the function returned or raised.
+        result (Any): What the function returned, None if it raised.
+    """
+
+    def __init__(self, function: Callable[[QSqlDatabase], Any]) -> None:
+        self.function: Callable[[QSqlDatabase], Any] = function
+        self.done: threading.Event = threading.Event()
+        self.result: Any = None
+
+
+class WriteBehindWorker(QThread):
+    """
+    Background writer that owns the application's only writer connection.
+
+    Rows are handed over through a bounded queue with ``submit`` and written on the
+    writer connection from the connection registry. Any other write, the
+    deletes, undos and edits of the table models and the maintenance steps,
+    is a job run on the same connection with ``call`` (waiting for its result)
+    or ``post`` (not waiting); jobs run between groups and during retry pauses,
+    so they never wait behind a backoff. Whatever is waiting in the queue
+    is grouped into a single transaction, and ``committed`` is emitted once per
+    table afterwards so the GUI can refresh its models. Rows are plain inserts
+    unless submitted with ``upsert``, which overwrites the entry already logged
+    at the same date and time. A failed group is never reported as written: it
+    is rolled back and its rows retried, and rows that still fail, or that
+    break a constraint such as the unique ts, reach the GUI through ``failed``.
+
+    Attributes:
+        committed (pyqtSignal): Emitted with the table name and the ids written after its rows are committed.
+        failed (pyqtSignal): Emitted with the table name and the rows given up on after the retries.
+        external_change (pyqtSignal): Emitted when ``poll_external_changes`` finds a commit
+            by another process.
+        db_name (str): The path to the SQLite database file.
+        pending (queue.Queue): The rows waiting to be written.
+        jobs (queue.Queue): The jobs waiting to run on the writer connection.
+    """
+
+    committed = pyqtSignal(str, list)
+    failed = pyqtSignal(str, list)
+    external_change = pyqtSignal()
+
+    def __init__(self,
+                 db_name: str = target_db_path,
+                 parent: QObject = None) -> None:
+        super().__init__(parent)
+        self.setObjectName('write-behind')
+        self.db_name: str = db_name
+        self.pending: queue.Queue = queue.Queue(maxsize=tkc.WRITE_QUEUE_MAXSIZE)
+        self.jobs: queue.Queue = queue.Queue()
+        self.accepting: bool = True
+        self.jobs_lock = threading.Lock()
+        self.manager: Optional[DataManager] = None
+        self.thread_ident: Optional[int] = None
+        self.data_version: int = 0
+
+    def submit(self, table: str, row: Sequence[Union[str, int]], upsert: bool = False) -> bool:
+        """
+        Queues a row for the writer thread without waiting on the database.
+
+        Args:
+            table (str): The tracker table to insert into.
+            row (Sequence[Union[str, int]]): The row, in ``TABLE_COLUMNS[table]`` order.
+            upsert (bool): Overwrite the entry already logged at the same date and time.
+
+        Returns:
+            bool: False if the queue is full and the row was not accepted.
+        """
+        try:
+            self.pending.put_nowait((table, tuple(row), upsert))
+            return True
+        except queue.Full:
+            logger.error(f"Write queue full, row not queued: {table}")
+            return False
+
+    def call(self, function: Callable[[QSqlDatabase], Any]) -> Any:
+        """
+        Runs a function on the writer connection and waits for its result.
+
+        Args:
+            function (Callable[[QSqlDatabase], Any]): Called with the writer connection.
+
+        Returns:
+            Any: What the function returned, None if it raised or the writer is not running.
+        """
+        if threading.get_ident() == self.thread_ident:
+            # already on the writer thread, e.g. a job calling a helper that writes
+            return function(self.manager.db)
+        job = self.post(function)
+        if job is None:
+            return None
+        job.done.wait()
+        return job.result
+
+    def post(self, function: Callable[[QSqlDatabase], Any]) -> Optional[WriterJob]:
+        """
+        Queues a function to run on the writer connection without waiting for it.
+
+        Args:
+            function (Callable[[QSqlDatabase], Any]): Called with the writer connection.
+
+        Returns:
+            Optional[WriterJob]: The queued job, None if the writer is not running.
+        """
+        job = WriterJob(function)
+        with self.jobs_lock:
+            if not (self.accepting and self.isRunning()):
+                logger.error("The writer thread is not running, database write dropped")
+                return None
+            self.jobs.put(job)
+        try:
+            self.pending.put_nowait(_WAKE)
+        except queue.Full:
+            # a full queue keeps the writer busy, it runs the job after the next group
+            pass
+        return job
+
+    def poll_external_changes(self) -> None:
+        """
+        Checks on the writer thread whether another process committed since the last poll.
+
+        PRAGMA data_version on the writer connection only moves for commits made
+        through other connections, and in this process nothing else writes, so a
+        change means another process; ``external_change`` is emitted for it.
+
+        Returns:
+            None
+        """
+        self.post(self.check_data_version)
+
+    def check_data_version(self, _: QSqlDatabase) -> None:
+        """
+        Compares PRAGMA data_version with the last poll, on the writer thread.
+
+        Returns:
+            None
+        """
+        version = self.manager.data_version()
+        if self.data_version and version and version != self.data_version:
+            self.external_change.emit()
+        self.data_version = version or self.data_version
+
+    def run_jobs(self, wait_ms: int = 0) -> None:
+        """
+        Runs the queued jobs, waiting up to ``wait_ms`` for more to arrive.
+
+        Args:
+            wait_ms (int): How long to keep serving jobs, e.g. a retry pause.
+
+        Returns:
+            None
+        """
+        deadline = time.monotonic() + wait_ms / 1000
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                job = self.jobs.get(timeout=remaining) if remaining > 0 else self.jobs.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                job.result = job.function(self.manager.db)
+            except Exception as e:
+                logger.error(f"Writer job failed: {e}", exc_info=True)
+            finally:
+                job.done.set()
+
+    def stop(self) -> None:
+        """
+        Drains every queued row and waits for the writer thread to finish.
+
+        Returns:
+            None
+        """
+        if self.isRunning():
+            self.pending.put(_STOP)
+            self.wait()
+
+    def run(self) -> None:
+        """
+        Writes queued rows until ``stop`` is called.
+
+        A group that fails is rolled back as a whole, and its rows are retried
+        one per transaction after a growing pause, up to ``WRITE_RETRY_LIMIT``
+        rounds. Rows still failing then, and rows a constraint rejects, which
+        no retry can fix, are handed to ``failed``.
+
+        Returns:
+            None
+        """
+        manager = self.manager = DataManager(self.db_name)
+        self.thread_ident = threading.get_ident()
+        running = True
+        retry: List[Tuple[str, Tuple, bool]] = []
+        attempts = 0
+        try:
+            while running or retry:
+                self.run_jobs()
+                if retry:
+                    attempts += 1
+                    self.run_jobs(tkc.WRITE_RETRY_BACKOFF_MS * 2 ** (attempts - 1))
+                    rejected: List[Tuple[str, Tuple, bool]] = []
+                    failing: List[Tuple[str, Tuple, bool]] = []
+                    for item in retry:
+                        if not self.write(manager, [item]):
+                            (rejected if self.rejected(manager, item) else failing).append(item)
+                    self.give_up(rejected)
+                    retry = failing
+                    if retry and attempts >= tkc.WRITE_RETRY_LIMIT:
+                        self.give_up(retry)
+                        retry = []
+                    if not retry:
+                        attempts = 0
+                    continue
+
+                batch = [self.pending.get()]
+                while len(batch) < tkc.WRITE_GROUP_SIZE:
+                    try:
+                        batch.append(self.pending.get_nowait())
+                    except queue.Empty:
+                        break
+
+                items = []
+                for item in batch:
+                    if item is _STOP:
+                        running = False
+                    elif item is not _WAKE:
+                        items.append(item)
+                if items and not self.write(manager, items):
+                    retry = items
+        except Exception as e:
+            logger.error(f"Write-behind worker stopped: {e}", exc_info=True)
+            self.give_up(retry)
+        finally:
+            with self.jobs_lock:
+                self.accepting = False
+            self.run_jobs()
+            self.thread_ident = None
+            manager.close_database()
+
+    @staticmethod
+    def rejected(manager: DataManager, item: Tuple[str, Tuple, bool]) -> bool:
+        """
+        Tells whether a row failed on a constraint, which retrying cannot fix.
+
+        Args:
+            manager (DataManager): The writer thread's data manager.
+            item (Tuple[str, Tuple, bool]): The (table, row, upsert) that just failed.
+
+        Returns:
+            bool: True if SQLite reported SQLITE_CONSTRAINT for the row's insert.
+        """
+        table, _, upsert = item
+        code = manager.insert_query(table, upsert).lastError().nativeErrorCode()
+        # extended result codes keep the primary code in the low byte
+        return code.isdigit() and int(code) & 0xff == SQLITE_CONSTRAINT
+
+    def give_up(self, items: List[Tuple[str, Tuple, bool]]) -> None:
+        """
+        Reports rows that could not be written through ``failed``, one signal per table.
+
+        Args:
+            items (List[Tuple[str, Tuple, bool]]): The (table, row, upsert) items not written.
+
+        Returns:
+            None
+        """
+        rows_by_table: Dict[str, List[Tuple]] = {}
+        for table, row, _ in items:
+            rows_by_table.setdefault(table, []).append(row)
+        for table, rows in rows_by_table.items():
+            logger.error(f"Giving up on {len(rows)} row(s) of {table}")
+            self.failed.emit(table, rows)
+
+    def write(self, manager: DataManager, items: List[Tuple[str, Tuple, bool]]) -> bool:
+        """
+        Commits one group of queued rows in a single transaction, all or nothing.
+
+        Args:
+            manager (DataManager): The writer thread's data manager.
+            items (List[Tuple[str, Tuple, bool]]): The (table, row, upsert) items, in queue order.
+
+        Returns:
+            bool: True if every row was committed; otherwise the group is rolled back.
+        """
+        if not manager.db.transaction():
+            logger.error(f"Write-behind transaction failed: {manager.db.lastError().text()}")
+            return False
+        written: Dict[str, List[int]] = {}
+        for table, row, upsert in items:
+            row_id = manager.insert_row(table, row, upsert=upsert)
+            if row_id is None:
+                logger.error(f"Write-behind group rolled back on a row of {table}")
+                manager.db.rollback()
+                return False
+            written.setdefault(table, []).append(row_id)
+        if not manager.db.commit():
+            logger.error(f"Write-behind commit failed: {manager.db.lastError().text()}")
+            manager.db.rollback()
+            return False
+        for table, ids in written.items():
+            self.committed.emit(table, ids)
+        return True
@@ -1,5 +1,6 @@
 from PyQt6.QtWidgets import QApplication
 from ui.main_window import MainWindow
+import multiprocessing
 import sys
 from logger_setup import logger
 # pyrcc5 resources.qrc -o resources.py 
@@ -29,5 +30,7 @@ def run_app():
     
 
 if __name__ == "__main__":
+    # the backup worker spawns a child process, which needs this in a frozen build
+    multiprocessing.freeze_support()
     run_app()
     
\ No newline at end of file
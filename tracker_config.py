@@ -1,4 +1,5 @@
 # Example configuration settings
+import os
 
 # QSettings configurations
 ORGANIZATION_NAME = "polarityAI"
@@ -10,5 +11,83 @@ DATEFORMAT = '%d-%b-%y %I:%M:%S %p'  # this is how you want it from now on lolol
 FILE_MODE = 'w'
 # database
 DB_NAME = 'the_one_and_only_babababy_june17.db'
-
-
+INSERT_BATCH_SIZE = 500  # rows bound per execBatch call in DataManager.insert_many
+STATEMENT_CACHE_SIZE = 16  # ad-hoc prepared statements kept by DataManager.cached_query
+MIGRATION_CHUNK_SIZE = 5000  # rows rewritten per transaction by in-place migrations
+ANALYZE_AFTER_ROWS = 1000  # insert_many runs ANALYZE once a bulk load adds this many rows
+# export
+EXPORT_CHUNK_SIZE = 5000  # rows fetched and written per chunk
+EXPORT_FORMAT = 'csv'  # 'csv' or 'jsonl'
+EXPORT_COMPRESS = False  # gzip the exported files
+# import
+IMPORT_CHUNK_SIZE = 5000  # rows validated, deduplicated and committed together
+# analytics
+ROLLING_WINDOWS = (7, 30)  # entries per moving average / std / min / max window
+EWMA_SPANS = (7, 30)  # entries per EWMA span
+ASOF_TOLERANCE_SECONDS = 6 * 3600  # how stale another tracker's entry may be in an as-of join
+# data page models
+MODEL_FETCH_SIZE = 2000  # row ids fetched per fetchMore as the view scrolls
+MODEL_PAGE_SIZE = 256  # rows loaded together when a cell is first shown
+MODEL_CACHED_PAGES = 16  # row pages kept resident, least recently used evicted first
+EXTERNAL_CHANGE_POLL_MS = 2000  # how often PRAGMA data_version is checked for writes by other processes
+# connections
+MAX_READER_CONNECTIONS = 4  # read-only connections open at once across all threads
+# write-behind commit queue
+WRITE_QUEUE_MAXSIZE = 1000  # rows waiting for the writer thread before submits are refused
+WRITE_GROUP_SIZE = 200  # rows grouped into one writer transaction
+WRITE_RETRY_LIMIT = 5  # retry rounds for rows of a failed group before they are reported as failed
+WRITE_RETRY_BACKOFF_MS = 500  # pause before the first retry round, doubled for each further round
+# backups
+BACKUP_DIR = os.path.join(os.path.expanduser('~'), PRINGLES, 'backups')
+BACKUP_INTERVAL_SECONDS = 24 * 3600  # take a snapshot when the newest one is older than this
+BACKUP_RETENTION = 7  # snapshots kept, the oldest are deleted
+BACKUP_COMPRESS = True  # gzip the snapshots
+BACKUP_PAGES_PER_STEP = 1024  # pages copied per online backup step
+BACKUP_STEP_SLEEP = 0.005  # seconds the source lock is released between steps
+# soft deletes
+SOFT_DELETE = True  # deletes set deleted_at and can be undone until purged; False deletes at once
+UNDO_DEPTH = 20  # deletes per table that the undo action can restore
+PURGE_AFTER_SECONDS = 7 * 24 * 3600  # tombstoned rows older than this are purged while idle
+PURGE_BATCH_SIZE = 1000  # tombstoned rows deleted per maintenance slice
+# columnar archive
+ARCHIVE_DIR = os.path.join(os.path.expanduser('~'), PRINGLES, 'archive')
+ARCHIVE_AFTER_MONTHS = None  # months older than this move to archive files while idle; None keeps all in SQLite
+# retention policy, e.g. raw for 1 year, hourly for 3, daily after: 365 and 3 * 365
+RETENTION_RAW_DAYS = None  # entries older than this are compacted to hourly aggregates while idle; None keeps them
+RETENTION_HOURLY_DAYS = None  # hourly aggregates older than this are dropped, the daily ones stay; None keeps them
+RETENTION_CHUNK_DAYS = 7  # days of entries compacted per maintenance slice
+# idle-time maintenance
+MAINTENANCE_IDLE_SECONDS = 60  # seconds without input before upkeep may start
+MAINTENANCE_INTERVAL_SECONDS = 30 * 60  # minimum gap between two maintenance runs
+MAINTENANCE_VACUUM_PAGES = 256  # pages freed per incremental_vacuum slice
+# the one-off VACUUM to incremental auto_vacuum copies the whole file, needs as much free disk
+# again and holds the write lock throughout (~1 s per 100 MB on an SSD); larger files keep their mode
+VACUUM_CONVERT_MAX_BYTES = 512 * 1024 * 1024
+# SQLite pragmas applied right after the connection opens, pick one by name
+DB_PERFORMANCE_PROFILE = 'balanced'
+DB_PERFORMANCE_PROFILES = {
+    'durable': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': -8000,  # negative is KiB, so ~8 MB
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+        'busy_timeout': 5000,  # ms
+    },
+    'balanced': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -32000,
+        'mmap_size': 134217728,  # 128 MB
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+    },
+    'bulk-load': {
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'cache_size': -128000,
+        'mmap_size': 268435456,  # 256 MB
+        'temp_store': 'MEMORY',
+        'busy_timeout': 10000,
+    },
+}
@@ -1,7 +1,7 @@
 import datetime
 from PyQt6 import QtWidgets
-from PyQt6.QtCore import QDate, QSettings, QTime, Qt, QByteArray, QDateTime
-from PyQt6.QtGui import QCloseEvent
+from PyQt6.QtCore import QSettings, QTimer, Qt, QByteArray, QDateTime
+from PyQt6.QtGui import QAction, QCloseEvent
 
 # one day, I will yaml or .ini this :D 
 import tracker_config as tkc
@@ -28,19 +28,26 @@ from utility.widgets_set_widgets.slider_spinbox_connections import (
 # Database connections
 from database.database_manager import (
     DataManager)
+from database.write_behind import (
+    WriteBehindWorker)
+from database.export_data import (
+    ExportWorker)
+from database.maintenance import (
+    MaintenanceScheduler)
+from database.backup import (
+    BackupWorker, backup_due)
 
 # Delete Records
 from database.database_utility.delete_records import (
-    delete_selected_rows)
+    delete_from_active_table, undo_delete_in_active_table)
 
 # setup Models
 from database.database_utility.model_setup import (
     create_and_set_model)
 
-# add data modules
-from database.wefe_add_data import add_wefe_data
-from database.mental_mental import add_mentalsolo_data
-from database.cspr import add_cspr_data
+# tracker registry and entry forms
+from database.schema import TRACKERS, TRACKERS_BY_TABLE
+from database.tracker_form import TrackerForm, connect_derived_fields, connect_spinboxes
 
 
 class MainWindow(FramelessWindow, QtWidgets.QMainWindow, Ui_MainWindow):
@@ -54,7 +61,12 @@ class MainWindow(FramelessWindow, QtWidgets.QMainWindow, Ui_MainWindow):
         cspr_model: The CSPR model.
         wefe_model: The WEFE model.
         ui: The UI object.
-        db_manager: The data manager object.
+        db_manager: The data manager object, reading on the GUI thread's read-only connection.
+        db_writer: The background writer owning the only writer connection; every write goes through it.
+        export_worker: The running table export, if any.
+        maintenance: The idle-time database upkeep scheduler.
+        backup_worker: The running database backup, if any.
+        forms: The entry form of each tracker, keyed by table.
         settings: The QSettings object.
     """
 
@@ -68,8 +80,27 @@ class MainWindow(FramelessWindow, QtWidgets.QMainWindow, Ui_MainWindow):
         self.ui = Ui_MainWindow()
         self.setupUi(self)
         # Database init
-        self.db_manager = DataManager()
+        self.db_manager = DataManager(migration_progress=self.on_migration_progress)
+        # the tables are migrated, the writer thread owns the only writer from here on
+        self.db_manager.hand_off_writer()
+        self.db_writer = WriteBehindWorker()
+        self.db_writer.committed.connect(self.on_rows_committed)
+        self.db_writer.failed.connect(self.on_rows_failed)
+        self.db_writer.external_change.connect(self.on_external_change)
+        self.db_writer.start()
         self.setup_models()
+        self.export_worker = None
+        self.maintenance = MaintenanceScheduler(self.db_writer, parent=self)
+        self.maintenance.rows_removed.connect(self.on_rows_removed)
+        self.maintenance.start()
+        self.backup_worker = None
+        self.backup_timer = QTimer(self)
+        self.backup_timer.timeout.connect(self.backup_if_due)
+        self.backup_timer.start(3600 * 1000)
+        self.backup_if_due()
+        self.external_change_timer = QTimer(self)
+        self.external_change_timer.timeout.connect(self.db_writer.poll_external_changes)
+        self.external_change_timer.start(tkc.EXTERNAL_CHANGE_POLL_MS)
         # QSettings settings_manager setup
         self.settings = QSettings(tkc.ORGANIZATION_NAME, tkc.APPLICATION_NAME)
         self.setWindowFlags(Qt.WindowType.FramelessWindowHint)
@@ -78,57 +109,9 @@ class MainWindow(FramelessWindow, QtWidgets.QMainWindow, Ui_MainWindow):
         self.slider_set_spinbox()
         self.stack_navigation()
         self.commits()
-        self.update_beck_summary()
+        connect_derived_fields(self, TRACKERS)
         self.delete_group()
-        self.auto_datettime()
-        
-        self.summing_box.setEnabled(False)
-        for slider in [self.wellbeing_slider, self.excite_slider, self.focus_slider,
-                       self.energy_slider]:
-            slider.setRange(0, 10)
-        
-        self.wellbeing_slider.valueChanged.connect(self.update_beck_summary)
-        self.excite_slider.valueChanged.connect(self.update_beck_summary)
-        self.focus_slider.valueChanged.connect(self.update_beck_summary)
-        self.energy_slider.valueChanged.connect(self.update_beck_summary)
-    
-    def auto_datettime(self) -> None:
-        """
-        Sets the current date and time for various widgets.
-
-        This method sets the current date and time for the `mental_mental_time`,
-        `mental_mental_date`, `wefe_time`, `wefe_date`, `cspr_time`, and `cspr_date`
-        widgets to the current system date and time.
-
-        Returns:
-            None
-        """
-        self.mental_mental_time.setTime(QTime.currentTime())
-        self.mental_mental_date.setDate(QDate.currentDate())
-        self.wefe_time.setTime(QTime.currentTime())
-        self.wefe_date.setDate(QDate.currentDate())
-        self.cspr_time.setTime(QTime.currentTime())
-        self.cspr_date.setDate(QDate.currentDate())
-    
-    def update_beck_summary(self):
-            """
-            Updates the averages of the sliders in the wellbeing and pain module such that
-            the overall is the average of the whole.
-            
-            :return: None
-            """
-            try:
-                values = [slider.value() for slider in
-                          [self.wellbeing_slider, self.excite_slider, self.focus_slider,
-                           self.energy_slider] if
-                          slider.value() > 0]
-                
-                s = sum(values)
-                
-                self.summing_box.setValue(int(s))
-            
-            except Exception as e:
-                logger.error(f"{e}", exc_info=True)
+        self.export_group()
     
     def switch_to_page0(self):
         """
@@ -267,124 +250,117 @@ class MainWindow(FramelessWindow, QtWidgets.QMainWindow, Ui_MainWindow):
     
     def commits(self):
         """
-        Executes the commit methods for mental_mental_table, cspr, and wefe.
+        Connects each tracker's commit action to its entry form.
 
-        This method calls the following methods:
-        - mental_mental_table_commit()
-        - cspr_commit()
-        - wefe_commit()
+        One ``TrackerForm`` per tracker in ``TRACKERS`` reads the widgets and
+        queues the row for the background writer. Building it sets the value
+        ranges from ``TRACKERS`` and the dates and times to now.
         """
-        self.mental_mental_table_commit()
-        self.cspr_commit()
-        self.wefe_commit()
+        self.forms = {}
+        for tracker in TRACKERS:
+            try:
+                form = TrackerForm(self, tracker)
+                self.forms[tracker.table] = form
+                getattr(self, tracker.commit_action).triggered.connect(
+                    lambda checked=False, form=form: form.commit(self.db_writer.submit))
+            except Exception as e:
+                logger.error(f"An Error has occurred {e}", exc_info=True)
     
     def slider_set_spinbox(self):
         """
         Connects sliders to their corresponding spinboxes.
 
-        This method connects each slider to its corresponding spinbox using a dictionary.
-        The dictionary maps each slider object to its corresponding spinbox object.
-        It then iterates over the dictionary and calls the `connect_slider_spinbox` function
-        to establish the connection between each slider and spinbox.
+        Every tracker field that declares a spinbox in ``TRACKERS`` is linked to
+        it with the `connect_slider_spinbox` function.
 
         Returns:
             None
         """
-        connect_slider_to_spinbox = {
-            self.wellbeing_slider: self.wellbeing_spinbox,
-            self.excite_slider: self.excite_spinbox,
-            self.focus_slider: self.focus_spinbox,
-            self.energy_slider: self.energy_spinbox,
-            self.mood_slider: self.mood,
-            self.mania_slider: self.mania,
-            self.depression_slider: self.depression,
-            self.mixed_risk_slider: self.mixed_risk,
-            self.calm_slider: self.calm_spinbox,
-            self.stress_slider: self.stress_spinbox,
-            self.rage_slider: self.rage_spinbox,
-            self.pain_slider: self.pain_spinbox,
-        }
-        
-        for slider, spinbox in connect_slider_to_spinbox.items():
-            connect_slider_spinbox(slider, spinbox)
+        connect_spinboxes(self, TRACKERS, connect_slider_spinbox)
     
-    def mental_mental_table_commit(self) -> None:
+    def on_migration_progress(self, description: str, done: int, total: int) -> None:
         """
-        Connects the 'commit' action to the 'add_mentalsolo_data' function and inserts data into the mental_mental_table.
+        Keeps the application responsive while a schema migration rewrites data.
 
-        Raises:
-            Exception: If an error occurs during the process.
+        Args:
+            description (str): The migration step being applied.
+            done (int): The amount of work finished so far.
+            total (int): The total amount of work for the step.
+
+        Returns:
+            None
+        """
+        logger.info(f"{description}: {done}/{total}")
+        QtWidgets.QApplication.processEvents()
+    
+    def on_rows_committed(self, table: str, ids: list) -> None:
+        """
+        Merges the rows the background writer committed into the model of their table.
+
+        Args:
+            table (str): The name of the table that received new rows.
+            ids (list): The ids of the inserted or upserted rows.
+
+        Returns:
+            None
         """
         try:
-            self.actionCommitMM.triggered.connect(
-                lambda: add_mentalsolo_data(
-                    self, {
-                        "mental_mental_date": "mental_mental_date",
-                        "mental_mental_time": "mental_mental_time",
-                        "mood_slider": "mood_slider",
-                        "mania_slider": "mania_slider",
-                        "depression_slider": "depression_slider",
-                        "mixed_risk_slider": "mixed_risk_slider",
-                        "model": "mental_mental_model"
-                    },
-                    self.db_manager.insert_into_mental_mental_table, ))
+            getattr(self, TRACKERS_BY_TABLE[table].model).apply_written(ids)
         except Exception as e:
-            logger.error(f"An Error has occurred {e}", exc_info=True)
+            logger.error(f"Error refreshing model for {table}: {e}", exc_info=True)
     
-    def cspr_commit(self) -> None:
+    def on_rows_removed(self, table: str) -> None:
         """
-        Connects the 'Commit CSPR' action to the 'add_cspr_data' function and inserts the CSPR exam data into the database.
+        Reloads the model of a table whose rows maintenance moved to the archive or compacted.
 
-        Raises:
-            Exception: If an error occurs during the execution of the method.
+        Args:
+            table (str): The name of the table that lost rows.
+
+        Returns:
+            None
         """
         try:
-            self.actionCommitCSPR.triggered.connect(
-                lambda: add_cspr_data(
-                    self, {
-                        "cspr_date": "cspr_date",
-                        "cspr_time": "cspr_time",
-                        "calm_slider": "calm_slider",
-                        "stress_slider": "stress_slider",
-                        "pain_slider": "pain_slider",
-                        "rage_slider": "rage_slider",
-                        "model": "cspr_model"
-                    },
-                    self.db_manager.insert_into_cspr_exam, ))
+            getattr(self, TRACKERS_BY_TABLE[table].model).select()
         except Exception as e:
-            logger.error(f"An Error has occurred {e}", exc_info=True)
+            logger.error(f"Error refreshing model for {table}: {e}", exc_info=True)
     
-    def wefe_commit(self) -> None:
+    def on_rows_failed(self, table: str, rows: list) -> None:
         """
-        Connects the actionCommitWEFE signal to the add_wefe_data function with the specified parameters.
-        Inserts the WEFE data into the WEFE table using the db_manager.
+        Puts the last entry the background writer gave up on back into an untouched form.
 
-        Raises:
-            Exception: If an error occurs during the process.
+        Args:
+            table (str): The name of the table the rows were meant for.
+            rows (list): The rows that were not written.
+
+        Returns:
+            None
+        """
+        logger.error(f"{len(rows)} entries of {table} could not be saved: {rows}")
+        form = self.forms.get(table)
+        # an entry the user already started is not overwritten
+        if form is not None and rows and not form.touched:
+            form.restore(rows[-1])
+    
+    def on_external_change(self) -> None:
+        """
+        Reloads every model when the writer's poll finds that another process changed the database.
+
+        Returns:
+            None
         """
         try:
-            self.actionCommitWEFE.triggered.connect(
-                lambda: add_wefe_data(
-                    self, {
-                        "wefe_date": "wefe_date",
-                        "wefe_time": "wefe_time",
-                        "wellbeing_slider": "wellbeing_slider",
-                        "excite_slider": "excite_slider",
-                        "focus_slider": "focus_slider",
-                        "energy_slider": "energy_slider",
-                        "summing_box": "summing_box",
-                        "model": "wefe_model"
-                    },
-                    self.db_manager.insert_into_wefe_table, ))
+            for tracker in TRACKERS:
+                getattr(self, tracker.model).select()
         except Exception as e:
-            logger.error(f"An Error has occurred {e}", exc_info=True)
+            logger.error(f"Error reloading after an external change: {e}", exc_info=True)
     
     def delete_group(self):
         """
-        Connects the 'Delete' action to the corresponding delete_selected_rows function for multiple table views.
+        Connects the 'Delete' action to deleting the selected rows of the active table view.
 
-        This method connects the 'Delete' action to the delete_selected_rows function for multiple table views.
-        It sets up the connections for deleting selected rows in the 'wefe_tableview', 'cspr_tableview', and 'mental_mental_table'.
+        Only the focused (or else the only visible) tracker view is touched, the
+        others are left alone.
+        An 'Undo Delete' action in the DATA menu restores that view's last soft delete.
 
         Parameters:
         - self: The instance of the main window.
@@ -392,50 +368,93 @@ class MainWindow(FramelessWindow, QtWidgets.QMainWindow, Ui_MainWindow):
         Returns:
         None
         """
+        tables = [(tracker.view, tracker.model) for tracker in TRACKERS]
         self.actionDelete.triggered.connect(
-            lambda: delete_selected_rows(
-                self,
-                'wefe_tableview',
-                'wefe_model'
-            )
+            lambda: delete_from_active_table(self, tables)
         )
-        self.actionDelete.triggered.connect(
-            lambda: delete_selected_rows(
-                self,
-                'cspr_tableview',
-                'cspr_model'
-            )
-        )
-        self.actionDelete.triggered.connect(
-            lambda: delete_selected_rows(
-                self,
-                'mental_mental_table',
-                'mental_mental_model'
-            )
+        self.actionUndoDelete = QAction("Undo Delete", self)
+        self.actionUndoDelete.setShortcut("Ctrl+Shift+U")
+        self.actionUndoDelete.setEnabled(tkc.SOFT_DELETE)
+        self.menuDATA.addAction(self.actionUndoDelete)
+        self.actionUndoDelete.triggered.connect(
+            lambda: undo_delete_in_active_table(self, tables)
         )
     
+    def export_group(self) -> None:
+        """
+        Adds the 'Export Data' action to the DATA menu.
+
+        Returns:
+            None
+        """
+        self.actionExport = QAction("Export Data", self)
+        self.actionExport.setShortcut("Ctrl+Shift+E")
+        self.menuDATA.addAction(self.actionExport)
+        self.actionExport.triggered.connect(self.export_tables)
+    
+    def export_tables(self) -> None:
+        """
+        Asks for a directory and exports all three tables to it on a worker thread.
+
+        Returns:
+            None
+        """
+        try:
+            if self.export_worker is not None and self.export_worker.isRunning():
+                logger.error("An export is already running")
+                return
+            directory = QtWidgets.QFileDialog.getExistingDirectory(self, "Export Data")
+            if not directory:
+                return
+            self.export_worker = ExportWorker(
+                self.db_manager.db.databaseName(),
+                [tracker.table for tracker in TRACKERS],
+                directory)
+            self.export_worker.exported.connect(
+                lambda table, path, rows: logger.info(f"Exported {rows} rows of {table} to {path}"))
+            self.export_worker.failed.connect(
+                lambda message: logger.error(f"Export failed: {message}"))
+            self.export_worker.start()
+        except Exception as e:
+            logger.error(f"Error starting export: {e}", exc_info=True)
+    
+    def backup_if_due(self) -> None:
+        """
+        Starts a background snapshot of the database when the newest one is too old.
+
+        Returns:
+            None
+        """
+        try:
+            if self.backup_worker is not None and self.backup_worker.isRunning():
+                return
+            db_name = self.db_manager.db.databaseName()
+            if not backup_due(tkc.BACKUP_DIR, db_name):
+                return
+            self.backup_worker = BackupWorker(db_name)
+            self.backup_worker.failed.connect(
+                lambda message: logger.error(f"Backup failed: {message}"))
+            self.backup_worker.start()
+        except Exception as e:
+            logger.error(f"Error starting backup: {e}", exc_info=True)
+    
     def setup_models(self) -> None:
         """
         Sets up the models for the different table views in the main window.
 
-        This method creates and sets the models for the 'wefe_tableview', 'cspr_tableview',
-        and 'mental_mental_table' table views.
+        Each tracker in ``TRACKERS`` gets a model on its table view, stored in
+        the attribute the tracker names (e.g. 'wefe_model').
 
         Returns:
             None
         """
-        self.wefe_model = create_and_set_model(
-            "wefe_table",
-            self.wefe_tableview
-        )
-        self.cspr_model = create_and_set_model(
-            "cspr_table",
-            self.cspr_tableview
-        )
-        self.mental_mental_model = create_and_set_model(
-            "mental_mental_table",
-            self.mental_mental_table
-        )
+        for tracker in TRACKERS:
+            setattr(self, tracker.model, create_and_set_model(
+                tracker.table,
+                getattr(self, tracker.view),
+                self.db_manager.db,
+                self.db_writer.call
+            ))
     
     def save_state(self):
         """
@@ -482,7 +501,7 @@ class MainWindow(FramelessWindow, QtWidgets.QMainWindow, Ui_MainWindow):
         """
         Event handler for the close event of the window.
 
-        Saves the state before closing the window.
+        Saves the state, stops maintenance and drains the background writer before closing the window.
 
         Args:
             event (QCloseEvent): The close event object.
@@ -494,3 +513,12 @@ class MainWindow(FramelessWindow, QtWidgets.QMainWindow, Ui_MainWindow):
             self.save_state()
         except Exception as e:
             logger.error(f"error saving state during closure: {e}", exc_info=True)
+        try:
+            self.maintenance.stop()
+            if self.export_worker is not None:
+                self.export_worker.wait()
+            if self.backup_worker is not None:
+                self.backup_worker.wait()
+            self.db_writer.stop()
+        except Exception as e:
+            logger.error(f"error draining the database writer during closure: {e}", exc_info=True)